@@ -11,6 +11,14 @@ os.environ['LANG'] = 'en_US.UTF-8'
 from modules.ui_functions import *  # Import all functions from ui_functions.py
 import modules.utils.archive_utils as archive_utils
 import modules.utils.config_utils as ConfigUtils  # For reading configuration settings
+from modules.utils.treeview_refresh import RefreshCoalescer
+from modules.utils.name_index import NameIndex
+from modules.virtual_table_ui import VirtualTable
+from modules.utils.ui_event_bus import UIEventBus
+from modules.prematching import BackgroundPrematcher, MatchCache
+from modules.matching_stages import load_matching_profile
+from modules.watch_mode import WatchMode
+from modules.utils.alias_automaton import AliasTable
 
 if getattr(sys, 'frozen', False):
     BASE_DIR = os.path.dirname(sys.executable)  # Main.exe location
@@ -33,6 +41,24 @@ class App:
         # Set the theme to dark
         sv_ttk.set_theme("dark")
 
+        # Worker threads post UI updates here instead of touching widgets
+        self.event_bus = UIEventBus(self.root)
+
+        # Batch list refreshes requested by workers into one refresh per short window
+        self.refresh_coalescer = RefreshCoalescer(self.root, self.refresh_all_lists)
+
+        # Match results of unchanged source folders, filled in the background after a folder is selected
+        self.match_cache = MatchCache()
+        self.prematcher = BackgroundPrematcher(self.match_cache)
+
+        # Optional watch on the game folder that extracts new archives as they arrive
+        self.watch_mode = WatchMode(self.request_refresh)
+        self.watch_mode_enabled = tk.BooleanVar(value=False)
+
+        # Indexes behind the filter boxes of the archive and source folder lists
+        self.archive_name_index = NameIndex()
+        self.source_name_index = NameIndex()
+
         # Create header frame with game selection combobox
         self.header_frame = ttk.Frame(root)
         self.header_frame.pack(padx=(10, 10), pady=(5, 10), fill='x')
@@ -53,6 +79,14 @@ class App:
         settings_button = ttk.Button(self.header_frame, text="Settings", command=lambda: open_settings(self))
         settings_button.pack(side=tk.LEFT, padx=(10, 10), pady=(10, 10))
 
+        # Revert the newest journaled run in one pass
+        undo_button = ttk.Button(self.header_frame, text="Undo Last Run", command=lambda: undo_last_run(self))
+        undo_button.pack(side=tk.LEFT, padx=(0, 10), pady=(10, 10))
+
+        # Match and move every game folder with a destination in one run
+        process_all_button = ttk.Button(self.header_frame, text="Process All Games", command=lambda: process_all_games_actions(self))
+        process_all_button.pack(side=tk.LEFT, padx=(0, 10), pady=(10, 10))
+
         # Create container for main content
         self.container = ttk.Frame(root)
         self.container.pack(padx=(10, 10), pady=(0, 0), fill='both', expand=True)
@@ -95,7 +129,11 @@ class App:
         self.destination_path_list = config['DESTINATION_PATH']
         self.similarity_threshold = config['SIMILARITY_THRESHOLD']
         self.extensions_check = config['EXTENSIONS_CHECK']
-        self.alias_data = dictionary_data['ALIAS']
+        # Optional, results beyond this count are kept in a file in the cache folder instead of memory
+        self.result_spill_threshold = config.get('RESULT_SPILL_THRESHOLD')
+        # Optional, name of a built-in matching profile or a custom stage order, see modules/matching_stages.py
+        self.matching_profile = load_matching_profile(config.get('MATCHING_PROFILE'), self.similarity_threshold)
+        self.alias_data = AliasTable(dictionary_data['ALIAS'])  # Looked up with one automaton pass per name
         self.settings_data = dictionary_data['SETTINGS']
 
         # Log the settings data
@@ -155,6 +193,9 @@ class App:
     
         self.game_folder_selected_path = os.path.join(self.source_folder_root, self.game_folder_selected)
         log_message(f"selected_game_folder_path: {self.game_folder_selected_path}")
+
+        # The destination of the new selection is only known after STEP 3 is built
+        self.destination_folder = None
      
         if self.game_folder_selected == "Manual":
             # Frame for Source Folder Selection (only in Manual mode)
@@ -175,6 +216,10 @@ class App:
         # Step 3 - Confirm if You're Ready to Move
         self.create_destination_folder_confirmation()
 
+        # Start matching while the user reviews the lists
+        self.start_prematching()
+        self.update_watch_mode()
+
     def create_manual_source_folder_selection(self):
         """Create UI elements for manual source folder selection."""
         source_folder_frame = ttk.Frame(self.container)
@@ -213,27 +258,26 @@ class App:
         step1_label = ttk.Label(self.container, text="STEP 1 - Extract Available Archive", font=("Segoe UI", 12, "bold"))
         step1_label.pack(padx=(10, 10), pady=(5, 10), anchor='w')
 
-        self.available_archive_label = ttk.Label(self.container, text="Available Archive", padding=(0, 5))
-        self.available_archive_label.pack(anchor='w', padx=(10, 10))
+        available_archive_header = ttk.Frame(self.container)
+        available_archive_header.pack(padx=(10, 10), fill='x')
+        self.available_archive_label = ttk.Label(available_archive_header, text="Available Archive", padding=(0, 5))
+        self.available_archive_label.pack(side=tk.LEFT)
+        self.archive_filter_text_box = self.create_filter_box(available_archive_header, self.apply_archive_filter)
 
         # Scrollable frame for available archives
         self.available_archive_frame = ttk.Frame(self.container)
         self.available_archive_frame.pack(padx=(10, 10), pady=(0, 0), fill='x')
 
-        # Listbox for available archives
-        self.available_archive_listbox = ttk.Treeview(self.available_archive_frame, columns=("No", "Archive Name"), show='headings', height=5)
+        # Listbox for available archives, virtualized so only the visible rows exist in the widget
+        self.available_archive_listbox = VirtualTable(self.available_archive_frame, columns=("No", "Archive Name"), height=5, placeholder=("-", "No archive found"))
         self.available_archive_listbox.column("No", width=30, anchor=tk.W)  
         self.available_archive_listbox.heading("No", text="No")
         self.available_archive_listbox.column("Archive Name", width=500, anchor=tk.W) 
         self.available_archive_listbox.heading("Archive Name", text="Archive Name")
         self.available_archive_listbox.pack(side=tk.LEFT, fill='both', expand=True)
 
-        self.scrollbar = ttk.Scrollbar(self.available_archive_frame, orient="vertical", command=self.available_archive_listbox.yview)
-        self.scrollbar.pack(side=tk.RIGHT, fill='y')
-        self.available_archive_listbox.configure(yscrollcommand=self.scrollbar.set)
-
         # Bind selection event for available archives
-        self.available_archive_listbox.bind("<<TreeviewSelect>>", lambda event: on_archive_selected(self, self.available_archive_listbox.selection()))
+        self.available_archive_listbox.bind("<<TableSelect>>", lambda event: on_archive_selected(self, self.available_archive_listbox.selection()))
 
         # Horizontal panel for Extract buttons
         extract_button_frame = ttk.Frame(self.container)
@@ -248,6 +292,15 @@ class App:
         self.extract_all_button = ttk.Button(extract_button_frame, text="Extract All", command=lambda: extract_archives(self, self.available_archive_paths_list))     
         self.extract_all_button.pack_forget()
 
+        # Option to extract confidently matched archives straight into the destination folder
+        self.place_matched_archives = tk.BooleanVar(value=False)
+        self.place_matched_checkbox = ttk.Checkbutton(extract_button_frame, text="Place confident matches directly", variable=self.place_matched_archives, command=self.update_watch_mode)
+        self.place_matched_checkbox.pack(side=tk.LEFT)
+
+        # Extract archives that are dropped into the game folder without pressing Refresh
+        self.watch_mode_checkbox = ttk.Checkbutton(extract_button_frame, text="Watch for new archives", variable=self.watch_mode_enabled, command=self.update_watch_mode)
+        self.watch_mode_checkbox.pack(side=tk.LEFT, padx=(10, 0))
+
         # Refresh available archives
         self.refresh_available_archives()
 
@@ -256,14 +309,18 @@ class App:
         step2_label = ttk.Label(self.container, text="STEP 2 - Review Your Source Folder", font=("Segoe UI", 12, "bold"))
         step2_label.pack(padx=(10, 10), pady=(5, 10), anchor='w')
 
-        self.source_folder_review_label = ttk.Label(self.container, text="List Source Folder", padding=(0, 5))
-        self.source_folder_review_label.pack(padx=(10, 10), anchor='w')
+        source_folder_header = ttk.Frame(self.container)
+        source_folder_header.pack(padx=(10, 10), fill='x')
+        self.source_folder_review_label = ttk.Label(source_folder_header, text="List Source Folder", padding=(0, 5))
+        self.source_folder_review_label.pack(side=tk.LEFT)
+        self.source_filter_text_box = self.create_filter_box(source_folder_header, self.apply_source_filter)
 
         # Scrollable frame for source folder list
         self.source_folder_frame = ttk.Frame(self.container)
         self.source_folder_frame.pack(padx=(10, 10), pady=(0, 0), fill='both', expand=True)
 
-        self.source_folder_listbox = ttk.Treeview(self.source_folder_frame, columns=("No", "Folder Name"), show='headings', height=5)
+        # Virtualized list, only the visible rows exist in the widget
+        self.source_folder_listbox = VirtualTable(self.source_folder_frame, columns=("No", "Folder Name"), height=5, placeholder=("-", "No source folder found"))
         self.source_folder_listbox.column("No", width=30, anchor=tk.W)  
         self.source_folder_listbox.heading("No", text="No")
         self.source_folder_listbox.column("Folder Name", width=500, anchor=tk.W)  
@@ -271,11 +328,7 @@ class App:
         self.source_folder_listbox.pack(side=tk.LEFT, fill='both', expand=True)
 
         # Bind selection event to update rename text box
-        self.source_folder_listbox.bind("<<TreeviewSelect>>", lambda event: on_source_folder_selected(self, self.source_folder_listbox.selection(), event))
-
-        self.scrollbar_source = ttk.Scrollbar(self.source_folder_frame, orient="vertical", command=self.source_folder_listbox.yview)
-        self.scrollbar_source.pack(side=tk.RIGHT, fill='y')
-        self.source_folder_listbox.configure(yscrollcommand=self.scrollbar_source.set)
+        self.source_folder_listbox.bind("<<TableSelect>>", lambda event: on_source_folder_selected(self, self.source_folder_listbox.selection(), event))
 
         # Horizontal layout for Rename
         self.create_rename_section()
@@ -332,52 +385,105 @@ class App:
         self.process_folder_button = ttk.Button(self.container, text="Process Folder", command=lambda: process_folder_actions(self, self.game_folder_selected_path, self.available_source_folders_list, self.destination_folder), style="Accent.TButton")
         self.process_folder_button.pack(padx=(10, 10), pady=(5, 10), fill='x')
 
-    def refresh_available_archives(self):
+    def start_prematching(self):
+        """Match the current source folders in the background so Process Folder can reuse the results."""
+        if not self.destination_folder or not self.available_source_folders_list:
+            self.prematcher.cancel()
+            return
+        self.prematcher.start(
+            self.game_folder_selected_path,
+            list(self.available_source_folders_list),
+            self.destination_folder,
+            self.alias_data,
+            self.similarity_threshold,
+            self.extensions_check,
+            self.skipworld_list,
+            self.ignore_numbers_status,
+            self.matching_profile
+        )
+
+    def update_watch_mode(self):
+        """Start, move or stop the watch on the game folder to follow the checkbox and the current settings."""
+        if self.watch_mode_enabled.get() and self.game_folder_selected_path:
+            self.watch_mode.start(self.game_folder_selected_path, make_extraction_resolver(self))
+        else:
+            self.watch_mode.stop()
+
+    def create_filter_box(self, parent, apply_filter):
+        """Create a filter Entry that narrows a list on every keystroke."""
+        filter_text_box = ttk.Entry(parent, width=30)
+        filter_text_box.pack(side=tk.RIGHT)
+        filter_text_box.bind("<KeyRelease>", lambda event: apply_filter())
+        ttk.Label(parent, text="Filter:").pack(side=tk.RIGHT, padx=(0, 5))
+        return filter_text_box
+
+    def apply_filter(self, table, name_index, filter_text_box):
+        """Show only the rows whose name matches the filter text, using the prebuilt name index."""
+        matched_names = name_index.search(filter_text_box.get())
+        if matched_names is None and table.filter_predicate is None:
+            return  # No filter before or now, keep the scroll position
+        table.set_filter(None if matched_names is None else (lambda key, values: key in matched_names))
+
+    def apply_archive_filter(self):
+        self.apply_filter(self.available_archive_listbox, self.archive_name_index, self.archive_filter_text_box)
+
+    def apply_source_filter(self):
+        self.apply_filter(self.source_folder_listbox, self.source_name_index, self.source_filter_text_box)
+
+    def request_refresh(self):
+        """Ask for both lists to be refreshed, safe to call from worker threads."""
+        self.refresh_coalescer.request()
+
+    def refresh_all_lists(self):
+        """Refresh both lists from a single listing of the game folder."""
+        archive_list, source_folder_list = folder_management.list_game_folder_contents(self.game_folder_selected_path)
+        self.refresh_available_archives(archive_list)
+        self.refresh_available_source_folders(source_folder_list)
+
+    def refresh_available_archives(self, archive_list=None):
         """Refresh the available archives Listbox."""
-        
-        # Clear the current contents of the Listbox
-        self.available_archive_listbox.delete(*self.available_archive_listbox.get_children())
-        log_message("Cleared all children in available_archive_listbox")
 
         # List all available archives in the selected game folder
-        self.available_archive_list = archive_utils.list_archive_files_in_directory(self.game_folder_selected_path)
-        log_message("Repopulated available_archive_listbox")
+        if archive_list is None:
+            archive_list = archive_utils.list_archive_files_in_directory(self.game_folder_selected_path)
+        self.available_archive_list = archive_list
 
-        # If no archives found, display a message
+        # Only archives that appeared or disappeared change the table, a placeholder is shown when no archives are found
+        self.available_archive_listbox.update_rows(
+            (name, (index, name)) for index, (name, path) in enumerate(self.available_archive_list, start=1)
+        )
+        self.archive_name_index.update(name for name, path in self.available_archive_list)
+        self.apply_archive_filter()
         if not self.available_archive_list:
-            self.available_archive_listbox.insert("", "end", values=("-", "No archive found"))
             self.extract_all_button.pack_forget()
         else:
             self.extract_all_button.pack(side=tk.RIGHT, padx=5)
-            for index, (name, path) in enumerate(self.available_archive_list, start=1):
-                # Add number and name to available_archive_listbox
-                self.available_archive_listbox.insert("", "end", values=(index, name))
 
         # Update the list of selected archive paths
         self.available_archive_paths_list = [path for name, path in self.available_archive_list]
         self.selected_archive_paths = []
         self.extract_selected_button.pack_forget()
 
-    def refresh_available_source_folders(self):
+    def refresh_available_source_folders(self, source_folder_list=None):
         """Refresh the available source folder Listbox."""
 
-        # Clear the current contents of the Listbox
-        self.source_folder_listbox.delete(*self.source_folder_listbox.get_children())
-        log_message("Cleared all children in source_folder_listbox")
-
         # List all available source folders in the selected game folder
-        self.available_source_folders_list = folder_management.list_available_source_folders(self.game_folder_selected_path)
-        log_message("Repopulated source_folder_listbox")
+        if source_folder_list is None:
+            source_folder_list = folder_management.list_available_source_folders(self.game_folder_selected_path)
+        self.available_source_folders_list = source_folder_list
 
-        # If no source folders found, display a message
+        # Only folders that appeared or disappeared change the table, a placeholder is shown when no folders are found
+        self.source_folder_listbox.update_rows(
+            (folder_name, (index, folder_name)) for index, (folder_name, folder_path) in enumerate(self.available_source_folders_list, start=1)
+        )
+        self.source_name_index.update(folder_name for folder_name, folder_path in self.available_source_folders_list)
+        self.apply_source_filter()
         if not self.available_source_folders_list:
-            self.source_folder_listbox.insert("", "end", values=("-", "No source folder found"))
             self.open_source_folder_button.pack_forget()
             self.rename_button.pack_forget()
-        else:
-            # Populate source folder list
-            for index, (folder_name, folder_path) in enumerate(self.available_source_folders_list, start=1):
-                self.source_folder_listbox.insert("", "end", values=(index, folder_name))
+
+        # Changed or new folders are matched again in the background, unchanged ones come from the cache
+        self.start_prematching()
       
 
 if __name__ == "__main__":
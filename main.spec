@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    hiddenimports=['py7zr'],  # Optional in-process 7z backend, .7z files use patool without it
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
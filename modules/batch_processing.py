@@ -0,0 +1,96 @@
+import os
+import threading
+from typing import List, Optional, Tuple
+import modules.folder_management as folder_management
+import modules.folder_matching as folder_matching
+from modules.result_store import ResultStore, ResultView
+from modules.utils.cancellation import CancellationToken, ProgressTracker
+from modules.utils.fingerprint import flag_installed_duplicates
+from modules.utils.logging_utils import log_message
+from modules.utils.scheduler import get_scheduler
+
+
+def list_batch_games(readytomoves_dir: str, destination_path_list: dict) -> List[Tuple[str, str, str]]:
+    """Return (game name, game folder path, destination folder) for every game folder
+       with a configured and existing destination."""
+    games = []
+    for game_name in folder_management.list_available_game_folders(readytomoves_dir) or []:
+        destination_folder = folder_management.check_and_determine_destination_folder(destination_path_list, game_name)
+        if not destination_folder or not os.path.isdir(destination_folder):
+            log_message(f"Batch: skipping '{game_name}', no usable destination folder.")
+            continue
+        games.append((game_name, os.path.join(readytomoves_dir, game_name), destination_folder))
+    return games
+
+
+def match_all_games(
+        games: List[Tuple[str, str, str]],
+        alias_data,
+        similarity_threshold,
+        extensions_check,
+        skipworld_list,
+        ignore_numbers_status,
+        cancel_token: Optional[CancellationToken] = None,
+        progress_callback=None,
+        match_cache=None,
+        result_store: Optional[ResultStore] = None,
+        profile=None,
+        ) -> ResultView:
+    """Match every game folder concurrently on the shared scheduler, one task per game since each
+       game has its own destination tree. Progress is reported over all games together as
+       progress_callback(current_source, done, total, eta_seconds).
+       All games write into one ResultStore, the returned view is ordered by game."""
+    result_store = result_store if result_store is not None else ResultStore()
+    sources_per_game = {game_name: folder_management.list_available_source_folders(game_folder_path) or []
+                        for game_name, game_folder_path, _ in games}
+    progress = ProgressTracker(sum(len(sources) for sources in sources_per_game.values()), progress_callback)
+    progress_lock = threading.Lock()
+
+    def make_game_progress(game_name):
+        last_done = 0
+
+        def report(current_name, done, total, eta_seconds):
+            nonlocal last_done
+            with progress_lock:
+                if done > last_done:
+                    last_done = done
+                    progress.finished(f"{game_name}: {current_name}")
+                else:
+                    progress.starting(f"{game_name}: {current_name}")
+        return report
+
+    def match_game(game_name, game_folder_path, destination_folder):
+        if not sources_per_game[game_name]:
+            return result_store.view([])
+        results = folder_matching.process_match_to_categorized(
+            game_folder_path,
+            sources_per_game[game_name],
+            destination_folder,
+            alias_data,
+            similarity_threshold,
+            extensions_check,
+            skipworld_list,
+            ignore_numbers_status,
+            cancel_token=cancel_token,
+            progress_callback=make_game_progress(game_name),
+            match_cache=match_cache,
+            result_store=result_store,
+            profile=profile
+        )
+        if results:
+            flag_installed_duplicates(results, destination_folder, cancel_token=cancel_token)
+        return results
+
+    all_indices = []
+    futures = get_scheduler().run_batch(lambda game: match_game(*game), games, cancel_token=cancel_token)
+    for game, future in zip(games, futures):
+        if future.cancelled():
+            continue
+        try:
+            all_indices.extend(future.result().indices)
+        except Exception as e:
+            log_message(f"Batch: matching '{game[0]}' failed: {e}")
+
+    # Keep a stable order for the review, grouped by game
+    all_indices.sort(key=lambda index: (result_store[index].destination_root, result_store.source_path(index)))
+    return result_store.view(all_indices)
@@ -0,0 +1,62 @@
+import os
+import sys
+import argparse
+import modules.folder_management as folder_management
+from modules.matcher import Matcher
+from modules.move_planner import execute_plan, format_plan, plan_moves
+from modules.utils.config_utils import BASE_DIR_DEFAULT
+from modules.utils.move_journal import MoveJournal
+
+CONFIDENCE_ORDER = ['HIGH', 'MEDIUM', 'LOW']
+
+
+def plan_command(args):
+    """Match a game folder, print the move plan and optionally execute it."""
+    try:
+        matcher = Matcher.from_config(args.base_dir, args.game)
+    except ValueError as e:
+        print(e)
+        return 1
+
+    game_folder_path = os.path.join(args.base_dir, 'readytomoves', args.game)
+    source_folders_list = folder_management.list_available_source_folders(game_folder_path) or []
+    matching_results = matcher.match_many(path for name, path in source_folders_list)
+    destination_folder = matcher.destination_folder
+
+    # Only plan the results at or above the requested confidence
+    allowed_categories = CONFIDENCE_ORDER[:CONFIDENCE_ORDER.index(args.min_confidence) + 1]
+    try:
+        selected_results = matching_results.filter(lambda result: result.category in allowed_categories)
+        plan = plan_moves(selected_results, destination_folder)
+    finally:
+        matching_results.store.close()
+    print(format_plan(plan))
+
+    if args.execute:
+        journal = MoveJournal()
+        try:
+            summary = execute_plan(plan, journal=journal)
+        finally:
+            journal.close()
+        print(f"Moved: {len(summary['moved'])}, Duplicates: {len(summary['duplicates'])}, Failed: {len(summary['failed'])}")
+        print(f"Journal: {journal.path}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="modsmover", description="Mods Mover Manager command line")
+    parser.add_argument('--base-dir', default=BASE_DIR_DEFAULT, help="Folder with config.json, dictionary.json and readytomoves")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    plan_parser = subparsers.add_parser('plan', help="Show the move plan for a game folder")
+    plan_parser.add_argument('game', help="Game folder name inside readytomoves")
+    plan_parser.add_argument('--min-confidence', choices=CONFIDENCE_ORDER[:2], default='HIGH')
+    plan_parser.add_argument('--execute', action='store_true', help="Execute the plan after showing it")
+    plan_parser.set_defaults(handler=plan_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+import os
+import sys
+import hmac
+import json
+import stat
+import socket
+import secrets
+import argparse
+import threading
+import socketserver
+from dataclasses import asdict
+from typing import Dict, Optional, Tuple
+import modules.folder_matching as folder_matching
+import modules.utils.archive_utils as archive_utils
+from modules.matcher import Matcher
+from modules.move_planner import plan_moves
+from modules.result_store import ResultStore
+from modules.utils.config_utils import BASE_DIR_DEFAULT
+from modules.utils.logging_utils import log_message
+
+# Requests and responses are JSON-RPC 2.0 objects, one per line
+DEFAULT_SOCKET_NAME = 'modsmover.sock'  # Created in the cache folder of the base directory
+DEFAULT_TOKEN_NAME = 'daemon-token'  # Other local users can reach a TCP port, requests there must carry this token
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 47321
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+UNAUTHORIZED = -32001
+SETTINGS_ERROR = -32002  # config.json or dictionary.json is missing or invalid, or the game has no destination
+
+
+class RPCError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+def default_socket_path(base_dir: str = BASE_DIR_DEFAULT) -> str:
+    return os.path.join(base_dir, 'cache', DEFAULT_SOCKET_NAME)
+
+
+def default_token_path(base_dir: str = BASE_DIR_DEFAULT) -> str:
+    return os.path.join(base_dir, 'cache', DEFAULT_TOKEN_NAME)
+
+
+def create_token_file(token_path: str) -> str:
+    """Write a new random token to a file only the current user can read and return it."""
+    os.makedirs(os.path.dirname(token_path), exist_ok=True)
+    token = secrets.token_hex(32)
+    fd = os.open(token_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as token_file:
+        if hasattr(os, 'fchmod'):
+            os.fchmod(token_file.fileno(), 0o600)  # The mode of open() only applies to new files
+        token_file.write(token)
+    return token
+
+
+def read_token_file(token_path: str) -> str:
+    with open(token_path, 'r') as token_file:
+        return token_file.read().strip()
+
+
+def result_to_dict(result) -> Dict:
+    return {
+        'source_path': result.source_path,
+        'destination_name': result.destination_name,
+        'destination_root': result.destination_root,
+        'confidence': result.confidence,
+        'reason': result.reason,
+        'category': result.category,
+        'alternatives': [list(alternative) for alternative in result.alternatives],
+    }
+
+
+class MatchingService:
+    """The calls served by the daemon. Matchers are kept per destination and thrown away
+       when config.json or dictionary.json change, so every call after the first one is warm."""
+
+    def __init__(self, base_dir: str = BASE_DIR_DEFAULT):
+        self.base_dir = base_dir
+        self.matchers: Dict[Tuple[Optional[str], Optional[str]], Matcher] = {}
+        self.settings_signature = None
+        self._lock = threading.Lock()
+
+    def settings_files_signature(self):
+        signature = []
+        for file_name in ('config.json', 'dictionary.json'):
+            try:
+                signature.append(os.stat(os.path.join(self.base_dir, file_name)).st_mtime_ns)
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def get_matcher(self, game: Optional[str] = None, destination_folder: Optional[str] = None) -> Matcher:
+        if not game and not destination_folder:
+            raise RPCError(INVALID_PARAMS, "Either 'game' or 'destination_folder' is required.")
+        signature = self.settings_files_signature()
+        with self._lock:
+            if signature != self.settings_signature:
+                if self.matchers:
+                    log_message("Daemon: settings changed, matchers are rebuilt.")
+                self.matchers.clear()
+                self.settings_signature = signature
+            key = (game, destination_folder)
+            matcher = self.matchers.get(key)
+            if matcher is None:
+                try:
+                    # Never the Tk loader, it shows message boxes and deletes invalid files
+                    matcher = Matcher.from_config(self.base_dir, game, destination_folder)
+                except ValueError as e:
+                    raise RPCError(SETTINGS_ERROR, str(e))
+                self.matchers[key] = matcher
+            return matcher
+
+    def match(self, paths, game: Optional[str] = None, destination_folder: Optional[str] = None):
+        """Match source folders, a single path or a list of paths."""
+        matcher = self.get_matcher(game, destination_folder)
+        paths = [paths] if isinstance(paths, str) else paths
+        result_store = ResultStore(spill_threshold=matcher.result_spill_threshold)
+        try:
+            return [result_to_dict(result) for result in matcher.iter_matches(paths, result_store=result_store)]
+        finally:
+            result_store.close()
+
+    def plan_moves(self, paths, game: Optional[str] = None, destination_folder: Optional[str] = None, min_confidence: str = 'HIGH'):
+        """Match source folders and return the moves they would make, nothing is moved."""
+        if min_confidence not in ('HIGH', 'MEDIUM', 'LOW'):
+            raise RPCError(INVALID_PARAMS, f"Invalid min_confidence '{min_confidence}'.")
+        allowed_categories = ('HIGH', 'MEDIUM', 'LOW')[:('HIGH', 'MEDIUM', 'LOW').index(min_confidence) + 1]
+        matcher = self.get_matcher(game, destination_folder)
+        paths = [paths] if isinstance(paths, str) else paths
+        result_store = ResultStore(spill_threshold=matcher.result_spill_threshold)
+        try:
+            results = [result for result in matcher.iter_matches(paths, result_store=result_store) if result.category in allowed_categories]
+            return [asdict(planned_move) for planned_move in plan_moves(results, matcher.destination_folder)]
+        finally:
+            result_store.close()
+
+    def extract(self, archive_path: str, game: Optional[str] = None, destination_folder: Optional[str] = None, place_matched: bool = False):
+        """Extract an archive next to itself, with place_matched confident matches go straight to their destination."""
+        resolve_target = None
+        if place_matched:
+            matcher = self.get_matcher(game, destination_folder)
+            resolve_target = folder_matching.make_archive_target_resolver(
+                matcher.destination_folder,
+                matcher.alias_data,
+                matcher.similarity_threshold,
+                matcher.extensions_check,
+                matcher.skipworld_list,
+                matcher.ignore_numbers_status
+            )
+        return archive_utils.extract_archive(archive_path, single_pass=True, resolve_target=resolve_target)
+
+    def ping(self):
+        return "pong"
+
+    METHODS = ('match', 'plan_moves', 'extract', 'ping')
+
+    def dispatch(self, request) -> Optional[Dict]:
+        """Run one JSON-RPC request and return the response, None for notifications."""
+        request_id = request.get('id') if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict) or request.get('jsonrpc') != '2.0' or not isinstance(request.get('method'), str):
+                raise RPCError(INVALID_REQUEST, "Invalid request.")
+            if request['method'] not in self.METHODS:
+                raise RPCError(METHOD_NOT_FOUND, f"Unknown method '{request['method']}'.")
+            params = request.get('params', {})
+            method = getattr(self, request['method'])
+            try:
+                if isinstance(params, list):
+                    result = method(*params)
+                elif isinstance(params, dict):
+                    result = method(**params)
+                else:
+                    raise RPCError(INVALID_PARAMS, "params must be an object or an array.")
+            except TypeError as e:
+                raise RPCError(INVALID_PARAMS, str(e))
+            response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+        except RPCError as e:
+            response = {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': e.code, 'message': str(e)}}
+        except Exception as e:
+            log_message(f"Daemon: request {request_id} failed: {e}")
+            response = {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': SERVER_ERROR, 'message': str(e)}}
+        if isinstance(request, dict) and 'id' not in request:
+            return None
+        return response
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Answer newline separated JSON-RPC requests until the client disconnects.
+       A line that is not JSON or a request without the server's token ends the connection."""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError:
+                self.send({'jsonrpc': '2.0', 'id': None, 'error': {'code': PARSE_ERROR, 'message': "Parse error."}})
+                return
+            if self.server.token is not None and not self.has_token(request):
+                request_id = request.get('id') if isinstance(request, dict) else None
+                self.send({'jsonrpc': '2.0', 'id': request_id, 'error': {'code': UNAUTHORIZED, 'message': "Missing or wrong token."}})
+                return
+            response = self.server.service.dispatch(request)
+            if response is not None:
+                self.send(response)
+
+    def has_token(self, request) -> bool:
+        if not isinstance(request, dict):
+            return False
+        token = request.get('token')
+        if token is None and isinstance(request.get('params'), dict):
+            token = request['params'].pop('token', None)
+        return isinstance(token, str) and hmac.compare_digest(token, self.server.token)
+
+    def send(self, response: Dict):
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+
+class ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+def remove_stale_socket(socket_path: str):
+    """Remove a socket left behind by a daemon that did not shut down cleanly.
+       Anything else at the path, or a socket a daemon still listens on, is left alone."""
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise RuntimeError(f"'{socket_path}' exists and is not a socket, refusing to replace it.")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except ConnectionRefusedError:
+        os.remove(socket_path)
+        log_message(f"Removed stale daemon socket '{socket_path}'.")
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"Another daemon is already listening on '{socket_path}'.")
+
+
+def create_server(service: MatchingService, socket_path: Optional[str] = None, port: Optional[int] = None):
+    """Listen on a Unix socket that only the current user can open, or on localhost when a port is given
+       or Unix sockets are not available. On localhost every request must carry the token written to
+       cache/daemon-token. Raise RuntimeError when the socket path is taken."""
+    if port is None and hasattr(socket, 'AF_UNIX'):
+        socket_path = socket_path or default_socket_path(service.base_dir)
+        os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+        remove_stale_socket(socket_path)
+        old_umask = os.umask(0o177)
+        try:
+            server = ThreadingUnixServer(socket_path, RequestHandler)
+        finally:
+            os.umask(old_umask)
+        server.token = None  # Only the current user can open the socket
+        log_message(f"Daemon listening on '{socket_path}'.")
+    else:
+        server = ThreadingTCPServer((DEFAULT_HOST, port or DEFAULT_PORT), RequestHandler)
+        server.token = create_token_file(default_token_path(service.base_dir))
+        log_message(f"Daemon listening on {DEFAULT_HOST}:{port or DEFAULT_PORT}, token in '{default_token_path(service.base_dir)}'.")
+    server.service = service
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="modsmover-daemon", description="Serve the matcher over JSON-RPC")
+    parser.add_argument('--base-dir', default=BASE_DIR_DEFAULT, help="Folder with config.json and dictionary.json")
+    parser.add_argument('--socket', help="Unix socket path, defaults to cache/modsmover.sock in the base folder")
+    parser.add_argument('--port', type=int, help="Listen on localhost at this port instead of a Unix socket")
+    args = parser.parse_args(argv)
+
+    try:
+        server = create_server(MatchingService(args.base_dir), args.socket, args.port)
+    except (OSError, RuntimeError) as e:
+        log_message(f"Daemon failed to start: {e}")
+        sys.exit(f"Daemon failed to start: {e}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if isinstance(server.server_address, str) and os.path.exists(server.server_address):
+            os.remove(server.server_address)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import sys
+import json
+import socket
+import argparse
+from typing import Optional
+from modules.daemon import DEFAULT_HOST, DEFAULT_PORT, default_socket_path, default_token_path, read_token_file
+from modules.utils.config_utils import BASE_DIR_DEFAULT
+
+
+class DaemonError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class DaemonClient:
+    """Small client for modules.daemon, one connection is reused for every call.
+       Uses the Unix socket unless a port is given or Unix sockets are not available.
+       Over TCP every request carries the token the daemon wrote to the cache folder of base_dir."""
+
+    def __init__(self, socket_path: Optional[str] = None, port: Optional[int] = None, timeout: Optional[float] = None,
+                 base_dir: str = BASE_DIR_DEFAULT, token: Optional[str] = None):
+        self.token = None
+        if port is None and hasattr(socket, 'AF_UNIX'):
+            self.connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.connection.settimeout(timeout)
+            self.connection.connect(socket_path or default_socket_path(base_dir))
+        else:
+            self.token = token or read_token_file(default_token_path(base_dir))
+            self.connection = socket.create_connection((DEFAULT_HOST, port or DEFAULT_PORT), timeout=timeout)
+        self.reader = self.connection.makefile('rb')
+        self.next_id = 1
+
+    def call(self, method: str, **params):
+        request = {'jsonrpc': '2.0', 'id': self.next_id, 'method': method, 'params': params}
+        if self.token is not None:
+            request['token'] = self.token
+        self.next_id += 1
+        self.connection.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("The daemon closed the connection.")
+        response = json.loads(line)
+        if 'error' in response:
+            raise DaemonError(response['error']['code'], response['error']['message'])
+        return response['result']
+
+    def match(self, paths, game: Optional[str] = None, destination_folder: Optional[str] = None):
+        return self.call('match', paths=paths, game=game, destination_folder=destination_folder)
+
+    def plan_moves(self, paths, game: Optional[str] = None, destination_folder: Optional[str] = None, min_confidence: str = 'HIGH'):
+        return self.call('plan_moves', paths=paths, game=game, destination_folder=destination_folder, min_confidence=min_confidence)
+
+    def extract(self, archive_path: str, game: Optional[str] = None, destination_folder: Optional[str] = None, place_matched: bool = False):
+        return self.call('extract', archive_path=archive_path, game=game, destination_folder=destination_folder, place_matched=place_matched)
+
+    def close(self):
+        self.reader.close()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="modsmover-client", description="Call a running modsmover daemon")
+    parser.add_argument('--base-dir', default=BASE_DIR_DEFAULT, help="Base folder of the daemon, used for the default socket path")
+    parser.add_argument('--socket', help="Unix socket path of the daemon")
+    parser.add_argument('--port', type=int, help="Connect to localhost at this port instead of a Unix socket")
+    parser.add_argument('--game', help="Game folder name whose configured destination is used")
+    parser.add_argument('--destination-folder', help="Destination folder to match against instead of a game's")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    match_parser = subparsers.add_parser('match', help="Match source folders")
+    match_parser.add_argument('paths', nargs='+')
+
+    plan_parser = subparsers.add_parser('plan', help="Show the moves for source folders without moving them")
+    plan_parser.add_argument('paths', nargs='+')
+    plan_parser.add_argument('--min-confidence', choices=['HIGH', 'MEDIUM'], default='HIGH')
+
+    extract_parser = subparsers.add_parser('extract', help="Extract an archive")
+    extract_parser.add_argument('archive_path')
+    extract_parser.add_argument('--place-matched', action='store_true', help="Place confident matches directly in their destination")
+
+    args = parser.parse_args(argv)
+    socket_path = args.socket or (default_socket_path(args.base_dir) if args.port is None else None)
+    try:
+        with DaemonClient(socket_path, args.port, base_dir=args.base_dir) as client:
+            if args.command == 'match':
+                result = client.match(args.paths, args.game, args.destination_folder)
+            elif args.command == 'plan':
+                result = client.plan_moves(args.paths, args.game, args.destination_folder, args.min_confidence)
+            else:
+                result = client.extract(args.archive_path, args.game, args.destination_folder, args.place_matched)
+    except (OSError, DaemonError) as e:
+        sys.exit(f"Daemon call failed: {e}")
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
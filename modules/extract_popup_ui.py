@@ -1,13 +1,17 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk
 import sv_ttk  # Import sv_ttk for theme
 import modules.utils.archive_utils as archive_utils
 import threading
+import time
 import os  # Import os to handle file paths
+from modules.utils.scheduler import get_scheduler
+from modules.utils.storage_profile import get_concurrency_tuner, get_device_slots
 
 class ArchiveExtractorPopup:
-    def __init__(self, archives, parent, main_app):
+    def __init__(self, archives, parent, main_app, resolve_target=None):
         self.archives = archives  # This should be a list of paths only
+        self.resolve_target = resolve_target  # Optional pre-match placing archives in their destination
         self.is_canceled = False  # Flag to check if extraction is canceled
         self.user_closed = False
         self.main_app = main_app  # Reference to the main application
@@ -74,72 +78,97 @@ class ArchiveExtractorPopup:
         self.is_canceled = False
         self.progress["value"] = 0
 
-        # Start the extraction in a new thread
-        threading.Thread(target=self.extract_archives, daemon=True).start()
+        # Start the extraction on the shared scheduler
+        get_scheduler().submit(self.extract_archives, name="extract-archives")
 
     def extract_archives(self):
-        """Extract all archives and update the progress bar."""
-        total_success = 0
-        total_already = 0
-        total_failed = 0
-
-        for index, path in enumerate(self.archives, start=1):
+        """Extract all archives on scheduler workers, every UI update is posted to the event bus.
+           Archives run in parallel as far as the storage of their folder allows, one at a time on a spinning disk."""
+        event_bus = self.main_app.event_bus
+        totals = {"Success": 0, "Placed": 0, "Already": 0, "Duplicate": 0, "Failed": 0}
+        totals_lock = threading.Lock()
+        started = 0
+
+        def extract_one(path):
+            nonlocal started
             if self.is_canceled:
-                messagebox.showinfo("Cancelled", "Extraction has been cancelled.")
-                self.close_popup()  # Close the popup if canceled
-                return
+                return 0
 
             # Extract the archive name from the path
             archive_name = os.path.basename(path)  # Get the file name from the path
-
-            self.label.config(text=f"Extracting... ({index}/{len(self.archives)})")
-            self.progress["value"] = index
-            self.status_message.config(text=f"Status: Extracting '{archive_name}'...")
-            self.popup.update_idletasks()  # Update the UI
+            with totals_lock:
+                started += 1
+                index = started
+            event_bus.post(self.show_started, index, archive_name)
 
             try:
-                extract_process = archive_utils.extract_archive(path)
-                if extract_process == "FAILED":
-                    self.status_message.config(text=f"Failed to extract '{archive_name}'.")
-                    self.successful_extractions.insert("", tk.END, values=("Failed", archive_name))
-                    total_failed += 1
-                    self.popup.update_idletasks()  # Update the UI
-                    self.main_app.refresh_available_archives()
-                    self.main_app.refresh_available_source_folders()
-                    continue
+                archive_size = os.path.getsize(path)
+                with get_device_slots().hold([path]):
+                    extract_process = archive_utils.extract_archive(path, single_pass=True, progress_callback=self.make_progress_callback(archive_name), resolve_target=self.resolve_target)
                 if extract_process == "ALREADY":
-                    self.status_message.config(text=f"SKIPPED: Already extracted '{archive_name}'.")
-                    self.successful_extractions.insert("", tk.END, values=("Skipped", archive_name))
-                    total_already += 1
-                    self.popup.update_idletasks()  # Update the UI
-                    self.main_app.refresh_available_archives()
-                    self.main_app.refresh_available_source_folders()
-                    continue
+                    status, total_key, message = "Skipped", "Already", f"SKIPPED: Already extracted '{archive_name}'."
+                elif extract_process == "IN_PROGRESS":
+                    status, total_key, message = "Skipped", "Already", f"SKIPPED: '{archive_name}' is already being extracted."
+                elif extract_process == "DUPLICATE":
+                    status, total_key, message = "Skipped", "Duplicate", f"SKIPPED: Same content already extracted '{archive_name}'."
+                elif extract_process == "PLACED":
+                    status, total_key, message = "Placed", "Placed", f"Extracted '{archive_name}' directly into its destination folder."
                 elif extract_process == "SUCCESS":
-                    self.status_message.config(text=f"Successfully extracted '{archive_name}'.")
-                    self.successful_extractions.insert("", tk.END, values=("Success", archive_name))
-                    total_success += 1
-                    self.popup.update_idletasks()  # Update the UI
-                    self.main_app.refresh_available_archives()
-                    self.main_app.refresh_available_source_folders()
+                    status, total_key, message = "Success", "Success", f"Successfully extracted '{archive_name}'."
                 else:
-                    self.status_message.config(text=f"Failed to extract '{archive_name}'.")
-                    self.successful_extractions.insert("", tk.END, values=("Failed", archive_name))
-                    total_failed += 1
-                    self.popup.update_idletasks()  # Update the UI
-                    self.main_app.refresh_available_archives()
-                    self.main_app.refresh_available_source_folders()
+                    status, total_key, message = "Failed", "Failed", f"Failed to extract '{archive_name}'."
+                with totals_lock:
+                    totals[total_key] += 1
+                event_bus.post(self.show_result, status, archive_name, message)
+                self.main_app.request_refresh()
+                return archive_size if extract_process in ("SUCCESS", "PLACED") else 0
             except Exception as e:
-                messagebox.showerror("Error", f"Failed to extract '{archive_name}': {e}")
-
-        if not self.is_canceled:
-            # Update label to show completion message
-            self.label.config(text="Completed Extraction", foreground="light green")
-            self.status_message.config(text=f"Total Success: {total_success}, Already Extracted: {total_already}, Failed: {total_failed}.")
-            self.info_message.pack(padx=(10, 20), pady=(5, 10), fill='x', anchor='w')
-            self.cancel_button.pack_forget()  # Hide the cancel button
-            self.confirm_button.pack(pady=(10, 5))  # Show the confirm button
-            self.popup.update_idletasks()  # Update the UI
+                event_bus.show_message("showerror", "Error", f"Failed to extract '{archive_name}': {e}")
+                return 0
+
+        tuner = get_concurrency_tuner()
+        storage_paths = {os.path.dirname(path) for path in self.archives}
+        workers = tuner.workers(storage_paths)
+        started_at = time.monotonic()
+        futures = get_scheduler().run_batch(extract_one, self.archives, max_parallel=workers)
+        tuner.record(storage_paths, workers, sum(future.result() for future in futures), time.monotonic() - started_at)
+
+        if self.is_canceled:
+            event_bus.show_message("showinfo", "Cancelled", "Extraction has been cancelled.")
+            event_bus.post(self.close_popup)  # Close the popup if canceled
+        else:
+            event_bus.post(self.show_completed, totals)
+
+    def show_started(self, index, archive_name):
+        self.label.config(text=f"Extracting... ({index}/{len(self.archives)})")
+        self.progress["value"] = index
+        self.status_message.config(text=f"Status: Extracting '{archive_name}'...")
+
+    def show_result(self, status, archive_name, message):
+        self.status_message.config(text=message)
+        self.successful_extractions.insert("", tk.END, values=(status, archive_name))
+
+    def show_completed(self, totals):
+        # Update label to show completion message
+        self.label.config(text="Completed Extraction", foreground="light green")
+        self.status_message.config(text=f"Total Success: {totals['Success']}, Placed: {totals['Placed']}, Already Extracted: {totals['Already']}, Duplicates: {totals['Duplicate']}, Failed: {totals['Failed']}.")
+        self.info_message.pack(padx=(10, 20), pady=(5, 10), fill='x', anchor='w')
+        self.cancel_button.pack_forget()  # Hide the cancel button
+        self.confirm_button.pack(pady=(10, 5))  # Show the confirm button
+
+    def make_progress_callback(self, archive_name):
+        """Return a callback that shows byte-level extraction progress for one archive."""
+        last_percent = -1
+
+        def update_progress(bytes_done, bytes_total):
+            nonlocal last_percent
+            percent = int(bytes_done * 100 / bytes_total) if bytes_total else 100
+            # Only post when the whole-percent value changes, and only the newest one is drawn
+            if percent != last_percent:
+                last_percent = percent
+                self.main_app.event_bus.post_latest(
+                    (id(self), "progress"), self.status_message.config, text=f"Status: Extracting '{archive_name}'... {percent}%")
+        return update_progress
 
     def cancel_extraction(self):
         """Cancel the extraction process."""
@@ -149,8 +178,7 @@ class ArchiveExtractorPopup:
 
     def close_popup(self):
         """Close the popup window."""
-        self.main_app.refresh_available_archives()
-        self.main_app.refresh_available_source_folders()
+        self.main_app.refresh_all_lists()
         self.user_closed = True
         self.popup.destroy()
 
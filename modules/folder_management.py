@@ -1,10 +1,10 @@
 import os
 from modules.utils.folder_utils import (
     check_directory_exists,
-    list_folders_in_directory,
-    move_folder,
-    rename_folder
+    list_folders_in_directory
 )
+from modules.utils.archive_utils import SUPPORTED_FORMATS
+from modules.move_planner import PLAN_MISSING_SOURCE, execute_plan, format_plan, plan_moves
 from modules.utils.logging_utils import log_message
 from tkinter import filedialog, messagebox
 
@@ -45,6 +45,25 @@ def list_available_source_folders(game_folder_selected):
     ]
     return source_folders_with_path
 
+def list_game_folder_contents(game_folder_selected):
+    """List the archives and the source folders of a game folder with a single directory scan.
+       Return (archive_list, source_folder_list), both lists of (name, path)."""
+    archive_list = []
+    source_folder_list = []
+    try:
+        with os.scandir(game_folder_selected) as iterator:
+            for entry in sorted(iterator, key=lambda entry: entry.name):
+                if entry.is_dir():
+                    # Skip the .extracted and .temp folders used by extraction
+                    if not (entry.name.endswith('.extracted') or entry.name.endswith('.temp')):
+                        source_folder_list.append((entry.name, entry.path))
+                elif entry.is_file() and entry.name.lower().endswith(SUPPORTED_FORMATS):
+                    archive_list.append((entry.name, entry.path))
+    except Exception as e:
+        log_message(f"Error while listing '{game_folder_selected}': {e}")
+    return archive_list, source_folder_list
+
+
 def browse_for_source_folder():
     selected_source_folder = filedialog.askdirectory(title="Select Source Folder")
     selected_source_name = os.path.basename(selected_source_folder)
@@ -80,71 +99,28 @@ def check_and_determine_destination_folder(destination_path, selected_source_nam
     return None
 
 
-def process_folder(folders_to_move_mapping, destination_folder):
-    """Process folders based on mapping data."""
-    source_path_list = [result.source_path for result in folders_to_move_mapping]
-    destination_foldername_list = [result.destination_name for result in folders_to_move_mapping]
-
-    # Rename folders that do not have the 'DISABLED' prefix
-    renamed_source_path_list = add_prefix_disabled_folders(source_path_list)
-
-    # Move folders to their destination
-    summary = {'moved': [], 'failed': [], 'duplicates': []}
-
-    for renamed_source_path, destination_foldername in zip(renamed_source_path_list, destination_foldername_list):
-        destination_path = os.path.join(destination_folder, destination_foldername)
-        base_folder_name = os.path.basename(renamed_source_path)
-        full_destination_path = os.path.join(destination_path, base_folder_name)
-        if move_folder(renamed_source_path, full_destination_path):
-            summary['moved'].append((renamed_source_path, full_destination_path))
-            log_message(f"Successfully moved '{renamed_source_path}' to '{full_destination_path}'.")
-        else:
-            if os.path.exists(full_destination_path):
-                summary['duplicates'].append((renamed_source_path, full_destination_path))
-            else:
-                summary['failed'].append((renamed_source_path, full_destination_path))
-                log_message(f"Failed to move '{renamed_source_path}' to '{full_destination_path}'.")
-    return summary
+def process_folder(folders_to_move_mapping, destination_folder, progress_callback=None, journal=None, plan=None):
+    """Process folders based on mapping data.
+       progress_callback(done, total, source, destination, status) is called from worker threads.
+       Every move is recorded in the optional MoveJournal so the run can be reverted later.
+       A plan from move_planner.plan_moves can be passed when it was already built for display."""
+    # Validate the whole batch before anything on disk changes
+    if plan is None:
+        plan = plan_moves(folders_to_move_mapping, destination_folder)
+
+    missing_source_paths = [planned_move.source_path for planned_move in plan if planned_move.status == PLAN_MISSING_SOURCE]
+    if missing_source_paths:
+        log_message(f"Folders do not exist: {missing_source_paths}")
+        messagebox.showerror("Error", f"Folder '{missing_source_paths[0]}' may modified or deleted.")
+        # Stop the process if a folder does not exist
+        return None
 
+    log_message(f"Move plan:\n{format_plan(plan)}")
 
-def add_prefix_disabled_folders(source_path_list):
-    """Rename folders and add 'DISABLED' prefix if it doesn't already have it."""
-    renamed_source_path_list = []  # List untuk menyimpan folder yang telah diubah namanya
-    for source_path in source_path_list:
-        if not check_directory_exists(source_path):
-            log_message(f"Folder '{source_path}' does not exist.")
-            messagebox.showerror("Error", f"Folder '{source_path}' may modified or deleted.")
-            # Stop the process if folder does not exist
-            return None
-        
-        # Set source_name from source folder name in source_path
-        source_name = os.path.basename(source_path)
-        
-        # Add prefix 'DISABLED' to the folder name
-        if source_name.startswith("DISABLED "):
-            log_message(f"Folder '{source_name}' has already 'DISABLED' prefix.")
-            renamed_source_path_list.append(source_path)  # Tidak ada perubahan, tambahkan path asli
-            continue
-        elif source_name.startswith("DISABLED_"):
-            source_name_new = f"DISABLED {source_name[9:]}"  # Menghapus 'DISABLED_' dan menambahkan spasi
-        elif source_name.startswith("DISABLED-"):
-            source_name_new = f"DISABLED {source_name[9:]}"  # Menghapus 'DISABLED-' dan menambahkan spasi
-        elif source_name.lower().startswith("disabled "):
-            source_name_new = f"DISABLED {source_name[9:]}"  # Menghapus 'disabled ' dan menambahkan spasi
-        else:
-            source_name_new = f"DISABLED {source_name}"  # Tambahkan 'DISABLED ' jika tidak ada prefix
-
-        # Create new source path with the new folder name
-        source_path_new = os.path.join(os.path.dirname(source_path), source_name_new)
-
-        if rename_folder(source_path, source_path_new):
-            log_message(f"Renamed folder '{source_path}' to '{source_name_new}'.")
-            renamed_source_path_list.append(source_path_new) 
-        else:
-            log_message(f"Folder '{source_path}' already has 'DISABLED' prefix or failed to rename.")
-            renamed_source_path_list.append(source_path) 
-
-    return renamed_source_path_list
+    # The final name already carries the 'DISABLED' prefix, so each folder needs a single rename or move
+    summary = execute_plan(plan, progress_callback, journal)
+    log_message(f"Moved {len(summary['moved'])} folders, {len(summary['duplicates'])} duplicates, {len(summary['failed'])} failed.")
+    return summary
 
 def create_directory(directory_path):
     if not os.path.exists(directory_path):
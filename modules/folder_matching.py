@@ -1,18 +1,17 @@
 import os
+import heapq
 from rapidfuzz import fuzz
 from unidecode import unidecode
-from dataclasses import dataclass
-from modules.utils.folder_utils import list_folders_in_directory
+from modules.utils.folder_utils import list_folders_in_directory, get_disabled_name
 from typing import List, Dict, Tuple, Optional, Any, Set
 from modules.utils.logging_utils import log_message
+from modules.utils.cancellation import CancellationToken, ProgressTracker
+from modules.result_store import ResultStore, ResultView
+from modules.utils.alias_automaton import AliasTable
+from modules.matching_stages import DEFAULT_PROFILE, MatchingProfile, MatchingStage, ordered_stages, register_stage
 
-@dataclass
-class MatchResult:
-    source_path: str
-    destination_name: str
-    confidence: float
-    reason: str
-    category: str
+CONTENT_MAX_DEPTH = 5  # Subfolder levels the content stage looks into
+TOP_K_CANDIDATES = 4  # Best destination plus up to three alternatives offered in the review popups
 
 
 def process_match_to_categorized(
@@ -24,16 +23,22 @@ def process_match_to_categorized(
         extensions_check: List[str], 
         skipworld_list: List[str],
         ignore_numbers_status: bool,  
-        ) -> List[MatchResult]:
-    """Process matching for a source folder and return a categorized dictionary of results for all destination folders."""
-    
-    # Extract confidence thresholds
-    high_confidence_threshold = similarity_threshold.get('HIGH_CONFIDENCE', 0)
-    medium_confidence_threshold = similarity_threshold.get('MEDIUM_CONFIDENCE', 0)
+        cancel_token: Optional[CancellationToken] = None,
+        progress_callback=None,
+        match_cache=None,
+        result_store: Optional[ResultStore] = None,
+        profile: Optional[MatchingProfile] = None,
+        ) -> ResultView:
+    """Process matching for a source folder and return a categorized dictionary of results for all destination folders.
+       When cancel_token is cancelled, the results of the folders matched so far are returned.
+       An optional MatchCache (modules.prematching) supplies results of unchanged source folders.
+       Results are appended to result_store (a new one when None), the returned view holds this call's rows.
+       profile (modules.matching_stages) selects the matching stages, the default profile when None."""
+    result_store = result_store if result_store is not None else ResultStore()
 
     if not selected_source_folder:
         log_message("No source folder selected. Please ensure the folder exists and try again.")
-        return {}
+        return result_store.view([])
     
     # Get all list folder name and path in source_folders_list create variable source_folders_list_name and source_folders_list_path
     source_folders_list_name = [name for name, path in source_folders_list]
@@ -41,13 +46,13 @@ def process_match_to_categorized(
     
     if not source_folders_list_path:
         log_message(f"Source folder '{selected_source_folder}' is empty or not found.")
-        return {}
+        return result_store.view([])
     
     # Get all subfolders in the destination directory
     destination_folder_subfolder_list = list_folders_in_directory(destination_folder)
     if not destination_folder_subfolder_list:
         log_message(f"Destination folder '{destination_folder}' is empty or not found.")
-        return {}
+        return result_store.view([])
 
     log_message(f"Found {len(source_folders_list_path)} source subfolders and {len(destination_folder_subfolder_list)} destination subfolders.")
     
@@ -58,37 +63,42 @@ def process_match_to_categorized(
             skipworld_list,
             ignore_numbers_status,
             alias_data,
-            extensions_check
+            extensions_check,
+            cancel_token,
+            progress_callback,
+            match_cache,
+            profile
     )
     
 
     if not mapping_data:
         log_message("Mapping data is empty after get_matching_weight.")
-        return {}
+        return result_store.view([])
     
     # Create categorized results based on mapping data
-    categorized_results = []
-
-    for full_path, destination_match, confidence, reason in mapping_data:
-        # Determine the category based on confidence
-        if confidence >= high_confidence_threshold:
-            category = 'HIGH'
-        elif confidence >= medium_confidence_threshold:
-            category = 'MEDIUM'
-        else:
-            category = 'LOW'
-        
-        # Create a MatchResult instance and add it to the results list
-        match_result = MatchResult(
+    categorized_indices = []
+
+    for full_path, destination_match, confidence, reason, alternatives in mapping_data:
+        # Store the result compactly, the view only holds row indices
+        categorized_indices.append(result_store.append(
             source_path=full_path,
             destination_name=destination_match,
             confidence=confidence,
             reason=reason,
-            category=category
-        )
-        categorized_results.append(match_result)
+            category=categorize_confidence(confidence, similarity_threshold),
+            destination_root=destination_folder,
+            alternatives=alternatives
+        ))
 
-    return categorized_results
+    return result_store.view(categorized_indices)
+
+def categorize_confidence(confidence: float, similarity_threshold: Dict[str, int]) -> str:
+    """Return the HIGH, MEDIUM or LOW category of a confidence for the configured thresholds."""
+    if confidence >= similarity_threshold.get('HIGH_CONFIDENCE', 0):
+        return 'HIGH'
+    if confidence >= similarity_threshold.get('MEDIUM_CONFIDENCE', 0):
+        return 'MEDIUM'
+    return 'LOW'
 
 def get_matching_weight(
     source_folders_list_path: List[str],
@@ -96,43 +106,111 @@ def get_matching_weight(
     skipworld_list: List[str],
     ignore_numbers_status: bool,
     alias_data: Dict[str, str],
-    extensions_check: List[str]
-) -> List[Tuple[str, str, int, str]]:
+    extensions_check: List[str],
+    cancel_token: Optional[CancellationToken] = None,
+    progress_callback=None,
+    match_cache=None,
+    profile: Optional[MatchingProfile] = None
+) -> List[Tuple[str, str, int, str, tuple]]:
     """
-    Three-step matching process between source and destination folders.
-    Returns list of tuples: (source_path, destination, confidence, reason)
+    Staged matching process between source and destination folders, see match_source_folder.
+    Returns list of tuples: (source_path, destination, confidence, reason, alternatives)
+    progress_callback(current_source, done, total, eta_seconds) is called before and after each source folder.
     """
     results = []
+    profile = profile or DEFAULT_PROFILE
+    progress = ProgressTracker(len(source_folders_list_path), progress_callback)
+    if match_cache is not None:
+        cache_context = match_cache.context_key(destination_folder_subfolder_list, skipworld_list, ignore_numbers_status, alias_data, extensions_check, profile)
     
     # Loop through each source folder path
     for source_folder_path in source_folders_list_path:
-        source_folder_name = os.path.basename(source_folder_path)
-        log_message(f"Processing source folder: {source_folder_path}")
-        
-        # if name is too short, direct to step 2
-        min_destination_length = min(len(dest) for dest in destination_folder_subfolder_list)
-        if len(source_folder_name) >= min_destination_length:
-            # Step 1: Direct Folder Name Matching   
-            folder_match = find_folder_name_match(source_folder_path, destination_folder_subfolder_list, skipworld_list, ignore_numbers_status, alias_data)
-            if folder_match:
-                results.append((source_folder_path, folder_match, 100, "Direct folder match"))
-                continue
-
-        # Step 2: Content-Based Matching (only if Step 1 failed)
-        content_match = find_content_match(source_folder_path, destination_folder_subfolder_list, skipworld_list, ignore_numbers_status, extensions_check, alias_data)
-        if content_match:
-            results.append((source_folder_path, content_match, 95, "Content match"))
-            continue
+        # Stop between folders when cancelled, keeping the results so far
+        if cancel_token and cancel_token.is_cancelled:
+            log_message(f"Matching cancelled after {len(results)} of {len(source_folders_list_path)} source folders.")
+            break
 
-        # Step 3: Fuzzy Matching (only if Step 1 and 2 failed)
-        fuzzy_match, confidence = find_fuzzy_match(source_folder_path, destination_folder_subfolder_list, skipworld_list, ignore_numbers_status, alias_data)
-        if confidence > 0:
-            results.append((source_folder_path, fuzzy_match, confidence, "Fuzzy match"))
-        else:
-            results.append((source_folder_path, "Not Found", 0, "No match"))
+        source_folder_name = os.path.basename(source_folder_path)
+        progress.starting(source_folder_name)
+
+        # Reuse the result of an unchanged folder, for example from background pre-matching
+        mapping = match_cache.lookup(cache_context, source_folder_path) if match_cache is not None else None
+        if mapping is None:
+            log_message(f"Processing source folder: {source_folder_path}")
+            mapping = match_source_folder(
+                source_folder_path, destination_folder_subfolder_list, skipworld_list, ignore_numbers_status, alias_data, extensions_check, profile)
+            if match_cache is not None:
+                match_cache.store(cache_context, source_folder_path, mapping)
+        results.append(mapping)
+        progress.finished(source_folder_name)
 
     return results
 
+def match_source_folder(
+    source_folder_path: str,
+    destination_folder_subfolder_list: List[str],
+    skipworld_list: List[str],
+    ignore_numbers_status: bool,
+    alias_data: Dict[str, str],
+    extensions_check: List[str],
+    profile: Optional[MatchingProfile] = None
+) -> Tuple[str, str, int, str, tuple]:
+    """Run the stages of the matching profile for one source folder and keep the best result.
+       A decisive stage that finds a match, or a best result at the profile's stop_confidence, ends the run.
+       The other candidates the stages scored are returned as up to TOP_K_CANDIDATES - 1 (destination, confidence) alternatives,
+       when only a decisive stage ran they are the fuzzy scores of the other destinations."""
+    profile = profile or DEFAULT_PROFILE
+    best_match = None
+    candidates = {}  # Destination -> best confidence seen by any stage
+
+    for stage in ordered_stages(profile):
+        match = stage.run(source_folder_path, destination_folder_subfolder_list, skipworld_list, ignore_numbers_status, alias_data, extensions_check)
+        if match:
+            for destination, confidence in ((match[0], match[1]),) + tuple(match[3]):
+                candidates[destination] = max(confidence, candidates.get(destination, 0))
+        if match and (best_match is None or match[1] > best_match[1]):
+            best_match = match
+        if match and stage.decisive:
+            break
+        if best_match and profile.stop_confidence is not None and best_match[1] >= profile.stop_confidence:
+            log_message(f"Stopping after stage '{stage.name}': {best_match[1]} reaches {profile.stop_confidence}.")
+            break
+
+    if best_match and len(candidates) < 2:
+        # A decisive stage scores only its own match, the fuzzy scorer only compares names and supplies the runners-up
+        _, _, fuzzy_candidates = find_fuzzy_match(source_folder_path, destination_folder_subfolder_list, skipworld_list, ignore_numbers_status, alias_data)
+        for destination, confidence in fuzzy_candidates:
+            candidates[destination] = max(confidence, candidates.get(destination, 0))
+
+    if best_match:
+        destination_match, confidence, reason, _ = best_match
+        alternatives = heapq.nlargest(TOP_K_CANDIDATES - 1,
+                                      ((destination, score) for destination, score in candidates.items() if destination != destination_match),
+                                      key=lambda candidate: candidate[1])
+        return (source_folder_path, destination_match, confidence, reason, tuple(alternatives))
+    return (source_folder_path, "Not Found", 0, "No match", ())
+
+def folder_name_stage(source_folder_path, destination_folder_subfolder_list, skipworld_list, ignore_numbers_status, alias_data, extensions_check):
+    # Names shorter than every destination are left to the other stages
+    min_destination_length = min(len(dest) for dest in destination_folder_subfolder_list)
+    if len(os.path.basename(source_folder_path)) < min_destination_length:
+        return None
+    folder_match = find_folder_name_match(source_folder_path, destination_folder_subfolder_list, skipworld_list, ignore_numbers_status, alias_data)
+    return (folder_match, 100, "Direct folder match", ()) if folder_match else None
+
+def content_stage(source_folder_path, destination_folder_subfolder_list, skipworld_list, ignore_numbers_status, alias_data, extensions_check):
+    content_match = find_content_match(source_folder_path, destination_folder_subfolder_list, skipworld_list, ignore_numbers_status, extensions_check, alias_data)
+    return (content_match, 95, "Content match", ()) if content_match else None
+
+def fuzzy_stage(source_folder_path, destination_folder_subfolder_list, skipworld_list, ignore_numbers_status, alias_data, extensions_check):
+    fuzzy_match, confidence, candidates = find_fuzzy_match(source_folder_path, destination_folder_subfolder_list, skipworld_list, ignore_numbers_status, alias_data)
+    return (fuzzy_match, confidence, "Fuzzy match", candidates) if confidence > 0 else None
+
+# Built-in stages, costs are relative: the fuzzy score only compares names, the content stage walks the source folder
+register_stage(MatchingStage('folder_name', cost=1, run=folder_name_stage))
+register_stage(MatchingStage('fuzzy', cost=10, run=fuzzy_stage, decisive=False))
+register_stage(MatchingStage('content', cost=100, run=content_stage))
+
 def find_folder_name_match(source_folder_path: str, destination_folder_subfolder_list: List[str], skipworld_list, ignore_numbers_status, alias_data) -> Optional[str]:
     """Step 1: Find direct folder name matches"""
     
@@ -186,35 +264,38 @@ def find_folder_name_in_subfolders(source_path: str, destination_name: str, skip
 
     for root, dirs, _ in os.walk(source_path):
         depth = root[len(source_path):].count(os.sep)
-        if depth > 5:
+        if depth > CONTENT_MAX_DEPTH:
             continue
             
         for dir_name in dirs:
-            dir_path = os.path.join(root, dir_name)
-            
-            # First try exact folder name match
-            if dir_name.lower() == destination_name.lower():
-                log_message(f" Exact folder match found: '{dir_name}' at depth {depth}")
-                return dir_path
-            
-            # Then try normalized matching
-            normalized_map = normalize_folders(dir_path, skipworld_list, ignore_numbers)
-            path_to_name_map = apply_aliases(normalized_map, alias_data)
-            
-            for _, (original_name, normalized_name) in path_to_name_map.items():
-                # Check for exact normalized match first
-                if normalized_name.lower() == destination_name.lower():
-                    log_message(f" Exact normalized match found: '{dir_name}' → '{destination_name}' at depth {depth}")
-                    return dir_path
-                    
-                # Then try partial matching
-                if partial_match(normalized_name, [destination_name]):
-                    log_message(f" Partial match found: '{dir_name}' → '{destination_name}' at depth {depth}")
-                    return dir_path
+            match_type = match_subfolder_name(dir_name, destination_name, skipworld_list, ignore_numbers, alias_data)
+            if match_type:
+                log_message(f" {match_type} found: '{dir_name}' → '{destination_name}' at depth {depth}")
+                return os.path.join(root, dir_name)
                     
     log_message(f"No folder matches found in: '{source_path}'")
     return None
 
+def match_subfolder_name(dir_name: str, destination_name: str, skipworld_list: List[str], ignore_numbers: bool, alias_data: Dict[str, str]) -> Optional[str]:
+    """Return how a subfolder name matches the destination name, or None if it does not."""
+    # First try exact folder name match
+    if dir_name.lower() == destination_name.lower():
+        return "Exact folder match"
+
+    # Then try normalized matching
+    normalized_map = normalize_folders(dir_name, skipworld_list, ignore_numbers)
+    path_to_name_map = apply_aliases(normalized_map, alias_data)
+
+    for _, (original_name, normalized_name) in path_to_name_map.items():
+        # Check for exact normalized match first
+        if normalized_name.lower() == destination_name.lower():
+            return "Exact normalized match"
+
+        # Then try partial matching
+        if partial_match(normalized_name, [destination_name]):
+            return "Partial match"
+    return None
+
 def find_file_in_subfolders(source_path: str, destination_name: str, skipworld_list: List[str], ignore_numbers: bool, extensions_check: List[str], alias_data: Dict[str, str]) -> Optional[str]:
     """Check files with specific extensions up to 5 levels deep"""
     if not extensions_check:
@@ -224,40 +305,50 @@ def find_file_in_subfolders(source_path: str, destination_name: str, skipworld_l
     log_message(f"Checking files in '{source_path}' for matches with '{destination_name}'")
     log_message(f"Looking for extensions: {extensions_check}")
     
-    # Parse extensions string to list
-    extensions_list = [ext.strip() for ext in extensions_check.get('extensions', '').split(',')]
-    extensions_set = set(extensions_list)
+    extensions_set = parse_extensions(extensions_check)
     
     # Walk through all subdirectories
     for root, _, files in os.walk(source_path):
         depth = root[len(source_path):].count(os.sep)
-        if depth > 5:
+        if depth > CONTENT_MAX_DEPTH:
             continue
             
         for file_name in files:
-            if any(file_name.endswith(ext.strip()) for ext in extensions_set):
-                file_path = os.path.join(root, file_name)
-                
-                # First check if character name exists in file name
-                base_name = os.path.splitext(file_name)[0]
-                if destination_name.lower() in base_name.lower():
-                    log_message(f" Direct character name match in file: '{file_name}' → '{destination_name}'")
-                    return file_path
-                
-                # Then try normalized matching
-                normalized_map = normalize_folders(file_path, skipworld_list, ignore_numbers)
-                path_to_name_map = apply_aliases(normalized_map, alias_data)
-                
-                for _, (original_name, normalized_name) in path_to_name_map.items():
-                    if partial_match(normalized_name, [destination_name]):
-                        log_message(f" File match found: '{file_name}' → '{destination_name}' at depth {depth}")
-                        return file_path
+            match_type = match_file_name(file_name, destination_name, extensions_set, skipworld_list, ignore_numbers, alias_data)
+            if match_type:
+                log_message(f" {match_type}: '{file_name}' → '{destination_name}' at depth {depth}")
+                return os.path.join(root, file_name)
     
     log_message(f" No file matches found in: '{source_path}'")
     return None
 
-def find_fuzzy_match(source_folder_path: str, destination_folder_subfolder_list: List[str], skipworld_list, ignore_numbers_status, alias_data):
-    """Step 3: Find best fuzzy match using string similarity"""
+def parse_extensions(extensions_check: Dict[str, str]) -> Set[str]:
+    """Parse the comma separated extensions string from EXTENSIONS_CHECK."""
+    return {ext.strip() for ext in extensions_check.get('extensions', '').split(',')}
+
+def match_file_name(file_name: str, destination_name: str, extensions_set: Set[str], skipworld_list: List[str], ignore_numbers: bool, alias_data: Dict[str, str]) -> Optional[str]:
+    """Return how a file with a checked extension matches the destination name, or None."""
+    if not any(file_name.endswith(ext) for ext in extensions_set):
+        return None
+
+    # First check if character name exists in file name
+    base_name = os.path.splitext(file_name)[0]
+    if destination_name.lower() in base_name.lower():
+        return "Direct character name match in file"
+
+    # Then try normalized matching
+    normalized_map = normalize_folders(file_name, skipworld_list, ignore_numbers)
+    path_to_name_map = apply_aliases(normalized_map, alias_data)
+
+    for _, (original_name, normalized_name) in path_to_name_map.items():
+        if partial_match(normalized_name, [destination_name]):
+            return "File match found"
+    return None
+
+def find_fuzzy_match(source_folder_path: str, destination_folder_subfolder_list: List[str], skipworld_list, ignore_numbers_status, alias_data, top_k: int = TOP_K_CANDIDATES):
+    """Step 3: Find best fuzzy match using string similarity.
+       The top_k best scoring destinations are kept in a bounded heap in the same pass and returned as
+       (destination, score) candidates, best first."""
     
     # Normalize source folder names
     normalized_map = normalize_folders(source_folder_path, skipworld_list, ignore_numbers_status)
@@ -271,19 +362,28 @@ def find_fuzzy_match(source_folder_path: str, destination_folder_subfolder_list:
     
     best_match = None
     best_score = 0
+    top_candidates = []  # Min-heap of (score, destination), never more than top_k entries
     
     for destination in destination_folder_subfolder_list:
+        destination_score = 0
         cropped_names = crop_text_to_length(normalized_name, len(destination)+1)
         for cropped in cropped_names:
             score = fuzz.ratio(cropped, destination)
+            destination_score = max(destination_score, score)
             if score > best_score:
                 best_score = score
                 best_match = destination
+        if destination_score > 0:
+            if len(top_candidates) < top_k:
+                heapq.heappush(top_candidates, (destination_score, destination))
+            elif destination_score > top_candidates[0][0]:
+                heapq.heapreplace(top_candidates, (destination_score, destination))
                 
     if best_match:
         log_message(f"Fuzzy match found: '{normalized_name}' → '{best_match}' (score: {best_score})")
     
-    return best_match or "Not Found", best_score
+    candidates = tuple((destination, score) for score, destination in sorted(top_candidates, reverse=True))
+    return best_match or "Not Found", best_score, candidates
 
 
 def get_best_fuzzy_match(normalized_name: str, destination_names: List[str]) -> Tuple[str, int]:
@@ -342,18 +442,25 @@ def apply_aliases(normalized_map: Dict[str, Tuple[str, str]], alias_data: Dict[s
 
     updated_map = {}
     for full_path, (original_name, normalized_name) in normalized_map.items():
-        alias_found = False
-        for alias_key, alias_value in alias_data.items():
-            if alias_key.lower() in normalized_name.lower():
-                log_message(f"Alias found for {original_name} is {alias_value}!")
-                updated_map[full_path] = (original_name, alias_value)
-                alias_found = True
-                break  # Stop checking once an alias is found
-        if not alias_found:
+        alias = find_alias(normalized_name, alias_data)
+        if alias:
+            log_message(f"Alias found for {original_name} is {alias[1]}!")
+            updated_map[full_path] = (original_name, alias[1])
+        else:
             updated_map[full_path] = (original_name, normalized_name)
 
     return updated_map
 
+def find_alias(normalized_name: str, alias_data: Dict[str, str]) -> Optional[Tuple[str, str]]:
+    """Return (alias key, alias value) of the first alias key contained in the name, or None.
+       An AliasTable answers with one pass over the name, a plain dict is checked key by key."""
+    if isinstance(alias_data, AliasTable):
+        return alias_data.first_alias(normalized_name)
+    for alias_key, alias_value in alias_data.items():
+        if alias_key.lower() in normalized_name.lower():
+            return alias_key, alias_value
+    return None
+
 
 def partial_match(source_name: str, destination_names: List[str]) -> bool:
     """Check if the source name partially matches any of the destination names."""
@@ -365,4 +472,88 @@ def partial_match(source_name: str, destination_names: List[str]) -> bool:
         if len(normalized_source) >= len(normalized_destination):
             if normalized_source in normalized_destination or normalized_destination in normalized_source:
                 return True
-    return False
\ No newline at end of file
+    return False
+
+
+def prematch_archive_members(
+        target_name: str,
+        member_paths: List[str],
+        destination_folder_subfolder_list: List[str],
+        skipworld_list: List[str],
+        ignore_numbers_status: bool,
+        alias_data: Dict[str, str],
+        extensions_check: Dict[str, str],
+        ) -> Optional[Tuple[str, int, str]]:
+    """Match an archive from its member listing only, without extracting it.
+       target_name is the folder the archive would be extracted to and member_paths are the
+       member paths inside that folder, with a trailing '/' for directories. Only the folder-name, alias and content checks are
+       used; return (destination, confidence, reason) or None when the result is ambiguous."""
+    if not destination_folder_subfolder_list:
+        return None
+
+    # Step 1: Direct Folder Name Matching on the future folder name
+    min_destination_length = min(len(dest) for dest in destination_folder_subfolder_list)
+    if len(target_name) >= min_destination_length:
+        folder_match = find_folder_name_match(target_name, destination_folder_subfolder_list, skipworld_list, ignore_numbers_status, alias_data)
+        if folder_match:
+            return folder_match, 100, "Direct folder match"
+
+    # Collect subfolder and file names up to 5 levels deep, like the os.walk based checks
+    dir_names = set()
+    file_names = set()
+    for member_path in member_paths:
+        parts = member_path.split('/')
+        dir_names.update(part for part in parts[:-1][:6])
+        if parts[-1] and len(parts) - 1 <= 5:
+            file_names.add(parts[-1])
+
+    # Step 2: Content-Based Matching against the member names
+    extensions_set = parse_extensions(extensions_check) if extensions_check else set()
+    for destination in destination_folder_subfolder_list:
+        for dir_name in dir_names:
+            if match_subfolder_name(dir_name, destination, skipworld_list, ignore_numbers_status, alias_data):
+                return destination, 95, "Content match"
+        if extensions_set:
+            for file_name in file_names:
+                if match_file_name(file_name, destination, extensions_set, skipworld_list, ignore_numbers_status, alias_data):
+                    return destination, 95, "Content match"
+
+    return None
+
+def make_archive_target_resolver(
+        destination_folder: str,
+        alias_data: Dict[str, str],
+        similarity_threshold: Dict[str, int],
+        extensions_check: Dict[str, str],
+        skipworld_list: List[str],
+        ignore_numbers_status: bool,
+        ):
+    """Return a resolve_target callback for archive_utils.extract_archive that places
+       confidently pre-matched archives straight into their destination character folder."""
+    destination_folder_subfolder_list = list_folders_in_directory(destination_folder)
+    high_confidence_threshold = similarity_threshold.get('HIGH_CONFIDENCE', 0)
+
+    def resolve_target(target_name: str, member_paths: List[str]) -> Optional[str]:
+        match = prematch_archive_members(
+            target_name,
+            member_paths,
+            destination_folder_subfolder_list,
+            skipworld_list,
+            ignore_numbers_status,
+            alias_data,
+            extensions_check
+        )
+        if not match or match[1] < high_confidence_threshold:
+            log_message(f"No confident pre-match for '{target_name}', using the normal flow.")
+            return None
+
+        destination_match, confidence, reason = match
+        target_path = os.path.join(destination_folder, destination_match, get_disabled_name(target_name))
+        if os.path.exists(target_path):
+            log_message(f"Pre-match target '{target_path}' already exists, using the normal flow.")
+            return None
+
+        log_message(f"Pre-matched '{target_name}' → '{destination_match}' ({reason}, {confidence}).")
+        return target_path
+
+    return resolve_target
@@ -1,18 +1,19 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk
 import sv_ttk  # Import sv_ttk for theme
 
 
 class LoadingDialog:
-    def __init__(self, parent):
+    def __init__(self, parent, cancel_command=None):
+        self.cancel_command = cancel_command  # Called when the user presses Cancel
         self.popup = tk.Toplevel(parent)
         self.popup.title("Processing")
         sv_ttk.set_theme("dark")  # Set the theme using sv_ttk
 
         # Center the popup on the screen
         self.popup.update_idletasks()
-        width = 300
-        height = 120
+        width = 420
+        height = 200 if cancel_command else 120
         screen_width = parent.winfo_screenwidth()
         screen_height = parent.winfo_screenheight()
         x = (screen_width - width) // 2
@@ -35,7 +36,38 @@ class LoadingDialog:
         self.progress_bar.pack(pady=10, padx=20, fill='x')
         self.progress_bar.start()
 
-                
+        # Cancel keeps the results computed so far
+        if cancel_command:
+            self.cancel_button = ttk.Button(self.container, text="Cancel", command=self.cancel)
+            self.cancel_button.pack(pady=(5, 0), padx=20, fill='x')
+            self.popup.protocol("WM_DELETE_WINDOW", self.cancel)
+
+    def update_progress(self, current_name, done, total, eta_seconds):
+        """Show the current item, n/total and the estimated time left."""
+        if str(self.progress_bar['mode']) != 'determinate':
+            self.progress_bar.stop()
+            self.progress_bar.configure(mode='determinate', maximum=max(total, 1))
+        self.progress_bar['value'] = done
+        eta_text = f", about {format_duration(eta_seconds)} left" if eta_seconds is not None else ""
+        self.progress_label.config(text=f"{done}/{total}{eta_text}\n{current_name}")
+
+    def cancel(self):
+        """Ask the worker to stop, the dialog closes when it has returned."""
+        self.cancel_button.config(state='disabled')
+        self.progress_label.config(text="Cancelling, keeping the results so far...")
+        self.cancel_command()
+
     def close_popup(self):
         """Close the popup window."""
         self.popup.destroy()
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
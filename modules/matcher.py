@@ -0,0 +1,147 @@
+import os
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional
+import modules.folder_matching as folder_matching
+from modules.folder_management import check_and_determine_destination_folder
+from modules.matching_stages import DEFAULT_PROFILE, MatchingProfile, load_matching_profile
+from modules.prematching import MatchCache
+from modules.result_store import MatchResult, ResultStore, ResultView
+from modules.utils.alias_automaton import AliasTable
+from modules.utils.cancellation import CancellationToken
+from modules.utils.config_utils import BASE_DIR_DEFAULT, read_config, read_dictionary
+from modules.utils.folder_utils import list_folders_in_directory
+from modules.utils.logging_utils import log_message
+
+
+def load_matching_settings(base_dir: str = BASE_DIR_DEFAULT) -> Dict:
+    """Load config and dictionary for matching without a window. Raise ValueError when either is
+       missing or invalid, the files are never changed or deleted."""
+    config = read_config(os.path.join(base_dir, 'config.json'))
+    dictionary_data = read_dictionary(os.path.join(base_dir, 'dictionary.json'))
+
+    try:
+        return matching_settings_from(config, dictionary_data)
+    except (AttributeError, KeyError, TypeError) as e:
+        raise ValueError(f"Settings in '{base_dir}' are invalid: {e!r}")
+
+
+def matching_settings_from(config: Dict, dictionary_data: Dict) -> Dict:
+    settings_data = dictionary_data['SETTINGS']
+    return {
+        'destination_path_list': config['DESTINATION_PATH'],
+        'similarity_threshold': config['SIMILARITY_THRESHOLD'],
+        'extensions_check': config['EXTENSIONS_CHECK'],
+        'result_spill_threshold': config.get('RESULT_SPILL_THRESHOLD'),
+        'matching_profile': load_matching_profile(config.get('MATCHING_PROFILE'), config['SIMILARITY_THRESHOLD']),
+        'alias_data': AliasTable(dictionary_data['ALIAS']),
+        'ignore_numbers_status': settings_data.get('ignore_numbers', 'false').strip().lower() == 'true',
+        'skipworld_list': [item.strip() for item in settings_data.get('skipworld', '').split(',') if item.strip()],
+    }
+
+
+class Matcher:
+    """Matching engine for one destination folder that stays warm between calls, for tools that match often.
+       The destination subfolders are listed again only when the destination folder changes, aliases are
+       looked up with an AliasTable automaton, and results of unchanged source folders come from a MatchCache.
+       Safe to use from several threads."""
+
+    def __init__(self, destination_folder: str, similarity_threshold: Dict[str, int], alias_data: Optional[Dict[str, str]] = None,
+                 extensions_check: Optional[Dict[str, str]] = None, skipworld_list: Optional[List[str]] = None,
+                 ignore_numbers_status: bool = False, profile: Optional[MatchingProfile] = None,
+                 result_spill_threshold: Optional[int] = None, match_cache: Optional[MatchCache] = None):
+        self.destination_folder = destination_folder
+        self.similarity_threshold = similarity_threshold
+        self.alias_data = alias_data if isinstance(alias_data, AliasTable) else AliasTable(alias_data or {})
+        self.extensions_check = extensions_check or {'extensions': ''}
+        self.skipworld_list = list(skipworld_list or [])
+        self.ignore_numbers_status = ignore_numbers_status
+        self.profile = profile or DEFAULT_PROFILE
+        self.result_spill_threshold = result_spill_threshold
+        self.match_cache = match_cache if match_cache is not None else MatchCache()
+
+        self._destinations: List[str] = []
+        self._destination_signature: Optional[int] = None
+        self._cache_context: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, base_dir: str = BASE_DIR_DEFAULT, game: Optional[str] = None, destination_folder: Optional[str] = None,
+                    profile: Optional[MatchingProfile] = None) -> "Matcher":
+        """Build a matcher from config.json and dictionary.json in base_dir. The destination is the one
+           configured for game unless destination_folder is given, profile replaces MATCHING_PROFILE."""
+        settings = load_matching_settings(base_dir)
+        if destination_folder is None:
+            destination_folder = check_and_determine_destination_folder(settings['destination_path_list'], game)
+        if not destination_folder:
+            raise ValueError(f"No destination folder configured for '{game}'.")
+        return cls(
+            destination_folder,
+            settings['similarity_threshold'],
+            settings['alias_data'],
+            settings['extensions_check'],
+            settings['skipworld_list'],
+            settings['ignore_numbers_status'],
+            profile or settings['matching_profile'],
+            settings['result_spill_threshold']
+        )
+
+    def destinations(self):
+        """Return (destination subfolders, cache context), listed again only after the destination folder changed."""
+        try:
+            signature = os.stat(self.destination_folder).st_mtime_ns
+        except OSError:
+            signature = None
+        with self._lock:
+            if signature is None or signature != self._destination_signature:
+                self._destinations = list_folders_in_directory(self.destination_folder) if signature is not None else []
+                self._destination_signature = signature
+                self._cache_context = self.match_cache.context_key(
+                    self._destinations, self.skipworld_list, self.ignore_numbers_status, self.alias_data, self.extensions_check, self.profile)
+            return self._destinations, self._cache_context
+
+    def iter_matches(self, source_folder_paths: Iterable[str], cancel_token: Optional[CancellationToken] = None,
+                     result_store: Optional[ResultStore] = None) -> Iterator[MatchResult]:
+        """Match source folders one by one and yield each result as soon as it is known.
+           Pass result_store to close it afterwards, a store created here may spill to a file that stays."""
+        result_store = result_store if result_store is not None else ResultStore(spill_threshold=self.result_spill_threshold)
+        destinations, cache_context = self.destinations()
+        if not destinations:
+            log_message(f"Destination folder '{self.destination_folder}' is empty or not found.")
+            return
+
+        for source_folder_path in source_folder_paths:
+            if cancel_token and cancel_token.is_cancelled:
+                break
+            mapping = self.match_cache.lookup(cache_context, source_folder_path)
+            if mapping is None:
+                mapping = folder_matching.match_source_folder(
+                    source_folder_path, destinations, self.skipworld_list, self.ignore_numbers_status, self.alias_data,
+                    self.extensions_check, self.profile)
+                self.match_cache.store(cache_context, source_folder_path, mapping)
+
+            full_path, destination_match, confidence, reason, alternatives = mapping
+            index = result_store.append(
+                source_path=full_path,
+                destination_name=destination_match,
+                confidence=confidence,
+                reason=reason,
+                category=folder_matching.categorize_confidence(confidence, self.similarity_threshold),
+                destination_root=self.destination_folder,
+                alternatives=alternatives
+            )
+            yield result_store[index]
+
+    def match_many(self, source_folder_paths: Iterable[str], cancel_token: Optional[CancellationToken] = None) -> ResultView:
+        """Match several source folders, the view keeps their order.
+           Call close() on the view's store when done with it, that removes its spill file."""
+        result_store = ResultStore(spill_threshold=self.result_spill_threshold)
+        try:
+            return result_store.view([result.index for result in self.iter_matches(source_folder_paths, cancel_token, result_store)])
+        except BaseException:
+            result_store.close()
+            raise
+
+    def match_one(self, source_folder_path: str) -> Optional[MatchResult]:
+        """Match one source folder, None when the destination folder has no subfolders."""
+        # A single row never spills, so there is no file to clean up
+        return next(self.iter_matches([source_folder_path], result_store=ResultStore()), None)
@@ -3,14 +3,20 @@ from tkinter import ttk, messagebox
 import sv_ttk  # Import sv_ttk for theme
 import os  # Import os to handle file paths
 from modules.utils.logging_utils import log_message
+from modules.move_planner import PLAN_STATUS_LABELS, plan_moves
+from modules.virtual_table_ui import VirtualTable
 
 class MatchingPopup:
-    def __init__(self, confidence_level, confidence_data, parent, main_app):
+    def __init__(self, confidence_level, confidence_data, parent, main_app, plan=None, show_game=False):
         self.confidence_level = confidence_level  # This should be a list of paths only
         self.confidence_data = confidence_data  # Flag to check if extraction is canceled
+        self.plan = plan  # Optional dry-run move plan, one entry per result
         self.main_app = main_app  # Reference to the main application
         self.user_response = False
         self.skipped_list = []
+        self.skipped_paths = []  # Full source paths of skipped rows, names can repeat across games
+        self.corrected_paths = []  # Full source paths of rows where the user chose an alternative destination
+        self.show_game = show_game  # Prefix source folders with their game folder when several games are reviewed
 
         # Make Toplevel as popup
         self.popup = tk.Toplevel(parent)
@@ -49,8 +55,9 @@ class MatchingPopup:
         self.treeview_frame = ttk.Frame(self.container)
         self.treeview_frame.pack(padx=(16, 20), pady=(16, 16), fill='both', expand=True)
 
-        # Create a Treeview to display successful extractions
-        self.display_matching_results = ttk.Treeview(self.treeview_frame, columns=("No", "Source Folder", "Destination Folder", "Confidence", "Reason"), show='headings', height=10)
+        # Create a virtualized table to display the matching results, sortable by clicking a heading
+        columns = ("No", "Source Folder", "Destination Folder", "Confidence", "Reason") + (("Plan",) if self.plan else ())
+        self.display_matching_results = VirtualTable(self.treeview_frame, columns=columns, height=10)
         self.display_matching_results.column("No", width=30, anchor=tk.W)  
         self.display_matching_results.column("Source Folder", width=300, anchor=tk.W, stretch=True)
         self.display_matching_results.column("Destination Folder", width=180, anchor=tk.W)
@@ -62,18 +69,20 @@ class MatchingPopup:
         self.display_matching_results.heading("Destination Folder", text="Destination Folder")
         self.display_matching_results.heading("Confidence", text="Confidence")
         self.display_matching_results.heading("Reason", text="Reason")
+        if self.plan:
+            self.display_matching_results.column("Plan", width=110, anchor=tk.W)
+            self.display_matching_results.heading("Plan", text="Plan")
         self.display_matching_results.pack(side=tk.LEFT, fill='both', expand=True)
 
         # Create right-click menu
         self.right_click_menu = tk.Menu(self.popup, tearoff=0)
         self.right_click_menu.add_command(label="Skip this file", command=self.skip_selected_item)
+        # Alternatives are filled in for the clicked row when the menu opens
+        self.alternatives_menu = tk.Menu(self.right_click_menu, tearoff=0)
+        self.right_click_menu.add_cascade(label="Use alternative", menu=self.alternatives_menu)
 
         # Bind right-click event
-        self.display_matching_results.bind("<Button-3>", self.show_right_click_menu)
-
-        # Create a scrollbar for the Treeview
-        self.scrollbar = ttk.Scrollbar(self.treeview_frame, orient="vertical", command=self.display_matching_results.yview)
-        self.scrollbar.pack(side=tk.RIGHT, fill='y')
+        self.display_matching_results.tree.bind("<Button-3>", self.show_right_click_menu)
 
         self.cancel_button = ttk.Button(self.container, text="Skip", command=self.skip_action)
         self.cancel_button.pack(padx=(10, 20), pady=(5, 10), fill='x', expand=False)
@@ -104,8 +113,8 @@ class MatchingPopup:
                 "You can skip if you find dont match folder and try again in Step 2."
             ),
             "low_confidence": (
-                "Caution!: Confidence is low. You can only skip this action.\n"
-                "Please rename any folders that don't match."
+                "Caution!: Confidence is low. Right-click a folder to use an alternative match,\n"
+                "corrected folders can then be confirmed. Otherwise skip and rename folders that don't match."
             )
         }
 
@@ -123,12 +132,23 @@ class MatchingPopup:
         )
         self.status_message.pack(padx=(10, 20), pady=(5, 10), fill='x', anchor='w')
 
+    def row_values(self, index, result):
+        result = result.row()  # One lookup for every column, spilled results are read from disk
+        source_folder_name = os.path.basename(result.source_path)
+        if self.show_game:
+            source_folder_name = f"{os.path.basename(os.path.dirname(result.source_path))}/{source_folder_name}"
+        reason = result.reason
+        if result.duplicate_of:
+            reason = f"{reason}, already installed as '{os.path.basename(result.duplicate_of)}'"
+        values = (index, source_folder_name, result.destination_name, f"{float(result.confidence):.2f}%", reason)
+        if self.plan:
+            values += (PLAN_STATUS_LABELS[self.plan[index - 1].status],)
+        return values
+
     def add_data_to_table(self,matching_results):
-        # Menambahkan data ke tabel
-        for index, result in enumerate(matching_results, start=1):
-            source_folder_name = os.path.basename(result.source_path)
-            # Menambahkan nilai ke tabel
-            self.display_matching_results.insert("", "end", values=(index, source_folder_name, result.destination_name, f"{float(result.confidence):.2f}%", result.reason))
+        # Build the rows in the table model, only the visible ones are drawn
+        rows = [(str(index), self.row_values(index, result)) for index, result in enumerate(matching_results, start=1)]
+        self.display_matching_results.set_rows(rows)
         self.display_matching_results.pack(padx=(10, 20), pady=(5, 10), fill='both', expand=True)
     
     def show_right_click_menu(self, event):
@@ -137,6 +157,7 @@ class MatchingPopup:
             selected_item = self.display_matching_results.identify_row(event.y)
             if selected_item:
                 self.display_matching_results.selection_set(selected_item)
+                self.fill_alternatives_menu(selected_item)
                 self.right_click_menu.tk_popup(event.x_root, event.y_root)
         finally:
             self.right_click_menu.grab_release()
@@ -145,6 +166,7 @@ class MatchingPopup:
         """Remove selected item from list after confirmation"""
         selected_item = self.display_matching_results.selection()
         if selected_item:
+            selected_item = selected_item[0]
             item_values = self.display_matching_results.item(selected_item)['values']
             source_folder_name = item_values[1]  # Get just the source folder name
             
@@ -159,9 +181,48 @@ class MatchingPopup:
                 
                 # Add source folder name to skipped list
                 self.skipped_list.append(source_folder_name)
+                self.skipped_paths.append(self.confidence_data[int(selected_item) - 1].source_path)
                 log_message(f"Skipped file from matching list: {source_folder_name}")
 
 
+    def fill_alternatives_menu(self, selected_item):
+        """List the other scored destinations of a row, picking one needs no new matching."""
+        self.alternatives_menu.delete(0, 'end')
+        alternatives = self.confidence_data[int(selected_item) - 1].alternatives
+        for destination_name, confidence in alternatives:
+            self.alternatives_menu.add_command(
+                label=f"{destination_name} ({float(confidence):.2f}%)",
+                command=lambda destination_name=destination_name: self.use_alternative(selected_item, destination_name)
+            )
+        if not alternatives:
+            self.alternatives_menu.add_command(label="No alternatives", state='disabled')
+
+    def use_alternative(self, selected_item, destination_name):
+        """Move a row to one of its alternative destinations."""
+        index = int(selected_item)
+        result = self.confidence_data[index - 1]
+        if not result.choose_alternative(destination_name):
+            return
+        if self.plan:
+            # The whole batch is planned again, the new destination can collide with another row
+            previous_plan = list(self.plan)
+            self.plan[:] = plan_moves(self.confidence_data, result.destination_root)
+            status_column = self.display_matching_results.columns[-1]
+            for row_index, (previous, planned_move) in enumerate(zip(previous_plan, self.plan), start=1):
+                if row_index != index and previous.status != planned_move.status:
+                    self.display_matching_results.set(str(row_index), status_column, PLAN_STATUS_LABELS[planned_move.status])
+        for column, value in zip(self.display_matching_results.columns, self.row_values(index, result)):
+            self.display_matching_results.set(selected_item, column, value)
+
+        if result.source_path not in self.corrected_paths:
+            self.corrected_paths.append(result.source_path)
+        log_message(f"Chose alternative destination '{destination_name}' for '{result.source_path}'.")
+
+        # Low confidence rows can only be skipped, unless the user corrected them
+        if self.confidence_level == "low_confidence":
+            self.confirm_button.config(text="Confirm corrected folders")
+            self.confirm_button.pack(padx=(10, 20), pady=(5, 10), fill='x', expand=False)
+
     def confirm_action(self):
         """Handle the confirm action."""
         self.user_response = True  # Set response to True when confirmed
@@ -1,12 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from modules.utils.folder_utils import move_folder
+from modules.utils.move_executor import move_tree
+from modules.utils.move_journal import MoveJournal, revert_run
+from modules.virtual_table_ui import VirtualTable
 import sv_ttk  # Import sv_ttk for theme
 import os
 
 class MatchingResultPopup:
-    def __init__(self, total_summary, parent):
+    def __init__(self, total_summary, parent, journal_path=None):
         self.total_summary = total_summary
+        self.journal_path = journal_path  # Journal of this run, used by Revert All
         self.popup = tk.Toplevel(parent)
         self.popup.title("Processing Results")
         sv_ttk.set_theme("dark")  # Set the theme using sv_ttk
@@ -39,8 +42,8 @@ class MatchingResultPopup:
         self.treeview_frame = ttk.Frame(self.container)
         self.treeview_frame.pack(padx=(16, 20), pady=(16, 16), fill='both', expand=True)
 
-        # Create a Treeview to display processing results
-        self.display_results = ttk.Treeview(self.treeview_frame, columns=("Status", "From", "To"), show='headings', height=10)
+        # Create a virtualized table to display processing results, sortable by clicking a heading
+        self.display_results = VirtualTable(self.treeview_frame, columns=("Status", "From", "To"), height=10)
         self.display_results.column("Status", width=20, anchor=tk.W)
         self.display_results.column("From", width=300, anchor=tk.W, stretch=True)
         self.display_results.column("To", width=300, anchor=tk.W, stretch=True)
@@ -51,35 +54,32 @@ class MatchingResultPopup:
         self.display_results.pack(side=tk.LEFT, fill='both', expand=True)
 
         # Bind right click event to treeview
-        self.display_results.bind("<Button-3>", self.show_context_menu)
+        self.display_results.tree.bind("<Button-3>", self.show_context_menu)
         
         # Create context menu
         self.context_menu = tk.Menu(self.popup, tearoff=0)
         self.context_menu.add_command(label="Open Destination", command=self.open_destination)
         self.context_menu.add_command(label="Revert Folder", command=self.revert_folder)
 
-        # Create a scrollbar for the Treeview
-        self.scrollbar = ttk.Scrollbar(self.treeview_frame, orient="vertical", command=self.display_results.yview)
-        self.scrollbar.pack(side=tk.RIGHT, fill='y')
-        self.display_results.configure(yscrollcommand=self.scrollbar.set)
-
         # Add data to the table
         self.add_data_to_table()
 
+        # Add Revert All button when the run was journaled
+        if self.journal_path and self.total_summary.get('moved'):
+            self.revert_all_button = ttk.Button(self.container, text="Revert All", command=self.revert_all)
+            self.revert_all_button.pack(padx=(10, 20), pady=(5, 0), fill='x', expand=False)
+
         # Add Confirm button
         self.confirm_button = ttk.Button(self.container, text="Confirm", style="Accent.TButton", command=self.close_popup)
         self.confirm_button.pack(padx=(10, 20), pady=(5, 10), fill='x', expand=False)
 
     def add_data_to_table(self):
         # Add data to the table with 3 columns
-        for source, dest in self.total_summary.get('moved', []):
-            self.display_results.insert("", "end", values=("Moved", source, dest))
-        
-        for source, dest in self.total_summary.get('failed', []):
-            self.display_results.insert("", "end", values=("Failed", source, dest))
-        
-        for source, dest in self.total_summary.get('duplicates', []):
-            self.display_results.insert("", "end", values=("Duplicate", source, dest))
+        rows = []
+        for status, key in (("Moved", 'moved'), ("Failed", 'failed'), ("Duplicate", 'duplicates')):
+            for source, dest in self.total_summary.get(key, []):
+                rows.append((f"row{len(rows)}", (status, source, dest)))
+        self.display_results.set_rows(rows)
 
     def display_summary(self):
         # Display a summary of the results
@@ -129,7 +129,7 @@ class MatchingResultPopup:
             dest_path = values[2]    # 'To' column
             
             if os.path.exists(dest_path):
-                if move_folder(dest_path, source_path):
+                if self.move_back(dest_path, source_path):
                     # Update status in treeview
                     self.display_results.set(item, "Status", "Reverted")
                     messagebox.showinfo("Success", "Folder reverted successfully")
@@ -138,6 +138,37 @@ class MatchingResultPopup:
             else:
                 messagebox.showerror("Error", "Source folder not found")
                 
+    def move_back(self, dest_path, source_path):
+        """Move a single folder back, recording it in the run's journal."""
+        if not self.journal_path:
+            return move_tree(dest_path, source_path) == "MOVED"
+        journal = MoveJournal.reopen(self.journal_path)
+        try:
+            sequence = journal.record_intent(dest_path, source_path, "revert")
+            status = move_tree(dest_path, source_path)
+            journal.record_done(sequence, status)
+        finally:
+            journal.close()
+        return status == "MOVED"
+
+    def revert_all(self):
+        """Replay the run's journal backwards, moving every folder back in one pass."""
+        confirmation = messagebox.askyesno("Confirm Revert", "Move every folder of this run back to its original location?")
+        if not confirmation:
+            return
+
+        revert_summary = revert_run(self.journal_path)
+        reverted = set(revert_summary['reverted'])
+
+        # Update status in treeview
+        for item in self.display_results.get_children():
+            values = self.display_results.item(item)['values']
+            if (str(values[1]), str(values[2])) in reverted:
+                self.display_results.set(item, "Status", "Reverted")
+
+        self.revert_all_button.pack_forget()
+        messagebox.showinfo("Revert Completed", f"Reverted: {len(revert_summary['reverted'])}\nFailed: {len(revert_summary['failed'])}")
+
     def close_popup(self):
         """Close the popup window."""
         self.popup.destroy()
@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from modules.utils.logging_utils import log_message
+
+# run(source_folder_path, destination_folder_subfolder_list, skipworld_list, ignore_numbers_status, alias_data, extensions_check)
+# returns (destination, confidence, reason, candidates) or None, candidates are other (destination, confidence) pairs it scored
+StageRunner = Callable[..., Optional[Tuple[str, int, str, tuple]]]
+
+
+@dataclass(frozen=True)
+class MatchingStage:
+    name: str
+    cost: int  # Relative estimate, name checks are cheap and content checks walk the disk
+    run: StageRunner
+    decisive: bool = True  # A hit ends matching for the folder, later stages are not run
+
+
+@dataclass(frozen=True)
+class MatchingProfile:
+    """Which matching stages run, in which order, and when to stop early.
+       stages=None runs every registered stage from the cheapest to the most expensive.
+       stop_confidence stops as soon as the best result so far reaches it, even after a stage that is not decisive."""
+    name: str = 'default'
+    stages: Optional[Tuple[str, ...]] = ('folder_name', 'content', 'fuzzy')
+    stop_confidence: Optional[int] = None
+
+
+MATCHING_STAGES: Dict[str, MatchingStage] = {}
+
+DEFAULT_PROFILE = MatchingProfile()
+
+# Profiles that can be selected by name with MATCHING_PROFILE in config.json. A stop_confidence
+# given as a SIMILARITY_THRESHOLD key is replaced by that threshold when the profile is loaded.
+BUILTIN_PROFILES: Dict[str, Dict] = {
+    # Folder name, content, then fuzzy, the original order
+    'default': {'stages': ['folder_name', 'content', 'fuzzy']},
+    # Cheapest first: the content walk only runs when the fuzzy score stays below HIGH_CONFIDENCE
+    'fast': {'stages': None, 'stop_confidence': 'HIGH_CONFIDENCE'},
+    # Never walks the source folders
+    'names_only': {'stages': ['folder_name', 'fuzzy']},
+}
+
+
+def register_stage(stage: MatchingStage):
+    """Register a matching stage so profiles can refer to it by name."""
+    MATCHING_STAGES[stage.name] = stage
+
+
+def ordered_stages(profile: MatchingProfile) -> List[MatchingStage]:
+    """Return the stages of a profile in run order, unknown names are skipped."""
+    if profile.stages is None:
+        return sorted(MATCHING_STAGES.values(), key=lambda stage: stage.cost)
+    return [MATCHING_STAGES[name] for name in profile.stages if name in MATCHING_STAGES]
+
+
+def load_matching_profile(value: Union[str, Dict, None], similarity_threshold: Dict[str, int]) -> MatchingProfile:
+    """Build the profile from the optional MATCHING_PROFILE config value, either the name of a
+       built-in profile or a dict with name, stages and stop_confidence. Invalid values fall back to the default."""
+    if value is None:
+        return DEFAULT_PROFILE
+
+    if isinstance(value, str):
+        if value not in BUILTIN_PROFILES:
+            log_message(f"Unknown matching profile '{value}', using the default profile.")
+            return DEFAULT_PROFILE
+        name, settings = value, BUILTIN_PROFILES[value]
+    elif isinstance(value, dict):
+        name, settings = value.get('name', 'custom'), value
+    else:
+        log_message(f"Invalid MATCHING_PROFILE value '{value}', using the default profile.")
+        return DEFAULT_PROFILE
+
+    stages = settings.get('stages', list(DEFAULT_PROFILE.stages))
+    if stages is not None and (not isinstance(stages, list) or not all(isinstance(stage, str) for stage in stages)):
+        log_message(f"Matching profile '{name}': stages must be a list of stage names, using the default profile.")
+        return DEFAULT_PROFILE
+    for stage in stages or []:
+        if stage not in MATCHING_STAGES:
+            log_message(f"Matching profile '{name}': unknown stage '{stage}' is skipped.")
+
+    stop_confidence = settings.get('stop_confidence')
+    if isinstance(stop_confidence, str):
+        if stop_confidence not in similarity_threshold:
+            log_message(f"Matching profile '{name}': unknown threshold '{stop_confidence}', stopping early is disabled.")
+        stop_confidence = similarity_threshold.get(stop_confidence)
+    elif stop_confidence is not None and not isinstance(stop_confidence, (int, float)):
+        log_message(f"Matching profile '{name}': invalid stop_confidence '{stop_confidence}', stopping early is disabled.")
+        stop_confidence = None
+
+    profile = MatchingProfile(name, tuple(stages) if stages is not None else None, stop_confidence)
+    log_message(f"Using matching profile: {profile}")
+    return profile
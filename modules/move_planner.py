@@ -0,0 +1,92 @@
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+from modules.utils.folder_utils import get_disabled_name
+from modules.utils.move_executor import MoveExecutor
+
+# Status of a planned move
+PLAN_OK = 'OK'
+PLAN_EXISTS = 'EXISTS'  # The target name is already taken in the destination folder
+PLAN_BATCH_CONFLICT = 'BATCH_CONFLICT'  # Another source of the same batch maps to the same target
+PLAN_MISSING_SOURCE = 'MISSING_SOURCE'  # The source folder was moved or deleted
+
+PLAN_STATUS_LABELS = {
+    PLAN_OK: "New",
+    PLAN_EXISTS: "Already exists",
+    PLAN_BATCH_CONFLICT: "Batch conflict",
+    PLAN_MISSING_SOURCE: "Missing source",
+}
+
+
+@dataclass
+class PlannedMove:
+    source_path: str
+    destination_path: str
+    status: str
+    conflict_with: Optional[str] = None
+
+
+def list_names(directory: str, listings: Dict[str, Set[str]]) -> Set[str]:
+    """Return the normalized entry names of a directory, listing each directory only once."""
+    if directory not in listings:
+        try:
+            listings[directory] = {os.path.normcase(name) for name in os.listdir(directory)}
+        except OSError:
+            listings[directory] = set()
+    return listings[directory]
+
+
+def plan_moves(match_results: list, destination_folder: Optional[str]) -> List[PlannedMove]:
+    """Build the full list of renames and moves for MatchResults without changing anything on disk.
+       Conflicts are found with one listing per destination folder and within the batch itself.
+       A result's own destination_root wins over destination_folder, so several games can share one plan."""
+    listings = {}
+    batch_targets = {}  # Normalized target path -> source path that claimed it first
+    plan = []
+
+    for result in match_results:
+        source_parent, source_name = os.path.split(result.source_path)
+        destination_root = result.destination_root or destination_folder
+        destination_path = os.path.join(destination_root, result.destination_name, get_disabled_name(source_name))
+        destination_dir, target_name = os.path.split(destination_path)
+        target_key = os.path.normcase(destination_path)
+
+        if os.path.normcase(source_name) not in list_names(source_parent, listings):
+            plan.append(PlannedMove(result.source_path, destination_path, PLAN_MISSING_SOURCE))
+        elif os.path.normcase(target_name) in list_names(destination_dir, listings):
+            plan.append(PlannedMove(result.source_path, destination_path, PLAN_EXISTS, destination_path))
+        elif target_key in batch_targets:
+            plan.append(PlannedMove(result.source_path, destination_path, PLAN_BATCH_CONFLICT, batch_targets[target_key]))
+        else:
+            batch_targets[target_key] = result.source_path
+            plan.append(PlannedMove(result.source_path, destination_path, PLAN_OK))
+
+    return plan
+
+
+def format_plan(plan: List[PlannedMove]) -> str:
+    """Format a plan as readable lines, for logs and the command line."""
+    lines = []
+    for planned_move in plan:
+        line = f"[{PLAN_STATUS_LABELS[planned_move.status]}] {planned_move.source_path} -> {planned_move.destination_path}"
+        if planned_move.status == PLAN_BATCH_CONFLICT:
+            line += f" (also claimed by {planned_move.conflict_with})"
+        lines.append(line)
+
+    counts = {status: sum(1 for planned_move in plan if planned_move.status == status) for status in PLAN_STATUS_LABELS}
+    lines.append(", ".join(f"{PLAN_STATUS_LABELS[status]}: {count}" for status, count in counts.items()))
+    return "\n".join(lines)
+
+
+def execute_plan(plan: List[PlannedMove], progress_callback=None, journal=None) -> Dict[str, list]:
+    """Run the moves of a plan and return the summary dict used by the UI.
+       Conflicting entries are reported as duplicates without touching the disk."""
+    moves = [(planned_move.source_path, planned_move.destination_path) for planned_move in plan if planned_move.status == PLAN_OK]
+    summary = MoveExecutor(progress_callback=progress_callback, journal=journal).execute(moves)
+
+    for planned_move in plan:
+        if planned_move.status in (PLAN_EXISTS, PLAN_BATCH_CONFLICT):
+            summary['duplicates'].append((planned_move.source_path, planned_move.destination_path))
+        elif planned_move.status == PLAN_MISSING_SOURCE:
+            summary['failed'].append((planned_move.source_path, planned_move.destination_path))
+    return summary
@@ -0,0 +1,168 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import modules.folder_matching as folder_matching
+from modules.utils.cancellation import CancellationToken
+from modules.utils.logging_utils import log_message
+from modules.utils.scheduler import BACKGROUND, get_scheduler
+
+MAX_CACHED_CONTEXTS = 8  # One per game folder, settings or destination changes start a new one
+
+
+class MatchCache:
+    """Match results per source folder, reused while the folder and the matching context are unchanged.
+       The context covers the destination subfolders and every setting that changes a match,
+       a source folder is identified by its path and the modification times of its folders
+       down to the depth the content stage looks into."""
+
+    def __init__(self, max_contexts: int = MAX_CACHED_CONTEXTS):
+        self.max_contexts = max_contexts
+        self.contexts: "OrderedDict[str, dict[str, Tuple[str, tuple]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def context_key(destination_folder_subfolder_list, skipworld_list, ignore_numbers_status, alias_data, extensions_check, profile=None) -> str:
+        # The profile is part of the context, its stages and stop confidence change the results
+        context = repr((sorted(destination_folder_subfolder_list), list(skipworld_list), ignore_numbers_status,
+                        list(alias_data.items()) if alias_data else [], extensions_check,
+                        (profile.stages, profile.stop_confidence) if profile else None))
+        return hashlib.blake2b(context.encode('utf-8'), digest_size=16).hexdigest()
+
+    @staticmethod
+    def source_signature(source_folder_path: str) -> Optional[str]:
+        """Hash the modification times of the source folder and its subfolders. Adding, removing or
+           renaming a file changes the time of its folder, also deep inside where the top folder's stays."""
+        try:
+            mtimes = [os.stat(source_folder_path).st_mtime_ns]
+        except OSError:
+            return None
+        pending = [(source_folder_path, 0)]
+        while pending:
+            folder_path, depth = pending.pop()
+            if depth >= folder_matching.CONTENT_MAX_DEPTH:
+                continue  # Deeper folders are not looked into, their names are covered by this folder's time
+            try:
+                with os.scandir(folder_path) as scanner:
+                    subfolders = sorted((entry.name, entry.path) for entry in scanner if entry.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+            for name, path in subfolders:
+                try:
+                    mtimes.append((path[len(source_folder_path):], os.stat(path).st_mtime_ns))
+                except OSError:
+                    continue
+                pending.append((path, depth + 1))
+        return hashlib.blake2b(repr(mtimes).encode('utf-8'), digest_size=16).hexdigest()
+
+    def lookup(self, context: str, source_folder_path: str) -> Optional[tuple]:
+        signature = self.source_signature(source_folder_path)
+        with self._lock:
+            entry = self.contexts.get(context, {}).get(source_folder_path)
+        if entry and signature is not None and entry[0] == signature:
+            return entry[1]
+        return None
+
+    def store(self, context: str, source_folder_path: str, mapping: tuple):
+        signature = self.source_signature(source_folder_path)
+        if signature is None:
+            return
+        with self._lock:
+            if context not in self.contexts:
+                self.contexts[context] = {}
+                while len(self.contexts) > self.max_contexts:
+                    self.contexts.popitem(last=False)
+            self.contexts.move_to_end(context)
+            self.contexts[context][source_folder_path] = (signature, mapping)
+
+
+class BackgroundPrematcher:
+    """Match the selected game folder as a background scheduler task, filling a MatchCache
+       so Process Folder only has to match folders that changed since.
+       Starting again with the same folder and settings does not restart the pass, only source
+       folders that were not queued yet are added to it."""
+
+    def __init__(self, match_cache: MatchCache):
+        self.match_cache = match_cache
+        self.cancel_token: Optional[CancellationToken] = None
+        self.run_key: Optional[str] = None  # Game folder, destination and settings of the current pass
+        self.queued = set()  # Source folders the current pass has matched or will match
+        self.pending: List[Tuple[str, str]] = []  # Source folders added while the pass is running
+        self.running = False
+        self._lock = threading.Lock()
+
+    def start(self, game_folder_path: str, source_folders_list: List[Tuple[str, str]], destination_folder: str,
+              alias_data, similarity_threshold, extensions_check, skipworld_list, ignore_numbers_status, profile=None):
+        """Match the source folders in the background. A pass for another folder or other settings is replaced,
+           one for the same folder and settings only gets the folders it has not seen."""
+        # Reloaded settings build a new alias table, so its identity is part of the key. The destination's
+        # modification time changes when a character folder is added or removed, which changes every match context.
+        try:
+            destination_mtime = os.stat(destination_folder).st_mtime_ns
+        except OSError:
+            destination_mtime = None
+        run_key = repr((game_folder_path, destination_folder, destination_mtime, id(alias_data), similarity_threshold,
+                        extensions_check, skipworld_list, ignore_numbers_status, profile))
+        with self._lock:
+            if self.cancel_token is not None and self.run_key == run_key:
+                # Folders that were removed and come back are matched again
+                self.queued &= set(source_folders_list)
+                new_folders = [folder for folder in source_folders_list if folder not in self.queued]
+                if not new_folders:
+                    return
+                self.queued.update(new_folders)
+                self.pending.extend(new_folders)
+                if self.running:
+                    log_message(f"Adding {len(new_folders)} new folders to the background pre-matching of '{game_folder_path}'.")
+                    return
+                cancel_token = self.cancel_token
+            else:
+                if self.cancel_token:
+                    self.cancel_token.cancel()
+                cancel_token = CancellationToken()
+                self.cancel_token = cancel_token
+                self.run_key = run_key
+                self.queued = set(source_folders_list)
+                self.pending = list(source_folders_list)
+            self.running = True
+            folders_count = len(self.pending)
+
+        def run():
+            while True:
+                with self._lock:
+                    if cancel_token is not self.cancel_token:
+                        return  # Replaced or cancelled, the new pass owns the state
+                    batch, self.pending = self.pending, []
+                    if not batch:
+                        self.running = False
+                        return
+                try:
+                    folder_matching.process_match_to_categorized(
+                        game_folder_path,
+                        batch,
+                        destination_folder,
+                        alias_data,
+                        similarity_threshold,
+                        extensions_check,
+                        skipworld_list,
+                        ignore_numbers_status,
+                        cancel_token=cancel_token,
+                        match_cache=self.match_cache,
+                        profile=profile
+                    )
+                except Exception as e:
+                    log_message(f"Background pre-matching of '{game_folder_path}' failed: {e}")
+
+        log_message(f"Starting background pre-matching of {folders_count} folders in '{game_folder_path}'.")
+        get_scheduler().submit(run, priority=BACKGROUND, cancel_token=cancel_token, name="prematching")
+
+    def cancel(self):
+        """Stop the running pre-match after its current folder, cached results are kept."""
+        with self._lock:
+            if self.cancel_token:
+                self.cancel_token.cancel()
+                self.cancel_token = None
+            self.run_key = None
+            self.pending = []
+            self.running = False
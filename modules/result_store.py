@@ -0,0 +1,315 @@
+import os
+import sqlite3
+import threading
+import uuid
+from array import array
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from modules.utils.config_utils import BASE_DIR_DEFAULT
+
+# Categories and reasons are stored as small integer codes, MatchResult exposes them as strings
+CATEGORIES = ('HIGH', 'MEDIUM', 'LOW')
+CATEGORY_CODES = {category: code for code, category in enumerate(CATEGORIES)}
+
+SPILL_DIRECTORY = os.path.join(BASE_DIR_DEFAULT, 'cache')  # In the application folder wherever it is started from
+SPILL_BATCH_SIZE = 1000  # Rows buffered before they are written to the spill file
+CHOSEN_ALTERNATIVE_REASON = "Chosen alternative"
+
+
+class StringTable:
+    """Store each distinct string once and refer to it by an integer code."""
+
+    def __init__(self):
+        self.values: List[Optional[str]] = []
+        self.codes: Dict[Optional[str], int] = {}
+
+    def code(self, value: Optional[str]) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+    def __getitem__(self, code: int) -> Optional[str]:
+        return self.values[code]
+
+
+@dataclass(frozen=True)
+class ResultRow:
+    """All fields of one result read at once, for code that needs several of them.
+       Field names match MatchResult, so either can be passed to a filter predicate."""
+    index: int
+    source_path: str
+    destination_name: str
+    confidence: float
+    reason: str
+    category: str
+    destination_root: Optional[str]
+    duplicate_of: Optional[str]
+    alternatives: tuple
+
+
+class MatchResult:
+    """One matching result, a slotted view on a row of a ResultStore.
+       Attributes read like the fields of a plain record, nothing is copied."""
+
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store: "ResultStore", index: int):
+        self.store = store
+        self.index = index
+
+    @property
+    def source_path(self) -> str:
+        return self.store.source_path(self.index)
+
+    @property
+    def destination_name(self) -> str:
+        return self.store.row(self.index)[2]
+
+    @property
+    def confidence(self) -> float:
+        return self.store.row(self.index)[3]
+
+    @property
+    def reason(self) -> str:
+        return self.store.reasons[self.store.row(self.index)[4]]
+
+    @property
+    def category(self) -> str:
+        return CATEGORIES[self.store.categories[self.index]]
+
+    @property
+    def destination_root(self) -> Optional[str]:
+        return self.store.roots[self.store.row(self.index)[5]]
+
+    @property
+    def duplicate_of(self) -> Optional[str]:
+        """Installed folder with exactly the same content."""
+        return self.store.duplicates.get(self.index)
+
+    @duplicate_of.setter
+    def duplicate_of(self, path: Optional[str]):
+        if path is None:
+            self.store.duplicates.pop(self.index, None)
+        else:
+            self.store.duplicates[self.index] = path
+
+    @property
+    def alternatives(self) -> tuple:
+        """Other (destination name, confidence) candidates, best first."""
+        return self.store.alternatives.get(self.index, ())
+
+    def choose_alternative(self, destination_name: str) -> bool:
+        return self.store.choose_alternative(self.index, destination_name)
+
+    def row(self) -> ResultRow:
+        """Read every field with one lookup, a single query when the store has spilled to disk."""
+        return self.store.result_row(self.index)
+
+    def __repr__(self):
+        return (f"MatchResult(source_path={self.source_path!r}, destination_name={self.destination_name!r}, "
+                f"confidence={self.confidence!r}, reason={self.reason!r}, category={self.category!r})")
+
+
+class ResultView:
+    """Ordered subset of a ResultStore held as row indices, used for category lists and filters."""
+
+    __slots__ = ('store', 'indices')
+
+    def __init__(self, store: "ResultStore", indices: Iterable[int]):
+        self.store = store
+        self.indices = array('I', indices)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __iter__(self) -> Iterator[MatchResult]:
+        for index in self.indices:
+            yield MatchResult(self.store, index)
+
+    def __getitem__(self, position: int) -> MatchResult:
+        return MatchResult(self.store, self.indices[position])
+
+    def filter(self, predicate: Callable[[ResultRow], bool]) -> "ResultView":
+        """Rows for which predicate is true, each row is read once and passed as a ResultRow."""
+        return ResultView(self.store, (index for index in self.indices if predicate(self.store.result_row(index))))
+
+    def category_view(self, category: str) -> "ResultView":
+        code = CATEGORY_CODES[category]
+        return ResultView(self.store, (index for index in self.indices if self.store.categories[index] == code))
+
+    def summary(self) -> str:
+        """Counts per category, for logs instead of printing every row."""
+        counts = [0] * len(CATEGORIES)
+        for index in self.indices:
+            counts[self.store.categories[index]] += 1
+        return f"{len(self)} results (" + ", ".join(f"{category}: {count}" for category, count in zip(CATEGORIES, counts)) + ")"
+
+
+class ResultStore:
+    """Compact column storage for matching results. Source folders are split into an interned
+       parent directory and a name, destinations, roots and reasons are interned, and categories
+       take one byte per row. With spill_threshold set, rows beyond that count are streamed to a
+       SQLite file in the cache folder instead of being kept in memory."""
+
+    def __init__(self, spill_threshold: Optional[int] = None, spill_directory: str = SPILL_DIRECTORY):
+        self.spill_threshold = spill_threshold
+        self.spill_directory = spill_directory
+        self.directories = StringTable()
+        self.destinations = StringTable()
+        self.reasons = StringTable()
+        self.roots = StringTable()
+        self.categories = array('B')
+        self.duplicates: Dict[int, str] = {}
+        self.alternatives: Dict[int, tuple] = {}  # Sparse, only rows that have alternatives
+
+        # In-memory columns, emptied when the store spills to disk
+        self.directory_codes = array('I')
+        self.names: List[str] = []
+        self.destination_codes = array('I')
+        self.confidences = array('d')
+        self.reason_codes = array('H')
+        self.root_codes = array('H')
+
+        self.spill_path: Optional[str] = None
+        self.connection: Optional[sqlite3.Connection] = None
+        self.pending_rows = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.categories)
+
+    def __bool__(self):
+        return len(self.categories) > 0
+
+    def __iter__(self) -> Iterator[MatchResult]:
+        for index in range(len(self)):
+            yield MatchResult(self, index)
+
+    def __getitem__(self, index: int) -> MatchResult:
+        if index < 0:
+            index += len(self)
+        return MatchResult(self, index)
+
+    def append(self, source_path: str, destination_name: str, confidence: float, reason: str, category: str,
+               destination_root: Optional[str] = None, alternatives: tuple = ()) -> int:
+        """Add a result and return its row index. Safe to call from several matching threads."""
+        directory, name = os.path.split(source_path)
+        with self._lock:
+            row = (self.directories.code(directory), name, self.destinations.code(destination_name), float(confidence),
+                   self.reasons.code(reason), self.roots.code(destination_root))
+            index = len(self.categories)
+            self.categories.append(CATEGORY_CODES[category])
+            if alternatives:
+                self.alternatives[index] = tuple(alternatives)
+            if self.connection is None and self.spill_threshold is not None and index >= self.spill_threshold:
+                self.spill()
+            if self.connection is None:
+                self.directory_codes.append(row[0])
+                self.names.append(row[1])
+                self.destination_codes.append(row[2])
+                self.confidences.append(row[3])
+                self.reason_codes.append(row[4])
+                self.root_codes.append(row[5])
+            else:
+                self.pending_rows.append((index,) + row)
+                if len(self.pending_rows) >= SPILL_BATCH_SIZE:
+                    self.flush()
+        return index
+
+    def row(self, index: int) -> tuple:
+        """Return (directory code, name, destination name, confidence, reason code, root code) of a row."""
+        with self._lock:
+            # Checked under the lock, spill() empties the in-memory columns when it moves them to disk
+            if self.connection is None:
+                return (self.directory_codes[index], self.names[index], self.destinations[self.destination_codes[index]],
+                        self.confidences[index], self.reason_codes[index], self.root_codes[index])
+            self.flush()
+            directory_code, name, destination_code, confidence, reason_code, root_code = self.connection.execute(
+                "SELECT directory, name, destination, confidence, reason, root FROM results WHERE id = ?", (index,)).fetchone()
+        return directory_code, name, self.destinations[destination_code], confidence, reason_code, root_code
+
+    def choose_alternative(self, index: int, destination_name: str) -> bool:
+        """Make one of a row's alternatives its destination, the previous destination becomes an alternative.
+           Return False when destination_name is not an alternative of the row."""
+        candidates = dict(self.alternatives.get(index, ()))
+        if destination_name not in candidates:
+            return False
+        _, _, previous_destination, previous_confidence, _, _ = self.row(index)
+        confidence = float(candidates.pop(destination_name))
+        candidates[previous_destination] = previous_confidence
+        with self._lock:
+            destination_code = self.destinations.code(destination_name)
+            reason_code = self.reasons.code(CHOSEN_ALTERNATIVE_REASON)
+            if self.connection is None:
+                self.destination_codes[index] = destination_code
+                self.confidences[index] = confidence
+                self.reason_codes[index] = reason_code
+            else:
+                self.flush()
+                self.connection.execute("UPDATE results SET destination = ?, confidence = ?, reason = ? WHERE id = ?",
+                                        (destination_code, confidence, reason_code, index))
+                self.connection.commit()
+            self.alternatives[index] = tuple(sorted(candidates.items(), key=lambda candidate: candidate[1], reverse=True))
+        return True
+
+    def result_row(self, index: int) -> ResultRow:
+        directory_code, name, destination_name, confidence, reason_code, root_code = self.row(index)
+        return ResultRow(index, os.path.join(self.directories[directory_code], name), destination_name, confidence,
+                         self.reasons[reason_code], CATEGORIES[self.categories[index]], self.roots[root_code],
+                         self.duplicates.get(index), self.alternatives.get(index, ()))
+
+    def source_path(self, index: int) -> str:
+        row = self.row(index)
+        return os.path.join(self.directories[row[0]], row[1])
+
+    def view(self, indices: Iterable[int] = None) -> ResultView:
+        return ResultView(self, range(len(self)) if indices is None else indices)
+
+    def filter(self, predicate: Callable[[ResultRow], bool]) -> ResultView:
+        return self.view().filter(predicate)
+
+    def category_view(self, category: str) -> ResultView:
+        """Rows of one category, as indices into this store."""
+        code = CATEGORY_CODES[category]
+        return ResultView(self, (index for index, row_code in enumerate(self.categories) if row_code == code))
+
+    def spill(self):
+        """Move the in-memory rows to a SQLite file, later rows are streamed there in batches."""
+        os.makedirs(self.spill_directory, exist_ok=True)
+        self.spill_path = os.path.join(self.spill_directory, f"results-{uuid.uuid4().hex}.sqlite")
+        self.connection = sqlite3.connect(self.spill_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=OFF")
+        self.connection.execute("PRAGMA synchronous=OFF")
+        self.connection.execute(
+            "CREATE TABLE results (id INTEGER PRIMARY KEY, directory INTEGER, name TEXT, destination INTEGER, "
+            "confidence REAL, reason INTEGER, root INTEGER)")
+        self.connection.executemany(
+            "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+            zip(range(len(self.names)), self.directory_codes, self.names, self.destination_codes,
+                self.confidences, self.reason_codes, self.root_codes))
+        self.connection.commit()
+        self.directory_codes = array('I')
+        self.names = []
+        self.destination_codes = array('I')
+        self.confidences = array('d')
+        self.reason_codes = array('H')
+        self.root_codes = array('H')
+
+    def flush(self):
+        if self.pending_rows:
+            self.connection.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?)", self.pending_rows)
+            self.connection.commit()
+            self.pending_rows = []
+
+    def close(self):
+        """Remove the spill file, the store must not be used afterwards. Safe to call more than once."""
+        with self._lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+                self.pending_rows = []
+                if self.spill_path and os.path.exists(self.spill_path):
+                    os.remove(self.spill_path)
@@ -1,6 +1,6 @@
 from tkinter import filedialog, messagebox
 import os
-import threading
+import time
 import tkinter as tk  # Import tkinter here
 import modules.folder_management as folder_management  # For folder operations
 from modules.extract_popup_ui import ArchiveExtractorPopup 
@@ -10,6 +10,13 @@ from modules.utils.logging_utils import log_message
 import modules.folder_matching as folder_matching  # For matching folders
 from modules.settings_ui import SettingsUI
 from modules.loading_dialog_ui import LoadingDialog
+from modules.utils.move_journal import MoveJournal, latest_revertible_run, revert_run
+from modules.move_planner import PLAN_MISSING_SOURCE, plan_moves
+from modules.utils.fingerprint import flag_installed_duplicates
+from modules.utils.cancellation import CancellationToken
+from modules.batch_processing import list_batch_games, match_all_games
+from modules.result_store import ResultStore
+from modules.utils.scheduler import get_scheduler
 
 def on_source_folder_selected(self, selected_items, event):
     """Update the rename text box with the selected folder name."""
@@ -52,6 +59,8 @@ def browse_destination_folder(self):
         self.text_box_destination_folder.insert(0, folder_path_selected)
         self.text_box_destination_folder.config(state='readonly')
         self.destination_folder = folder_path_selected
+        self.start_prematching()
+        self.update_watch_mode()
 
         # Check if the key exists in DESTINATION_PATH
         if self.config_utils.key_exists_in_destination_path(self.game_folder_selected):
@@ -79,7 +88,7 @@ def rename_selected(self, selected_index):
         return
 
     # Get the current folder name and the new name from the text box
-    item = self.source_folder_listbox.item(selected_index)
+    item = self.source_folder_listbox.item(selected_index[0])
     current_folder_name = item['values'][1]  # Get the current folder name
     new_name = self.rename_text_box.get().strip()  # Get the new name and strip whitespace
 
@@ -155,51 +164,86 @@ def process_folder_actions(self, folder_selected_path, source_folders_list, dest
         f"\n \n"
     )
     
-    loading_dialog = LoadingDialog(self.root)
+    # The foreground run takes over, results already computed in the background come from the cache
+    self.prematcher.cancel()
+    cancel_token = CancellationToken()
+    loading_dialog = LoadingDialog(self.root, cancel_command=cancel_token.cancel)
     matching_results = []
+    # Closed once the review is done, which removes its spill file
+    result_store = ResultStore(spill_threshold=self.result_spill_threshold)
+
+    def report_progress(current_name, done, total, eta_seconds):
+        # Only the newest progress is drawn, the worker never waits for the dialog
+        self.event_bus.post_latest("matching_progress", loading_dialog.update_progress, current_name, done, total, eta_seconds)
     
     def process_matching():
         nonlocal matching_results
-        matching_results = folder_matching.process_match_to_categorized(
-            folder_selected_path,
-            self.available_source_folders_list, 
-            destination_folder,
-            self.alias_data,
-            self.similarity_threshold,
-            self.extensions_check,
-            self.skipworld_list,
-            self.ignore_numbers_status
-        )
-        loading_dialog.popup.destroy()
+        try:
+            matching_results = folder_matching.process_match_to_categorized(
+                folder_selected_path,
+                self.available_source_folders_list, 
+                destination_folder,
+                self.alias_data,
+                self.similarity_threshold,
+                self.extensions_check,
+                self.skipworld_list,
+                self.ignore_numbers_status,
+                cancel_token=cancel_token,
+                progress_callback=report_progress,
+                match_cache=self.match_cache,
+                result_store=result_store,
+                profile=self.matching_profile
+            )
+            # Flag mods that are already installed under another folder name
+            if matching_results:
+                flag_installed_duplicates(matching_results, destination_folder, cancel_token=cancel_token)
+        finally:
+            # The dialog is closed by the main thread, the worker never touches Tk
+            self.event_bus.post(loading_dialog.close_popup)
         
-    thread = threading.Thread(target=process_matching)
-    thread.start()
+    get_scheduler().submit(process_matching, name="process-matching")
     
     self.root.wait_window(loading_dialog.popup)
+
+    if cancel_token.is_cancelled:
+        log_message(f"Matching cancelled, continuing with {len(matching_results)} results computed so far.")
+        messagebox.showinfo("Matching Cancelled", f"Matching was cancelled. {len(matching_results)} folders were matched and can still be processed.")
         
 
-    log_message(
-        f"\n \n"
-        f" ////////////////////////////////////////\n"
-        f" {matching_results} \n"
-        f" ////////////////////////////////////////\n"
-        f"\n \n"
-        )
+    # Log counts only, the results themselves can be very large
+    if matching_results:
+        log_message(f"Matching finished with {matching_results.summary()}.")
     
+    try:
+        review_and_process_results(self, matching_results, destination_folder)
+    finally:
+        result_store.close()
+
+def review_and_process_results(self, matching_results, destination_folder=None):
+    """Review the matching results per confidence level, move the confirmed folders and show one summary.
+       Results carry their own destination_root, so results of several games can be reviewed together."""
     # Pastikan get_matching_data tidak None sebelum melanjutkan
     if matching_results:
         # Data mapping based on confidence level
-        high_confidence_mapping = [result for result in matching_results if result.category == 'HIGH']
-        medium_confidence_mapping = [result for result in matching_results if result.category == 'MEDIUM'] 
-        low_confidence_mapping = [result for result in matching_results if result.category == 'LOW']
+        # Index-based views on the result store, no result is copied
+        high_confidence_mapping = matching_results.category_view('HIGH')
+        medium_confidence_mapping = matching_results.category_view('MEDIUM')
+        low_confidence_mapping = matching_results.category_view('LOW')
         
         # initiate total summary in every step
         total_summary = {}
+
+        # Show the game folder next to each source when several games are reviewed together
+        show_game = len({result.destination_root for result in matching_results}) > 1
+
+        # Every move of this run is journaled so it can be reverted in bulk later
+        journal = MoveJournal()
         
         # Steps 1: High confidence
         if high_confidence_mapping:
             # Displays matching results
-            high_confirm = MatchingPopup("high_confidence", high_confidence_mapping, self.root, self)
+            high_plan = plan_moves(high_confidence_mapping, destination_folder)
+            high_confirm = MatchingPopup("high_confidence", high_confidence_mapping, self.root, self, high_plan, show_game)
             
             # Wait until popup is closed
             self.root.wait_window(high_confirm.popup)
@@ -207,30 +251,22 @@ def process_folder_actions(self, folder_selected_path, source_folders_list, dest
             # Handle user actions based on the button clicked
             if high_confirm.user_response:
                 # Filter out skipped items from high_confidence_mapping
-                filtered_high_confidence = [
-                    item for item in high_confidence_mapping 
-                    if os.path.basename(item.source_path) not in high_confirm.skipped_list
-                ]
+                skipped_paths = set(high_confirm.skipped_paths)
+                filtered_high_confidence = high_confidence_mapping.filter(lambda item: item.source_path not in skipped_paths)
                 
-                # add log_message for filtered_high_confidence
-                log_message(
-                    f"\n \n"
-                    f"#################################\n"
-                    f"filtered_high_confidence= '{filtered_high_confidence}', \n"
-                    f"#################################"
-                    f"\n \n"
-                )
+                log_message(f"{len(filtered_high_confidence)} high confidence folders confirmed, {len(high_confirm.skipped_paths)} skipped.")
                 
                 # Process only non-skipped items
-                high_summary = folder_management.process_folder(filtered_high_confidence, self.destination_folder)
+                high_summary = process_folder_in_background(self, filtered_high_confidence, destination_folder, journal)
                 self.refresh_available_source_folders() 
 
                 # if folder_management.process_folder return none
                 if high_summary:
-                    total_summary.update(high_summary)
+                    merge_summary(total_summary, high_summary)
                 else:
                     # stop processing if no summary is returned
                     log_message("Can't process high confidence folder")
+                    journal.close()
                     return None
             else:
                 log_message("User chose to skip the action.")
@@ -240,7 +276,8 @@ def process_folder_actions(self, folder_selected_path, source_folders_list, dest
         # Steps 2: Medium confidence
         if medium_confidence_mapping:
             # Displays matching results
-            medium_confirm = MatchingPopup("medium_confidence", medium_confidence_mapping, self.root, self)
+            medium_plan = plan_moves(medium_confidence_mapping, destination_folder)
+            medium_confirm = MatchingPopup("medium_confidence", medium_confidence_mapping, self.root, self, medium_plan, show_game)
             
             # Wait until popup is closed
             self.root.wait_window(medium_confirm.popup)
@@ -248,30 +285,22 @@ def process_folder_actions(self, folder_selected_path, source_folders_list, dest
             # Handle user actions based on the button clicked
             if medium_confirm.user_response:
                 # Filter out skipped items from high_confidence_mapping
-                filtered_medium_confidence = [
-                    item for item in medium_confidence_mapping 
-                    if os.path.basename(item.source_path) not in medium_confirm.skipped_list
-                ]
+                skipped_paths = set(medium_confirm.skipped_paths)
+                filtered_medium_confidence = medium_confidence_mapping.filter(lambda item: item.source_path not in skipped_paths)
                 
-                # add log_message for filtered_high_confidence
-                log_message(
-                    f"\n \n"
-                    f"#################################\n"
-                    f"filtered_medium_confidence= '{filtered_medium_confidence}', \n"
-                    f"#################################"
-                    f"\n \n"
-                )
+                log_message(f"{len(filtered_medium_confidence)} medium confidence folders confirmed, {len(medium_confirm.skipped_paths)} skipped.")
                 
                 # Process only non-skipped items
-                medium_summary = folder_management.process_folder(filtered_medium_confidence, self.destination_folder)
+                medium_summary = process_folder_in_background(self, filtered_medium_confidence, destination_folder, journal)
 
                 self.refresh_available_source_folders() 
 
                 if medium_summary:
-                    total_summary.update(medium_summary)
+                    merge_summary(total_summary, medium_summary)
                 else:
                     # stop processing if no summary is returned
                     log_message("Can't process medium confidence folder")
+                    journal.close()
                     return None
             else:
                 log_message("User chose to skip the medium confidence folders.")
@@ -281,16 +310,34 @@ def process_folder_actions(self, folder_selected_path, source_folders_list, dest
         # Steps 3: Low confidence
         if low_confidence_mapping:
             # Displays matching results
-            low_confirm = MatchingPopup("low_confidence", low_confidence_mapping, self.root, self)
+            low_confirm = MatchingPopup("low_confidence", low_confidence_mapping, self.root, self, show_game=show_game)
             
             # Wait until popup is closed
             self.root.wait_window(low_confirm.popup)
+
+            # Only the folders the user corrected with an alternative are moved
+            if low_confirm.user_response:
+                skipped_paths = set(low_confirm.skipped_paths)
+                corrected_paths = set(low_confirm.corrected_paths) - skipped_paths
+                corrected_low_confidence = low_confidence_mapping.filter(lambda item: item.source_path in corrected_paths)
+
+                log_message(f"{len(corrected_low_confidence)} corrected low confidence folders confirmed.")
+
+                low_summary = process_folder_in_background(self, corrected_low_confidence, destination_folder, journal)
+                self.refresh_available_source_folders()
+
+                if low_summary:
+                    merge_summary(total_summary, low_summary)
+                else:
+                    log_message("Can't process corrected low confidence folders")
         else:
             log_message("No data with low confidence found.")
 
+        journal.close()
+
         # Steps 4: Display total summary
         if total_summary:
-            result_popup = MatchingResultPopup(total_summary, self.root)
+            result_popup = MatchingResultPopup(total_summary, self.root, journal.path)
             self.root.wait_window(result_popup.popup)
         else:
             log_message("No data to process.")
@@ -301,6 +348,103 @@ def process_folder_actions(self, folder_selected_path, source_folders_list, dest
         log_message("No valid get_matching_data found. Please check the source and destination folders.")
         messagebox.showerror("Error", "No valid data found. Please check the source and destination folders.")
 
+def process_all_games_actions(self):
+    """Match every game folder with a configured destination at once and review them in one pass."""
+    games = list_batch_games(self.readytomoves_dir, self.destination_path_list)
+    if not games:
+        messagebox.showwarning("Warning", "No game folder has a destination folder configured!")
+        return
+    log_message(f"Batch processing games: {[game_name for game_name, _, _ in games]}")
+
+    # The foreground run takes over, results already computed in the background come from the cache
+    self.prematcher.cancel()
+    cancel_token = CancellationToken()
+    loading_dialog = LoadingDialog(self.root, cancel_command=cancel_token.cancel)
+    matching_results = []
+    # Closed once the review is done, which removes its spill file
+    result_store = ResultStore(spill_threshold=self.result_spill_threshold)
+
+    def report_progress(current_name, done, total, eta_seconds):
+        self.event_bus.post_latest("matching_progress", loading_dialog.update_progress, current_name, done, total, eta_seconds)
+
+    def process_matching():
+        nonlocal matching_results
+        try:
+            matching_results = match_all_games(
+                games,
+                self.alias_data,
+                self.similarity_threshold,
+                self.extensions_check,
+                self.skipworld_list,
+                self.ignore_numbers_status,
+                cancel_token=cancel_token,
+                progress_callback=report_progress,
+                match_cache=self.match_cache,
+                result_store=result_store,
+                profile=self.matching_profile
+            )
+        finally:
+            self.event_bus.post(loading_dialog.close_popup)
+
+    get_scheduler().submit(process_matching, name="batch-matching")
+    self.root.wait_window(loading_dialog.popup)
+
+    if cancel_token.is_cancelled:
+        log_message(f"Batch matching cancelled, continuing with {len(matching_results)} results computed so far.")
+        messagebox.showinfo("Matching Cancelled", f"Matching was cancelled. {len(matching_results)} folders were matched and can still be processed.")
+
+    try:
+        review_and_process_results(self, matching_results)
+    finally:
+        result_store.close()
+    refresAllList(self)
+
+def run_in_background(self, task, label, name):
+    """Run task(progress_callback) on the scheduler behind a LoadingDialog and return its result, the window
+       keeps drawing meanwhile. progress_callback(done, total, source, destination, status) may be called
+       from any thread. The dialog cannot be closed, a move is never left half done."""
+    loading_dialog = LoadingDialog(self.root)
+    loading_dialog.progress_label.config(text=label)
+    loading_dialog.popup.protocol("WM_DELETE_WINDOW", lambda: None)
+    outcome = {}
+    started_at = time.monotonic()
+
+    def report_progress(done, total, source, destination, status):
+        eta_seconds = (time.monotonic() - started_at) / done * (total - done) if done else None
+        self.event_bus.post_latest(name, loading_dialog.update_progress, os.path.basename(source), done, total, eta_seconds)
+
+    def run():
+        try:
+            outcome['result'] = task(report_progress)
+        except Exception as e:
+            outcome['error'] = e
+        finally:
+            self.event_bus.post(loading_dialog.close_popup)
+
+    get_scheduler().submit(run, name=name)
+    self.root.wait_window(loading_dialog.popup)
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome.get('result')
+
+def process_folder_in_background(self, folders_to_move_mapping, destination_folder, journal):
+    """Move confirmed folders through run_in_background, same result as folder_management.process_folder."""
+    plan = plan_moves(folders_to_move_mapping, destination_folder)
+    if any(planned_move.status == PLAN_MISSING_SOURCE for planned_move in plan):
+        # Reports the missing folder with a message box and moves nothing, only the main thread may show it
+        return folder_management.process_folder(folders_to_move_mapping, destination_folder, journal=journal, plan=plan)
+    return run_in_background(
+        self,
+        lambda progress_callback: folder_management.process_folder(folders_to_move_mapping, destination_folder, progress_callback, journal, plan),
+        f"Moving {len(plan)} folders...",
+        "process-folder"
+    )
+
+def merge_summary(total_summary, summary):
+    """Add the moved, failed and duplicate lists of one step to the run summary."""
+    for key, entries in summary.items():
+        total_summary.setdefault(key, []).extend(entries)
+
 def on_browse_button_click(self):
     """Handle the event when the browse button is clicked to select a source folder."""
     source_folder_path_selected, source_folder_name_selected  = folder_management.browse_for_source_folder()
@@ -317,8 +461,8 @@ def on_browse_button_click(self):
         f"self.source_folder_root: {self.source_folder_root}  \n"
         f"self.source_folder_selected: {self.game_folder_selected_path}"
     )
-    self.refresh_available_archives()
-    self.refresh_available_source_folders()
+    self.refresh_all_lists()
+    self.update_watch_mode()
 
 
 def on_archive_selected(self, selected_items):
@@ -349,6 +493,19 @@ def on_archive_selected(self, selected_items):
         if self.available_archive_listbox.get_children():
             log_message("No archive selected.")
 
+def make_extraction_resolver(self):
+    """Return the resolve_target for extraction when confident matches are placed directly, otherwise None."""
+    if not (self.place_matched_archives.get() and self.destination_folder):
+        return None
+    return folder_matching.make_archive_target_resolver(
+        self.destination_folder,
+        self.alias_data,
+        self.similarity_threshold,
+        self.extensions_check,
+        self.skipworld_list,
+        self.ignore_numbers_status
+    )
+
 def extract_archives(self, archive_paths): 
     """Initiate the extraction process for the selected archives."""
     # Check if archive_paths is empty
@@ -366,12 +523,26 @@ def extract_archives(self, archive_paths):
         return  # Exit the function early since there's nothing to process
 
     # Proceed with extraction if all checks pass
-    extractor_popup = ArchiveExtractorPopup(archive_paths, self.root, self)  # Pass the main app instance
+    extractor_popup = ArchiveExtractorPopup(archive_paths, self.root, self, make_extraction_resolver(self))  # Pass the main app instance
     self.root.wait_window(extractor_popup)
     if extractor_popup.user_closed:
-        self.refresAllList(self)
+        refresAllList(self)
     self.extract_selected_button.pack_forget()  # Hide the button after extraction
 
+def undo_last_run(self):
+    """Revert every move of the newest journaled run, also after an app restart."""
+    journal_path = latest_revertible_run()
+    if not journal_path:
+        messagebox.showinfo("Info", "There is no run to undo.")
+        return
+
+    confirmation = messagebox.askyesno("Confirm Undo", f"Move every folder of the run '{os.path.basename(journal_path)}' back to its original location?")
+    if confirmation:
+        revert_summary = run_in_background(self, lambda progress_callback: revert_run(journal_path, progress_callback),
+                                           "Moving folders back...", "undo-run")
+        messagebox.showinfo("Undo Completed", f"Reverted: {len(revert_summary['reverted'])}\nFailed: {len(revert_summary['failed'])}")
+        refresAllList(self)
+
 def open_settings(self):
     """Open the settings UI."""
     settings_popup = SettingsUI(self.root, self, self.config_utils, self.base_dir, self.config_path, self.dictionary_path, self.readytomoves_dir, firstinitial=False)
@@ -380,5 +551,4 @@ def open_settings(self):
         self.reload_settings()  # Reload the settings after the popup is closed
 
 def refresAllList(self):
-    self.refresh_available_archives()
-    self.refresh_available_source_folders()
\ No newline at end of file
+    self.refresh_all_lists()
\ No newline at end of file
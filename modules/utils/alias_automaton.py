@@ -0,0 +1,109 @@
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+
+class AliasAutomaton:
+    """Aho-Corasick automaton over lowercase alias keys. One pass over a name finds every key it contains,
+       first_match returns the key that comes first in the alias dictionary, like a loop over the keys would."""
+
+    def __init__(self, keys: List[str]):
+        self.keys = keys
+        self.transitions: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.best: List[Optional[int]] = [None]  # Lowest key position ending at this node or its fail chain
+        self.empty_key: Optional[int] = None  # An empty key is contained in every name
+
+        for position, key in enumerate(keys):
+            pattern = key.lower()
+            if not pattern:
+                if self.empty_key is None:
+                    self.empty_key = position
+                continue
+            node = 0
+            for char in pattern:
+                next_node = self.transitions[node].get(char)
+                if next_node is None:
+                    next_node = len(self.transitions)
+                    self.transitions[node][char] = next_node
+                    self.transitions.append({})
+                    self.fail.append(0)
+                    self.best.append(None)
+                node = next_node
+            if self.best[node] is None:
+                self.best[node] = position
+
+        # Breadth first, so the fail target of a node is complete before the node itself
+        queue = deque(self.transitions[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.transitions[node].items():
+                fallback = self.fail[node]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.transitions[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                inherited = self.best[self.fail[child]]
+                if inherited is not None and (self.best[child] is None or inherited < self.best[child]):
+                    self.best[child] = inherited
+                queue.append(child)
+
+    def first_match(self, text: str) -> Optional[str]:
+        """Return the first key in dictionary order that occurs in text, ignoring case."""
+        best = self.empty_key
+        node = 0
+        for char in text.lower():
+            while node and char not in self.transitions[node]:
+                node = self.fail[node]
+            node = self.transitions[node].get(char, 0)
+            found = self.best[node]
+            if found is not None and (best is None or found < best):
+                best = found
+                if best == 0:
+                    break
+        return self.keys[best] if best is not None else None
+
+
+class AliasTable(dict):
+    """The ALIAS dictionary with a lazily built AliasAutomaton, so apply_aliases scans a name
+       once instead of testing every alias key. It is still a plain dict for everything else."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._automaton: Optional[AliasAutomaton] = None
+
+    def first_alias(self, text: str) -> Optional[Tuple[str, str]]:
+        """Return (alias key, alias value) of the first key contained in text, or None."""
+        automaton = self._automaton
+        if automaton is None:
+            automaton = self._automaton = AliasAutomaton(list(self.keys()))
+        key = automaton.first_match(text)
+        return (key, self[key]) if key is not None else None
+
+    # Any change invalidates the automaton, it is rebuilt on the next lookup
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._automaton = None
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._automaton = None
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._automaton = None
+
+    def pop(self, *args):
+        self._automaton = None
+        return super().pop(*args)
+
+    def popitem(self):
+        self._automaton = None
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        self._automaton = None
+        return super().setdefault(key, default)
+
+    def clear(self):
+        super().clear()
+        self._automaton = None
@@ -0,0 +1,293 @@
+import os
+import time
+import shutil
+import tarfile
+import zipfile
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+from modules.utils.logging_utils import log_message
+
+try:
+    import py7zr  # Optional pure-Python 7z reader
+    from py7zr.exceptions import UnsupportedCompressionMethodError
+except ImportError:
+    py7zr = None
+    UnsupportedCompressionMethodError = None
+
+# Size of the chunks copied from an archive member to disk
+COPY_CHUNK_SIZE = 1024 * 1024
+
+TAR_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+COMPRESSED_EXTENSIONS = ('.gz', '.bz2', '.xz')  # Could be a compressed tar or a single compressed file
+
+# Raised by zipfile (deflate64, AES) and py7zr (BCJ2, PPMd) for methods they cannot decode,
+# such archives are extracted with patool instead
+UNSUPPORTED_METHOD_ERRORS = (NotImplementedError,) + ((UnsupportedCompressionMethodError,) if UnsupportedCompressionMethodError else ())
+
+
+@dataclass
+class ArchiveMember:
+    name: str  # Relative path inside the archive, always with '/' separators
+    is_dir: bool
+    size: int
+
+
+def normalize_member_name(member_name: str) -> str:
+    """Return a member name with '/' separators and without a leading './' or trailing '/'.
+       The '.' entry of archives packed from inside a folder becomes an empty name."""
+    member_name = member_name.replace('\\', '/')
+    while member_name.startswith('./'):
+        member_name = member_name[2:]
+    member_name = member_name.rstrip('/')
+    return '' if member_name == '.' else member_name
+
+
+def safe_member_path(outdir: str, member_name: str) -> Optional[str]:
+    """Return the output path for a member, or None if it would escape outdir."""
+    parts = [part for part in member_name.replace('\\', '/').split('/') if part not in ('', '.')]
+    if not parts or '..' in parts or os.path.isabs(member_name) or ':' in parts[0]:
+        return None
+    return os.path.join(outdir, *parts)
+
+
+def copy_member_stream(source, target_path: str, progress: Callable[[int], None]) -> None:
+    """Copy a member stream to target_path in chunks, reporting the bytes written."""
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    with open(target_path, 'wb') as target:
+        while True:
+            chunk = source.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            target.write(chunk)
+            progress(len(chunk))
+
+
+def zip_member_mtime(info: zipfile.ZipInfo) -> Optional[float]:
+    """Zip stores local time without a time zone, as 7-Zip and unzip do it is read as local time."""
+    try:
+        return time.mktime(info.date_time + (0, 0, -1))
+    except (OverflowError, ValueError):
+        return None
+
+
+def set_member_mtimes(member_times: List) -> None:
+    """Give extracted files and folders the modification times stored in the archive, as patool's
+       tools do. Folders are done last and deepest first, writing into them changes their time."""
+    for path, mtime in sorted(member_times, key=lambda entry: (os.path.isdir(entry[0]), -entry[0].count(os.sep))):
+        if mtime is None:
+            continue
+        try:
+            os.utime(path, (mtime, mtime))
+        except (OSError, OverflowError, ValueError):
+            pass
+
+
+class ArchiveBackend:
+    """Base class for archive backends. Subclasses handle one family of formats."""
+    name = "base"
+    can_list = True  # False when the backend cannot read a member listing from headers
+
+    def list_members(self, archive_path: str, password: str = None) -> List[ArchiveMember]:
+        raise NotImplementedError
+
+    def test(self, archive_path: str, password: str = None) -> None:
+        """Raise an exception if the archive is corrupted."""
+        raise NotImplementedError
+
+    def extract(self, archive_path: str, outdir: str, password: str = None,
+                progress_callback: Callable[[int, int], None] = None,
+                path_mapper: Callable[[str], Optional[str]] = None) -> None:
+        """Extract members to outdir. progress_callback receives (bytes_done, bytes_total).
+           path_mapper maps a member name to its path relative to outdir, or None to skip it."""
+        raise NotImplementedError
+
+    def _map_member(self, member_name: str, path_mapper) -> Optional[str]:
+        """Apply the optional path mapper to a member name. Members mapped to the root are skipped."""
+        member_name = normalize_member_name(member_name)
+        if not member_name:
+            return None
+        return (path_mapper(member_name) or None) if path_mapper else member_name
+
+    def _progress_reporter(self, members: List[ArchiveMember], progress_callback):
+        """Return a function that accumulates written bytes and forwards them to the callback."""
+        total = sum(member.size for member in members if not member.is_dir)
+        done = 0
+
+        def report(written: int) -> None:
+            nonlocal done
+            done += written
+            if progress_callback:
+                progress_callback(done, total)
+        return report
+
+
+class ZipBackend(ArchiveBackend):
+    """In-process backend for .zip files using the standard library."""
+    name = "zip"
+
+    def list_members(self, archive_path, password=None):
+        with zipfile.ZipFile(archive_path) as archive:
+            return [ArchiveMember(normalize_member_name(info.filename), info.is_dir(), info.file_size)
+                    for info in archive.infolist() if normalize_member_name(info.filename)]
+
+    def test(self, archive_path, password=None):
+        with zipfile.ZipFile(archive_path) as archive:
+            if password:
+                archive.setpassword(password.encode())
+            bad_member = archive.testzip()
+            if bad_member:
+                raise zipfile.BadZipFile(f"CRC check failed for '{bad_member}'")
+
+    def extract(self, archive_path, outdir, password=None, progress_callback=None, path_mapper=None):
+        with zipfile.ZipFile(archive_path) as archive:
+            if password:
+                archive.setpassword(password.encode())
+            infos = [(info, self._map_member(info.filename, path_mapper)) for info in archive.infolist()]
+            infos = [(info, mapped_name) for info, mapped_name in infos if mapped_name is not None]
+            report = self._progress_reporter(
+                [ArchiveMember(info.filename, info.is_dir(), info.file_size) for info, _ in infos], progress_callback)
+
+            member_times = []
+            for info, mapped_name in infos:
+                target_path = safe_member_path(outdir, mapped_name)
+                if target_path is None:
+                    log_message(f"Skipping unsafe member '{info.filename}' in '{archive_path}'.")
+                    continue
+                member_times.append((target_path, zip_member_mtime(info)))
+                if info.is_dir():
+                    os.makedirs(target_path, exist_ok=True)
+                    continue
+                # zipfile verifies the CRC of each member while it is read
+                with archive.open(info) as source:
+                    copy_member_stream(source, target_path, report)
+            set_member_mtimes(member_times)
+
+
+class TarBackend(ArchiveBackend):
+    """In-process backend for plain and compressed tar files using the standard library."""
+    name = "tar"
+
+    def list_members(self, archive_path, password=None):
+        with tarfile.open(archive_path, 'r:*') as archive:
+            return [ArchiveMember(normalize_member_name(info.name), info.isdir(), info.size)
+                    for info in archive.getmembers() if (info.isdir() or info.isfile()) and normalize_member_name(info.name)]
+
+    def test(self, archive_path, password=None):
+        # Reading every member checks the compressed stream's own checksums
+        with tarfile.open(archive_path, 'r:*') as archive:
+            for info in archive:
+                if info.isfile():
+                    source = archive.extractfile(info)
+                    while source.read(COPY_CHUNK_SIZE):
+                        pass
+
+    def extract(self, archive_path, outdir, password=None, progress_callback=None, path_mapper=None):
+        with tarfile.open(archive_path, 'r:*') as archive:
+            infos = [(info, self._map_member(info.name, path_mapper)) for info in archive.getmembers()]
+            infos = [(info, mapped_name) for info, mapped_name in infos if mapped_name is not None]
+            report = self._progress_reporter(
+                [ArchiveMember(info.name, info.isdir(), info.size) for info, _ in infos if info.isfile()], progress_callback)
+
+            member_times = []
+            for info, mapped_name in infos:
+                target_path = safe_member_path(outdir, mapped_name)
+                if target_path is None:
+                    log_message(f"Skipping unsafe member '{info.name}' in '{archive_path}'.")
+                    continue
+                if info.isdir():
+                    os.makedirs(target_path, exist_ok=True)
+                elif info.isfile():
+                    copy_member_stream(archive.extractfile(info), target_path, report)
+                else:
+                    # Links and device files are never needed for mods
+                    log_message(f"Skipping non-regular member '{info.name}' in '{archive_path}'.")
+                    continue
+                member_times.append((target_path, info.mtime))
+            set_member_mtimes(member_times)
+
+
+class SevenZipBackend(ArchiveBackend):
+    """In-process backend for .7z files using py7zr, when it is installed."""
+    name = "7z"
+
+    def list_members(self, archive_path, password=None):
+        return [member for _, member, _ in self._list(archive_path, password)]
+
+    def _list(self, archive_path, password=None):
+        """Return (name as stored, normalized member, modification time) triples, py7zr selects targets by the stored name."""
+        with py7zr.SevenZipFile(archive_path, 'r', password=password) as archive:
+            return [(info.filename, ArchiveMember(normalize_member_name(info.filename), info.is_directory, info.uncompressed or 0),
+                     info.creationtime.timestamp() if info.creationtime else None)
+                    for info in archive.list() if normalize_member_name(info.filename)]
+
+    def test(self, archive_path, password=None):
+        with py7zr.SevenZipFile(archive_path, 'r', password=password) as archive:
+            bad_member = archive.testzip()
+            if bad_member:
+                raise py7zr.Bad7zFile(f"CRC check failed for '{bad_member}'")
+
+    def extract(self, archive_path, outdir, password=None, progress_callback=None, path_mapper=None):
+        listing = self._list(archive_path, password)
+        member_mtimes = {member.name: mtime for _, member, mtime in listing}
+        members = [(stored_name, member, self._map_member(member.name, path_mapper)) for stored_name, member, _ in listing]
+        members = [(stored_name, member, mapped_name) for stored_name, member, mapped_name in members if mapped_name is not None]
+        unsafe = [member.name for _, member, mapped_name in members
+                  if safe_member_path(outdir, member.name) is None or safe_member_path(outdir, mapped_name) is None]
+        if unsafe:
+            raise ValueError(f"Archive contains unsafe member paths: {unsafe}")
+
+        # py7zr cannot remap members, so extract into a staging folder on the same filesystem
+        # and rename the files to their mapped paths, which costs no data copies
+        staging_dir = os.path.join(outdir, ".staging") if path_mapper else outdir
+        with py7zr.SevenZipFile(archive_path, 'r', password=password) as archive:
+            # py7zr verifies CRCs during extraction and raises on mismatch
+            if path_mapper:
+                archive.extract(path=staging_dir, targets=[stored_name for stored_name, _, _ in members])
+            else:
+                archive.extractall(path=outdir)
+
+        if path_mapper:
+            for _, member, mapped_name in members:
+                target_path = safe_member_path(outdir, mapped_name)
+                if member.is_dir:
+                    os.makedirs(target_path, exist_ok=True)
+                else:
+                    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                    os.replace(safe_member_path(staging_dir, member.name), target_path)
+            shutil.rmtree(staging_dir)
+        # py7zr's list() reports the last write time as creationtime
+        set_member_mtimes([(safe_member_path(outdir, mapped_name), member_mtimes[member.name]) for _, member, mapped_name in members])
+
+        total = sum(member.size for _, member, _ in members if not member.is_dir)
+        if progress_callback:
+            progress_callback(total, total)
+
+
+class PatoolBackend(ArchiveBackend):
+    """Fallback backend that runs an external program through patoolib."""
+    name = "patool"
+    can_list = False  # Always extracted through a temporary folder, members are never listed or remapped
+
+    def test(self, archive_path, password=None):
+        import patoolib
+        patoolib.test_archive(archive_path)
+
+    def extract(self, archive_path, outdir, password=None, progress_callback=None, path_mapper=None):
+        import patoolib
+        patoolib.extract_archive(archive_path, outdir=outdir, password=password)
+
+
+def get_archive_backend(archive_path: str) -> ArchiveBackend:
+    """Pick the in-process backend for an archive, falling back to patoolib for other formats."""
+    file_name = archive_path.lower()
+
+    if file_name.endswith('.zip') and zipfile.is_zipfile(archive_path):
+        return ZipBackend()
+    if file_name.endswith(TAR_EXTENSIONS):
+        return TarBackend()
+    if file_name.endswith(COMPRESSED_EXTENSIONS) and tarfile.is_tarfile(archive_path):
+        return TarBackend()
+    if file_name.endswith('.7z') and py7zr is not None:
+        return SevenZipBackend()
+
+    return PatoolBackend()
@@ -0,0 +1,86 @@
+import os
+import json
+import mmap
+import hashlib
+from datetime import datetime
+from typing import Optional
+from modules.utils.logging_utils import log_message
+
+# Index file stored next to the .extracted folder of each game folder
+INDEX_FILE_NAME = ".extracted_index.json"
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def hash_archive(archive_path: str) -> str:
+    """Return the BLAKE2b content hash of an archive, memory-mapping it when possible."""
+    digest = hashlib.blake2b(digest_size=32)
+    with open(archive_path, 'rb') as archive_file:
+        try:
+            with mmap.mmap(archive_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        except (ValueError, OSError):
+            # Empty files and some network filesystems cannot be mapped, stream them instead
+            archive_file.seek(0)
+            for chunk in iter(lambda: archive_file.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArchiveIndex:
+    """Content-addressed index of the archives already processed in a game folder."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.index_path = os.path.join(directory, INDEX_FILE_NAME)
+        self.entries = {}  # Content hash -> {'name', 'size', 'time'}
+        self.load()
+
+    def load(self):
+        """Load the index file, seeding it from the .extracted folder the first time."""
+        if not os.path.isfile(self.index_path):
+            self.seed_from_extracted_folder()
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as index_file:
+                self.entries = json.load(index_file)
+        except Exception as e:
+            log_message(f"Error loading archive index '{self.index_path}': {e}")
+            self.entries = {}
+
+    def seed_from_extracted_folder(self):
+        """Hash the archives that were extracted before the index existed."""
+        extracted_folder = os.path.join(self.directory, ".extracted")
+        if not os.path.isdir(extracted_folder):
+            return
+        for file_name in os.listdir(extracted_folder):
+            file_path = os.path.join(extracted_folder, file_name)
+            if os.path.isfile(file_path):
+                try:
+                    self.add(hash_archive(file_path), file_path)
+                except Exception as e:
+                    log_message(f"Error hashing extracted archive '{file_path}': {e}")
+        if self.entries:
+            log_message(f"Seeded archive index with {len(self.entries)} archives from '{extracted_folder}'.")
+            self.save()
+
+    def lookup(self, digest: str) -> Optional[dict]:
+        """Return the entry of an already processed archive with the same content, if any."""
+        return self.entries.get(digest)
+
+    def add(self, digest: str, archive_path: str):
+        """Record an archive as processed."""
+        self.entries[digest] = {
+            'name': os.path.basename(archive_path),
+            'size': os.path.getsize(archive_path),
+            'time': datetime.now().isoformat(timespec='seconds'),
+        }
+
+    def save(self):
+        """Write the index atomically so a crash never leaves a truncated file."""
+        temp_path = f"{self.index_path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as index_file:
+                json.dump(self.entries, index_file, indent=4)
+            os.replace(temp_path, self.index_path)
+        except Exception as e:
+            log_message(f"Error saving archive index '{self.index_path}': {e}")
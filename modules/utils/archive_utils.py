@@ -1,55 +1,248 @@
 import os
 import shutil
-import patoolib
+import threading
+from modules.utils.archive_backends import UNSUPPORTED_METHOD_ERRORS, PatoolBackend, get_archive_backend
+from modules.utils.archive_index import ArchiveIndex, hash_archive
 from modules.utils.logging_utils import log_message
 
+# Archives of one folder can be extracted in parallel, their index updates must not overwrite each other
+_index_lock = threading.Lock()
+
+# Archives being extracted right now, shared by the extraction popup and watch mode
+_in_flight_archives = set()
+_in_flight_lock = threading.Lock()
+
 def create_temp_dir(destination_dir: str) -> str:
     """Create a unique temporary directory with a suffix."""
     base_temp_dir = os.path.join(destination_dir, ".temp")
     temp_dir = base_temp_dir
     suffix = 1
 
-    # Check if the temp directory already exists and create a new one with a suffix
-    while os.path.exists(temp_dir):
-        temp_dir = f"{base_temp_dir}{suffix}"
-        suffix += 1
+    # Create a new one with a suffix when the temp directory already exists, also when a parallel extraction just made it
+    while True:
+        try:
+            os.makedirs(temp_dir)
+            return temp_dir
+        except FileExistsError:
+            temp_dir = f"{base_temp_dir}{suffix}"
+            suffix += 1
 
-    os.makedirs(temp_dir, exist_ok=True)
-    return temp_dir
-
-def validate_archive(archive_path: str) -> bool:
+def validate_archive(archive_path: str, password: str = None) -> bool:
     """Check if the specified archive file exists and is not corrupted.
        Return True if valid, False otherwise."""
     if not os.path.isfile(archive_path):
         log_message(f"'{archive_path}' is not a valid file.")
         return False
     
-    # Validate using patool for all formats
+    # Validate in-process where possible, patool is only used for other formats
     try:
-        patoolib.test_archive(archive_path)
-        log_message(f"'{archive_path}' is valid.")
+        backend = get_archive_backend(archive_path)
+        try:
+            backend.test(archive_path, password=password)
+        except UNSUPPORTED_METHOD_ERRORS as e:
+            log_message(f"The {backend.name} backend cannot decode '{archive_path}' ({e}), testing it with patool.")
+            backend = PatoolBackend()
+            backend.test(archive_path, password=password)
+        log_message(f"'{archive_path}' is valid ({backend.name} backend).")
         return True
     except Exception as e:
         log_message(f"'{archive_path}' is not a valid archive file: {e}")
         return False
 
-def extract_archive(archive_path: str, password: str = None) -> str:
-    """Extract files from an archive and handle top-level items logic."""
+def rollback_extracted_paths(placed_paths: list) -> None:
+    """Remove partial output that was already placed in the destination directory."""
+    for placed_path in reversed(placed_paths):
+        try:
+            if os.path.isdir(placed_path):
+                shutil.rmtree(placed_path)
+            elif os.path.exists(placed_path):
+                os.remove(placed_path)
+            log_message(f"Rolled back partial output '{placed_path}'.")
+        except Exception as e:
+            log_message(f"Failed to roll back partial output '{placed_path}': {e}")
+
+IMAGE_EXTENSIONS = ('.jpeg', '.jpg', '.png', '.gif')
+
+# Supported archive formats by libarchive
+SUPPORTED_FORMATS = (
+    '.7z', '.ace', '.adf', '.alz', '.ape', '.a', '.arc', '.arj', 
+    '.bz2', '.bz3', '.cab', '.chm', '.Z', '.cpio', '.deb', 
+    '.dms', '.flac', '.gz', '.iso', '.lrz', '.lha', '.lzh', 
+    '.lz', '.lzma', '.lzo', '.rpm', '.rar', '.rz', '.shn', 
+    '.tar', '.udf', '.xz', '.zip', '.zoo', '.zst'
+)
+
+def plan_extraction_layout(members: list, archive_name: str):
+    """Decide the final layout from the archive's member listing, before anything is extracted.
+       Return (layout, target_name, path_mapper) where layout is one of 'IMAGE_FOLDER',
+       'SINGLE_FOLDER' or 'MULTIPLE_ITEMS' and path_mapper maps a member name to its
+       path inside the target folder, or None when the member is not extracted.
+       Like the temp directory extraction, the last top-level folder in listing order is
+       the one that keeps the images."""
+    top_level_items = {}  # Keep the archive order, like the listing of the old temp directory
+    top_level_dirs = set()
+    for member in members:
+        parts = member.name.split('/')
+        top_level_items.setdefault(parts[0], None)
+        if member.is_dir or len(parts) > 1:
+            top_level_dirs.add(parts[0])
+
+    folder_name = next((item for item in reversed(top_level_items) if item in top_level_dirs), None)
+    image_files = {item for item in top_level_items
+                   if item not in top_level_dirs and item.lower().endswith(IMAGE_EXTENSIONS)}
+
+    def strip_folder_mapper(member_name):
+        if member_name.startswith(f"{folder_name}/"):
+            return member_name[len(folder_name) + 1:]
+        return None
+
+    if folder_name and image_files:
+        # Write the folder and move the images into it, anything else at the top level is dropped
+        def image_folder_mapper(member_name):
+            if member_name in image_files:
+                return member_name
+            return strip_folder_mapper(member_name)
+        return 'IMAGE_FOLDER', folder_name, image_folder_mapper
+
+    if len(top_level_items) == 1 and folder_name:
+        # Only one top-level folder, its content becomes the target folder
+        return 'SINGLE_FOLDER', folder_name, strip_folder_mapper
+
+    # Multiple items, extract into a new folder with the name of the archive
+    return 'MULTIPLE_ITEMS', archive_name, lambda member_name: member_name
+
+def extract_archive(archive_path: str, password: str = None, single_pass: bool = False, progress_callback=None, resolve_target=None) -> str:
+    """Extract files from an archive and handle top-level items logic.
+       With single_pass the separate archive test is skipped and corruption is
+       detected by the extractor's own CRC checks, rolling back partial output.
+       progress_callback receives (bytes_done, bytes_total) from in-process backends.
+       resolve_target(target_name, member_paths) may return a final folder path outside the
+       game folder for a confidently pre-matched archive, which is then reported as "PLACED".
+       Return "DUPLICATE" when an archive with the same content was already processed and
+       "IN_PROGRESS" when another thread is extracting the same archive."""
     
-    # Validate the archive before extraction
-    if not validate_archive(archive_path):
+    if not os.path.isfile(archive_path):
+        log_message(f"'{archive_path}' is not a valid file.")
+        return "FAILED"
+
+    archive_key = os.path.normcase(os.path.abspath(archive_path))
+    with _in_flight_lock:
+        if archive_key in _in_flight_archives:
+            log_message(f"'{archive_path}' is already being extracted. Skipped.")
+            return "IN_PROGRESS"
+        _in_flight_archives.add(archive_key)
+    try:
+        return extract_claimed_archive(archive_path, password, single_pass, progress_callback, resolve_target)
+    finally:
+        with _in_flight_lock:
+            _in_flight_archives.discard(archive_key)
+
+def extract_claimed_archive(archive_path: str, password: str = None, single_pass: bool = False, progress_callback=None, resolve_target=None) -> str:
+    """The body of extract_archive, run while the archive is marked as being extracted."""
+
+    # Detect re-downloaded or renamed copies before any decompression
+    archive_index = ArchiveIndex(os.path.dirname(archive_path))
+    try:
+        archive_digest = hash_archive(archive_path)
+    except Exception as e:
+        log_message(f"Failed to hash '{archive_path}', duplicate check skipped: {e}")
+        archive_digest = None
+
+    duplicate_entry = archive_index.lookup(archive_digest) if archive_digest else None
+    if duplicate_entry:
+        log_message(f"'{archive_path}' has the same content as already processed '{duplicate_entry['name']}'. Skipped.")
+        return "DUPLICATE"
+
+    # Validate the archive before extraction, single_pass relies on the extractor's own checksums instead
+    if not single_pass and not validate_archive(archive_path, password):
         log_message(f"Extraction aborted for '{archive_path}' due to validation failure.")
         return "FAILED"
 
     archive_name = os.path.splitext(os.path.basename(archive_path))[0]
     destination_dir = os.path.dirname(archive_path)
+
+    try:
+        backend = get_archive_backend(archive_path)
+    except Exception as e:
+        log_message(f"Failed to open '{archive_path}': {e}")
+        return "FAILED"
+
+    # Backends that can list members write straight to the final location
+    if backend.can_list:
+        try:
+            result = extract_archive_direct(backend, archive_path, archive_name, destination_dir, password, progress_callback, resolve_target)
+        except UNSUPPORTED_METHOD_ERRORS as e:
+            # Compression methods the in-process backend cannot decode, patool hands them to an external tool
+            log_message(f"The {backend.name} backend cannot decode '{archive_path}' ({e}), extracting it with patool.")
+            result = extract_archive_via_temp(PatoolBackend(), archive_path, archive_name, destination_dir, password, progress_callback)
+    else:
+        result = extract_archive_via_temp(backend, archive_path, archive_name, destination_dir, password, progress_callback)
+
+    if result in ("SUCCESS", "PLACED"):
+        try:
+            if archive_digest:
+                with _index_lock:
+                    archive_index.load()  # Pick up archives recorded by extractions running alongside
+                    archive_index.add(archive_digest, archive_path)
+                    archive_index.save()
+            move_archive_to_extracted_folder(archive_path)
+        except Exception as e:
+            log_message(f"Failed to move archive '{archive_path}' to the extracted folder: {e}")
+    return result
+
+def extract_archive_direct(backend, archive_path: str, archive_name: str, destination_dir: str, password: str = None, progress_callback=None, resolve_target=None) -> str:
+    """Read the member listing, plan the layout and write members directly to their final paths."""
+    placed_paths = []  # Paths created in destination_dir, removed again if extraction fails
+    try:
+        members = backend.list_members(archive_path, password=password)
+        layout, target_name, path_mapper = plan_extraction_layout(members, archive_name)
+        target_path = os.path.join(destination_dir, target_name)
+
+        # Let a confident pre-match send the archive straight to its destination folder
+        resolved_target_path = None
+        if resolve_target:
+            member_paths = []
+            for member in members:
+                mapped_name = path_mapper(member.name)
+                if mapped_name:
+                    member_paths.append(f"{mapped_name}/" if member.is_dir else mapped_name)
+            resolved_target_path = resolve_target(target_name, member_paths)
+        if resolved_target_path:
+            target_path = resolved_target_path
+        elif layout == 'IMAGE_FOLDER' and os.path.isdir(target_path):
+            # The folder is moved into the existing one, as with the temp directory extraction
+            target_path = os.path.join(target_path, target_name)
+        log_message(f"Layout for '{archive_path}' is {layout}. Target extraction path: {target_path}.")
+
+        # Check if the extraction path already exists
+        if os.path.exists(target_path):
+            log_message(f"Destination directory '{target_path}' already exists.")
+            return "ALREADY"  # Return if the folder already exists
+
+        os.makedirs(target_path)
+        placed_paths.append(target_path)
+        backend.extract(archive_path, target_path, password=password, progress_callback=progress_callback, path_mapper=path_mapper)
+        log_message(f"Successfully extracted '{archive_path}' to '{target_path}' ({backend.name} backend).")
+        return "PLACED" if resolved_target_path else "SUCCESS"
+    except UNSUPPORTED_METHOD_ERRORS:
+        # Nothing is kept, the caller retries with patool
+        rollback_extracted_paths(placed_paths)
+        raise
+    except Exception as e:
+        log_message(f"Failed to extract '{archive_path}': {e}")
+        rollback_extracted_paths(placed_paths)
+        return "FAILED"
+
+def extract_archive_via_temp(backend, archive_path: str, archive_name: str, destination_dir: str, password: str = None, progress_callback=None) -> str:
+    """Extract into a temporary directory first, for backends that cannot list members."""
     temp_dir = create_temp_dir(destination_dir)  # Create a unique temp directory
     log_message(f"Extracting '{archive_path}' temporarily from '{temp_dir}' to '{destination_dir}'...")
+    placed_paths = []  # Paths created in destination_dir, removed again if extraction fails
 
     # Extract the archive to the temporary directory
     try:
-        patoolib.extract_archive(archive_path, outdir=temp_dir, password=password)
-        log_message(f"Successfully extracted '{archive_path}' to '{temp_dir}'.")
+        backend.extract(archive_path, temp_dir, password=password, progress_callback=progress_callback)
+        log_message(f"Successfully extracted '{archive_path}' to '{temp_dir}' ({backend.name} backend).")
 
         # Check the contents of the temporary directory
         items = os.listdir(temp_dir)
@@ -62,7 +255,7 @@ def extract_archive(archive_path: str, password: str = None) -> str:
             item_path = os.path.join(temp_dir, item)
             if os.path.isdir(item_path):
                 folder_name = item  # Store the folder name if found
-            elif item.lower().endswith(('.jpeg', '.jpg', '.png', '.gif')):
+            elif item.lower().endswith(IMAGE_EXTENSIONS):
                 image_files.append(item)  # Collect image files
 
         # Check conditions
@@ -74,7 +267,8 @@ def extract_archive(archive_path: str, password: str = None) -> str:
             log_message(f"Moved image files to '{target_folder_path}'.")
 
             # Move the folder containing images to the destination directory
-            shutil.move(target_folder_path, destination_dir)
+            # An existing folder with the same name receives it as a subfolder
+            placed_paths.append(shutil.move(target_folder_path, destination_dir))
             log_message(f"Moved '{folder_name}' to '{destination_dir}'.")
 
         elif len(items) == 1 and os.path.isdir(os.path.join(temp_dir, items[0])):
@@ -89,6 +283,7 @@ def extract_archive(archive_path: str, password: str = None) -> str:
                 return "ALREADY"  # Return if the folder already exists
 
             shutil.move(os.path.join(temp_dir, single_folder), destination_dir)
+            placed_paths.append(new_folder_path)
             log_message(f"Moved '{single_folder}' to '{destination_dir}'.")
 
         else:
@@ -102,53 +297,47 @@ def extract_archive(archive_path: str, password: str = None) -> str:
                 return "ALREADY"  # Return if the folder already exists
 
             os.makedirs(new_folder_path, exist_ok=True)
+            placed_paths.append(new_folder_path)
 
             # Move all items to the new folder
             for item in items:
                 shutil.move(os.path.join(temp_dir, item), new_folder_path)
             log_message(f"Moved items to '{new_folder_path}'.")
 
-        # Move the archive file to the extracted folder
-        extracted_folder = os.path.join(destination_dir, ".extracted")
-        os.makedirs(extracted_folder, exist_ok=True)
-
-        # Define the destination path for the archive
-        archive_destination_path = os.path.join(extracted_folder, os.path.basename(archive_path))
-
-        # Overwrite if the file already exists
-        if os.path.exists(archive_destination_path):
-            os.remove(archive_destination_path)  # Remove the existing file
-
-        shutil.move(archive_path, archive_destination_path)
-        log_message(f"Moved archive '{archive_path}' to '{archive_destination_path}'.")
-
         return "SUCCESS"  # Return success if extraction is completed
     except Exception as e:
         log_message(f"Failed to extract '{archive_path}': {e}")
+        rollback_extracted_paths(placed_paths)
         return "FAILED"
     finally:
         # Clean up the temporary directory
         if os.path.exists(temp_dir):
             shutil.rmtree(temp_dir)
 
+def move_archive_to_extracted_folder(archive_path: str) -> str:
+    """Move a processed archive into the .extracted folder next to it and return its new path."""
+    extracted_folder = os.path.join(os.path.dirname(archive_path), ".extracted")
+    os.makedirs(extracted_folder, exist_ok=True)
+
+    # Define the destination path for the archive
+    archive_destination_path = os.path.join(extracted_folder, os.path.basename(archive_path))
+
+    # Overwrite if the file already exists
+    if os.path.exists(archive_destination_path):
+        os.remove(archive_destination_path)  # Remove the existing file
+
+    shutil.move(archive_path, archive_destination_path)
+    log_message(f"Moved archive '{archive_path}' to '{archive_destination_path}'.")
+    return archive_destination_path
+
 def list_archive_files_in_directory(root_path):
     """List all archive files in the specified directory."""
     archive_files = []
 
-    # Supported archive formats by libarchive
-    supported_formats = (
-        '.7z', '.ace', '.adf', '.alz', '.ape', '.a', '.arc', '.arj', 
-        '.bz2', '.bz3', '.cab', '.chm', '.Z', '.cpio', '.deb', 
-        '.dms', '.flac', '.gz', '.iso', '.lrz', '.lha', '.lzh', 
-        '.lz', '.lzma', '.lzo', '.rpm', '.rar', '.rz', '.shn', 
-        '.tar', '.udf', '.xz', '.zip', '.zoo', '.zst'
-    )
-
-
     try:
         for file_name in os.listdir(root_path):
             file_path = os.path.join(root_path, file_name)
-            if os.path.isfile(file_path) and file_name.lower().endswith(supported_formats):
+            if os.path.isfile(file_path) and file_name.lower().endswith(SUPPORTED_FORMATS):
                 archive_files.append((file_name, file_path))
 
         log_message(f"Archive files found in '{root_path}': {archive_files}")
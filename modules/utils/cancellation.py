@@ -0,0 +1,45 @@
+import threading
+import time
+from typing import Callable, Optional
+
+
+class CancellationToken:
+    """Flag shared between the UI and a worker, the worker checks it between units of work
+       and stops early, returning what it has so far."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+class ProgressTracker:
+    """Count finished items and report (current_name, done, total, eta_seconds) to a callback.
+       The ETA is the average time per finished item times the items left, None until one is done."""
+
+    def __init__(self, total: int, callback: Optional[Callable] = None):
+        self.total = total
+        self.callback = callback
+        self.done = 0
+        self.started_at = time.monotonic()
+
+    def eta(self) -> Optional[float]:
+        if not self.done:
+            return None
+        elapsed = time.monotonic() - self.started_at
+        return elapsed / self.done * (self.total - self.done)
+
+    def starting(self, current_name: str):
+        """Report the item that is about to be processed."""
+        if self.callback:
+            self.callback(current_name, self.done, self.total, self.eta())
+
+    def finished(self, current_name: str):
+        self.done += 1
+        if self.callback:
+            self.callback(current_name, self.done, self.total, self.eta())
@@ -1,9 +1,72 @@
 import os
+import sys
 import json
 from tkinter import messagebox
 from modules.utils.logging_utils import log_message
 
-BASE_DIR_DEFAULT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Folder with config.json, dictionary.json and the cache, the same one main.py uses
+if getattr(sys, 'frozen', False):
+    BASE_DIR_DEFAULT = os.path.dirname(sys.executable)  # Main.exe location
+else:
+    BASE_DIR_DEFAULT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keys that can be added to config.json by hand, they are not edited in the settings window
+OPTIONAL_CONFIG_KEYS = ['RESULT_SPILL_THRESHOLD', 'MATCHING_PROFILE']
+
+REQUIRED_CONFIG_KEYS = ['DESTINATION_CONFIG', 'DESTINATION_PATH', 'SIMILARITY_THRESHOLD', 'EXTENSIONS_CHECK']
+REQUIRED_DICTIONARY_KEYS = ['ALIAS', 'SETTINGS']
+
+
+def normalize_config(config_data):
+    """Return the config values the application uses from the raw config.json data."""
+    return {
+        'DESTINATION_CONFIG': {
+            'XXMI_path': config_data['DESTINATION_CONFIG']['XXMI_path'],
+        },
+        'DESTINATION_PATH': config_data['DESTINATION_PATH'],
+        'SIMILARITY_THRESHOLD': {
+            'HIGH_CONFIDENCE': int(config_data['SIMILARITY_THRESHOLD']['HIGH_CONFIDENCE']),
+            'MEDIUM_CONFIDENCE': int(config_data['SIMILARITY_THRESHOLD']['MEDIUM_CONFIDENCE']),
+        },
+        'EXTENSIONS_CHECK': {
+            'extensions': ', '.join(ext.strip() for ext in config_data.get('EXTENSIONS_CHECK', {}).get('extensions', '').split(',') if ext.strip())
+        },
+        **{key: config_data[key] for key in OPTIONAL_CONFIG_KEYS if key in config_data}
+    }
+
+
+def read_json_file(file_path, required_keys, description):
+    if not os.path.isfile(file_path):
+        raise ValueError(f"{description} file '{file_path}' not found.")
+    try:
+        with open(file_path, 'r') as json_file:
+            data = json.load(json_file)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"{description} file '{file_path}' could not be read: {e}")
+    if not isinstance(data, dict) or not all(key in data for key in required_keys):
+        raise ValueError(f"{description} file '{file_path}' is invalid, it needs the keys {', '.join(required_keys)}.")
+    return data
+
+
+def read_config(config_file):
+    """Load config.json for code without a window. Raise ValueError when the file is missing or
+       invalid, nothing is shown and nothing is deleted."""
+    config_data = read_json_file(config_file, REQUIRED_CONFIG_KEYS, "Config")
+    try:
+        return normalize_config(config_data)
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Config file '{config_file}' is invalid: {e!r}")
+
+
+def read_dictionary(dictionary_file):
+    """Load dictionary.json for code without a window. Raise ValueError when the file is missing or
+       invalid, the default dictionary is not written over it."""
+    dictionary_data = read_json_file(dictionary_file, REQUIRED_DICTIONARY_KEYS, "Dictionary")
+    return {
+        'ALIAS': dictionary_data['ALIAS'],
+        'SETTINGS': dictionary_data['SETTINGS'],
+    }
+
 
 class ConfigUtils:
     def __init__(self, base_dir=BASE_DIR_DEFAULT, config_file='config.json', dictionary_file='dictionary.json'):
@@ -34,19 +97,7 @@ class ConfigUtils:
                 return None  # Return None for invalid config
 
             # Return all config data
-            return {
-                'DESTINATION_CONFIG': {
-                    'XXMI_path': config_data['DESTINATION_CONFIG']['XXMI_path'],
-                },
-                'DESTINATION_PATH': config_data['DESTINATION_PATH'],
-                'SIMILARITY_THRESHOLD': {
-                    'HIGH_CONFIDENCE': int(config_data['SIMILARITY_THRESHOLD']['HIGH_CONFIDENCE']),
-                    'MEDIUM_CONFIDENCE': int(config_data['SIMILARITY_THRESHOLD']['MEDIUM_CONFIDENCE']),
-                },
-                'EXTENSIONS_CHECK': {
-                    'extensions': ', '.join(ext.strip() for ext in config_data.get('EXTENSIONS_CHECK', {}).get('extensions', '').split(',') if ext.strip())
-                }
-            }
+            return normalize_config(config_data)
         except Exception as e:
             log_message(f"Error loading config from '{self.config_file}': {e}")
             messagebox.showerror("Failed Read Config File", "The config file is invalid. Please delete the file to setup a new config.")
@@ -55,8 +106,7 @@ class ConfigUtils:
 
     def validate_config(self, config_data):
         """Validate the format of the config data."""
-        required_keys = ['DESTINATION_CONFIG', 'DESTINATION_PATH', 'SIMILARITY_THRESHOLD', 'EXTENSIONS_CHECK']
-        return all(key in config_data for key in required_keys)
+        return all(key in config_data for key in REQUIRED_CONFIG_KEYS)
 
     def key_exists_in_destination_path(self, key):
         """Check if the specified key exists in DESTINATION_PATH."""
@@ -145,6 +195,20 @@ class ConfigUtils:
                 'EXTENSIONS_CHECK': config_data.get('EXTENSIONS_CHECK', [])
             }
 
+            # Keep hand-written optional keys that the settings window does not know about
+            existing_config = {}
+            if os.path.isfile(self.config_file):
+                try:
+                    with open(self.config_file, 'r') as configfile:
+                        existing_config = json.load(configfile)
+                except ValueError:
+                    log_message(f"Existing config '{self.config_file}' could not be read, optional keys are not kept.")
+            for key in OPTIONAL_CONFIG_KEYS:
+                if key in config_data:
+                    config_to_save[key] = config_data[key]
+                elif key in existing_config:
+                    config_to_save[key] = existing_config[key]
+
             # Write the configuration data to the JSON file
             with open(self.config_file, 'w') as configfile:
                 json.dump(config_to_save, configfile, indent=4)
@@ -195,8 +259,7 @@ class ConfigUtils:
 
     def validate_dictionary(self, dictionary_data):
         """Validate the format of the dictionary data."""
-        required_keys = ['ALIAS', 'SETTINGS']
-        return all(key in dictionary_data for key in required_keys)
+        return all(key in dictionary_data for key in REQUIRED_DICTIONARY_KEYS)
 
 
     def set_default_dictionary(self):
@@ -0,0 +1,228 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+from modules.utils.cancellation import CancellationToken
+from modules.utils.config_utils import BASE_DIR_DEFAULT
+from modules.utils.logging_utils import log_message
+from modules.utils.scheduler import get_scheduler
+from modules.utils.storage_profile import get_concurrency_tuner, get_device_slots
+
+# Cache of file digests and folder fingerprints, in the application folder wherever it is started from
+CACHE_DIRECTORY = os.path.join(BASE_DIR_DEFAULT, 'cache')
+FINGERPRINT_CACHE_FILE = 'fingerprints.json'
+HASH_CHUNK_SIZE = 1024 * 1024
+DEFAULT_HASH_WORKERS = 4
+
+
+def scan_folder(folder_path: str) -> List[Tuple[str, int, int]]:
+    """Return (relative path, size, mtime_ns) for every file in a folder, sorted by path."""
+    entries = []
+    pending = [folder_path]
+    while pending:
+        current = pending.pop()
+        try:
+            with os.scandir(current) as iterator:
+                for entry in iterator:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        relative_path = os.path.relpath(entry.path, folder_path).replace(os.sep, '/')
+                        entries.append((relative_path, stat.st_size, stat.st_mtime_ns))
+        except OSError as e:
+            log_message(f"Error scanning '{current}': {e}")
+    entries.sort()
+    return entries
+
+
+def hash_file(file_path: str) -> str:
+    """Return the BLAKE2b digest of a file's content."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FingerprintCache:
+    """Merkle-style content fingerprints of mod folders, cached by file stats.
+       File digests are reused while size and mtime are unchanged, so only new
+       or modified files are hashed again."""
+
+    def __init__(self, cache_directory: str = CACHE_DIRECTORY, max_workers: int = DEFAULT_HASH_WORKERS):
+        self.cache_path = os.path.join(cache_directory, FINGERPRINT_CACHE_FILE)
+        self.max_workers = max_workers
+        self.files = {}  # Absolute path -> [size, mtime_ns, digest]
+        self.folders = {}  # Folder path -> [stat signature, fingerprint]
+        self.pruned_files = set()  # Entries dropped on load, not merged back from the file on save
+        self.pruned_folders = set()
+        self._lock = threading.Lock()
+        self.load()
+
+    def read_cache_file(self) -> Tuple[dict, dict]:
+        if not os.path.isfile(self.cache_path):
+            return {}, {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as cache_file:
+                cache_data = json.load(cache_file)
+            return cache_data.get('files', {}), cache_data.get('folders', {})
+        except Exception as e:
+            log_message(f"Error loading fingerprint cache '{self.cache_path}': {e}")
+            return {}, {}
+
+    def load(self):
+        """Read the cache file, entries of files and folders that no longer exist are dropped
+           and stay out of the file from the next save on."""
+        files, folders = self.read_cache_file()
+        self.files = {path: entry for path, entry in files.items() if os.path.isfile(path)}
+        self.folders = {path: entry for path, entry in folders.items() if os.path.isdir(path)}
+        removed = len(files) + len(folders) - len(self.files) - len(self.folders)
+        if removed:
+            log_message(f"Dropped {removed} fingerprint cache entries of deleted files and folders.")
+            self.pruned_files = set(files) - set(self.files)
+            self.pruned_folders = set(folders) - set(self.folders)
+
+    def save(self):
+        """Write the cache atomically. Entries another process saved in the meantime are merged in
+           first, the entries of this cache win."""
+        with _save_lock:
+            disk_files, disk_folders = self.read_cache_file()
+            with self._lock:
+                for path in self.pruned_files:
+                    disk_files.pop(path, None)
+                for path in self.pruned_folders:
+                    disk_folders.pop(path, None)
+                disk_files.update(self.files)
+                disk_folders.update(self.folders)
+                self.files, self.folders = disk_files, disk_folders
+                cache_data = {'files': dict(self.files), 'folders': dict(self.folders)}
+            temp_path = None
+            try:
+                cache_directory = os.path.dirname(self.cache_path) or '.'
+                os.makedirs(cache_directory, exist_ok=True)
+                # A private temp file, two savers never write into the same one
+                temp_fd, temp_path = tempfile.mkstemp(prefix=f"{FINGERPRINT_CACHE_FILE}.", suffix=".tmp", dir=cache_directory)
+                with os.fdopen(temp_fd, 'w', encoding='utf-8') as cache_file:
+                    json.dump(cache_data, cache_file)
+                os.replace(temp_path, self.cache_path)
+            except Exception as e:
+                log_message(f"Error saving fingerprint cache '{self.cache_path}': {e}")
+                if temp_path and os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+    def file_digest(self, file_path: str, size: int, mtime_ns: int) -> str:
+        with self._lock:
+            cached = self.files.get(file_path)
+        if cached and cached[0] == size and cached[1] == mtime_ns:
+            return cached[2]
+        with get_device_slots().hold([file_path]):
+            digest = hash_file(file_path)
+        with self._lock:
+            self.files[file_path] = [size, mtime_ns, digest]
+        return digest
+
+    def fingerprint(self, folder_path: str, entries: List[Tuple[str, int, int]] = None) -> str:
+        """Return the content fingerprint of a folder, built from relative paths, sizes and content hashes."""
+        entries = entries if entries is not None else scan_folder(folder_path)
+        signature = hashlib.blake2b(repr(entries).encode('utf-8'), digest_size=16).hexdigest()
+        with self._lock:
+            cached = self.folders.get(folder_path)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        # Hash the files in parallel, unchanged files come straight from the cache. A spinning disk reads one file at a time.
+        workers = min(self.max_workers, get_concurrency_tuner().workers([folder_path]))
+        futures = get_scheduler().run_batch(
+            lambda entry: self.file_digest(os.path.join(folder_path, entry[0]), entry[1], entry[2]), entries, max_parallel=workers)
+        digests = [future.result() for future in futures]
+
+        root = hashlib.blake2b(digest_size=20)
+        for (relative_path, size, _), digest in zip(entries, digests):
+            leaf = hashlib.blake2b(f"{relative_path}\0{size}\0{digest}".encode('utf-8'), digest_size=20)
+            root.update(leaf.digest())
+        fingerprint = root.hexdigest()
+
+        with self._lock:
+            self.folders[folder_path] = [signature, fingerprint]
+        return fingerprint
+
+
+_save_lock = threading.Lock()
+_shared_cache: Optional[FingerprintCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_fingerprint_cache() -> FingerprintCache:
+    """Return the cache shared by every duplicate check, so concurrent games reuse and save one cache."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = FingerprintCache()
+        return _shared_cache
+
+
+def size_signature(entries: List[Tuple[str, int, int]]) -> Tuple[int, int]:
+    """Cheap pre-filter: two folders can only be identical with the same file count and total size."""
+    return len(entries), sum(size for _, size, _ in entries)
+
+
+def find_installed_duplicates(match_results: list, destination_folder: str, cache: FingerprintCache = None,
+                              cancel_token: Optional[CancellationToken] = None) -> Dict[str, str]:
+    """Return source path -> installed folder path for incoming mods that already exist,
+       under any folder name, in their matched destination folder. Only HIGH and MEDIUM
+       results are checked, a LOW result's destination is a guess the user still has to correct.
+       Stops between folders when cancel_token is set and returns what was found so far."""
+    cache = cache or get_fingerprint_cache()
+    duplicates = {}
+    installed_entries = {}  # Installed folder path -> scan result, each folder scanned once
+    installed_folders = {}  # Character folder -> its installed mod folders, each listed once
+
+    for result in match_results:
+        if cancel_token and cancel_token.is_cancelled:
+            log_message("Installed duplicate check cancelled.")
+            break
+        if result.category == 'LOW' or result.destination_name == "Not Found":
+            continue
+        character_folder = os.path.join(result.destination_root or destination_folder, result.destination_name)
+        if character_folder not in installed_folders:
+            try:
+                installed_folders[character_folder] = [entry.path for entry in os.scandir(character_folder) if entry.is_dir()]
+            except OSError:
+                installed_folders[character_folder] = []
+        if not installed_folders[character_folder]:
+            continue
+
+        source_entries = scan_folder(result.source_path)
+        if not source_entries:
+            continue
+        source_signature = size_signature(source_entries)
+        source_fingerprint = None
+
+        for installed_path in installed_folders[character_folder]:
+            if cancel_token and cancel_token.is_cancelled:
+                break
+            if installed_path not in installed_entries:
+                installed_entries[installed_path] = scan_folder(installed_path)
+            if size_signature(installed_entries[installed_path]) != source_signature:
+                continue
+
+            # Only folders with the same file count and total size are hashed
+            source_fingerprint = source_fingerprint or cache.fingerprint(result.source_path, source_entries)
+            if cache.fingerprint(installed_path, installed_entries[installed_path]) == source_fingerprint:
+                duplicates[result.source_path] = installed_path
+                log_message(f"'{result.source_path}' is already installed as '{installed_path}'.")
+                break
+
+    cache.save()
+    return duplicates
+
+
+def flag_installed_duplicates(match_results: list, destination_folder: str, cache: FingerprintCache = None,
+                              cancel_token: Optional[CancellationToken] = None) -> None:
+    """Set duplicate_of on every MatchResult whose content is already installed."""
+    duplicates = find_installed_duplicates(match_results, destination_folder, cache, cancel_token)
+    for result in match_results:
+        result.duplicate_of = duplicates.get(result.source_path)
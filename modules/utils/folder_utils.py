@@ -47,6 +47,16 @@ def rename_folder(old_name, new_name):
         log_message(f"Failed to rename folder from '{old_name}' to '{new_name}': {e}")
         return False
 
+def get_disabled_name(folder_name):
+    """Return the folder name with the 'DISABLED ' prefix, normalizing existing prefix variants."""
+    if folder_name.startswith("DISABLED "):
+        return folder_name
+    elif folder_name.startswith("DISABLED_") or folder_name.startswith("DISABLED-"):
+        return f"DISABLED {folder_name[9:]}"  # Replace 'DISABLED_' or 'DISABLED-' with the spaced prefix
+    elif folder_name.lower().startswith("disabled "):
+        return f"DISABLED {folder_name[9:]}"  # Normalize the case of 'disabled '
+    return f"DISABLED {folder_name}"
+
 # Example usage
 if __name__ == "__main__":
 
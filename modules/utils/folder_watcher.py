@@ -0,0 +1,224 @@
+import os
+import sys
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from stat import S_ISDIR
+from typing import Callable, Dict, List, Optional, Tuple
+from modules.utils.archive_utils import SUPPORTED_FORMATS
+from modules.utils.logging_utils import log_message
+
+STABLE_SECONDS = 2.0  # An archive is complete once its size did not change for this long
+POLL_INTERVAL = 2.0  # Seconds between scans when inotify is not available
+CHECK_INTERVAL = 0.5  # Seconds between stable-size checks while inotify waits for events
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, name length
+READ_BUFFER_SIZE = 64 * 1024
+
+
+def open_inotify(folder_path: str) -> Optional[int]:
+    """Return an inotify file descriptor watching folder_path, or None when inotify cannot be used."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(fd, os.fsencode(folder_path), WATCH_MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(error, "inotify_add_watch failed")
+        return fd
+    except (OSError, AttributeError) as e:
+        log_message(f"inotify is not available for '{folder_path}', polling instead: {e}")
+        return None
+
+
+def parse_inotify_events(data: bytes) -> List[Tuple[int, str]]:
+    """Split a buffer read from an inotify descriptor into (mask, name) pairs."""
+    events = []
+    offset = 0
+    while offset + EVENT_HEADER.size <= len(data):
+        _, mask, _, name_length = EVENT_HEADER.unpack_from(data, offset)
+        offset += EVENT_HEADER.size
+        name = os.fsdecode(data[offset:offset + name_length].rstrip(b'\0'))
+        offset += name_length
+        events.append((mask, name))
+    return events
+
+
+def is_watched_archive(name: str) -> bool:
+    return not name.startswith('.') and name.lower().endswith(SUPPORTED_FORMATS)
+
+
+class FolderWatcher:
+    """Watch one folder on a background thread for new archives and folder changes.
+       inotify is used on Linux, other systems and failures fall back to polling the folder.
+       An archive is only reported once its size stayed the same for stable_seconds, so
+       downloads and copies that are still being written are not picked up half-done.
+       Archives that were already there when watching started are not reported."""
+
+    def __init__(self, folder_path: str, on_archives_ready: Callable[[List[str]], None], on_folders_changed: Callable[[], None],
+                 stable_seconds: float = STABLE_SECONDS, poll_interval: float = POLL_INTERVAL):
+        self.folder_path = folder_path
+        self.on_archives_ready = on_archives_ready
+        self.on_folders_changed = on_folders_changed
+        self.stable_seconds = stable_seconds
+        self.poll_interval = poll_interval
+        self.pending: Dict[str, Tuple[int, float]] = {}  # Archive path -> (size, time of the last change)
+        self.stop_event = threading.Event()
+        self.initial_snapshot: Dict[str, Tuple[bool, int, int]] = {}
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self):
+        # Taken before the thread starts so archives that arrive while it sets up are still reported
+        self.initial_snapshot = self.scan()
+        self.thread = threading.Thread(target=self.run, daemon=True, name="folder-watcher")
+        self.thread.start()
+
+    def stop(self):
+        """Stop watching, the thread ends within one check interval."""
+        self.stop_event.set()
+
+    def run(self):
+        fd = open_inotify(self.folder_path)
+        try:
+            if fd is None:
+                self.watch_by_polling()
+            else:
+                log_message(f"Watching '{self.folder_path}' with inotify.")
+                self.watch_with_inotify(fd)
+        except Exception as e:
+            log_message(f"Watching '{self.folder_path}' stopped: {e}")
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def watch_with_inotify(self, fd: int):
+        snapshot = self.scan()
+        if self.apply_snapshot(self.initial_snapshot, snapshot):
+            self.on_folders_changed()
+        while not self.stop_event.is_set():
+            readable, _, _ = select.select([fd], [], [], CHECK_INTERVAL)
+            if readable:
+                try:
+                    data = os.read(fd, READ_BUFFER_SIZE)
+                except BlockingIOError:
+                    data = b''
+                folders_changed = False
+                for mask, name in parse_inotify_events(data):
+                    if mask & IN_Q_OVERFLOW:
+                        # Events were dropped, compare with a fresh listing instead
+                        new_snapshot = self.scan()
+                        folders_changed |= self.apply_snapshot(snapshot, new_snapshot)
+                        snapshot = new_snapshot
+                    elif mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                        log_message(f"Watched folder '{self.folder_path}' was removed or moved, watching stopped.")
+                        return
+                    elif mask & IN_ISDIR:
+                        folders_changed |= not name.startswith('.')
+                    elif is_watched_archive(name):
+                        path = os.path.join(self.folder_path, name)
+                        if mask & (IN_DELETE | IN_MOVED_FROM):
+                            self.pending.pop(path, None)
+                        else:
+                            self.note_archive(path)
+                    # Keep the snapshot current, an overflow rescan must not queue archives that were already handled
+                    if name:
+                        self.update_snapshot_entry(snapshot, name)
+                if folders_changed:
+                    self.on_folders_changed()
+            self.report_ready_archives()
+
+    def watch_by_polling(self):
+        log_message(f"Watching '{self.folder_path}' by polling every {self.poll_interval} seconds.")
+        snapshot = self.initial_snapshot
+        while not self.stop_event.wait(self.poll_interval):
+            new_snapshot = self.scan()
+            if self.apply_snapshot(snapshot, new_snapshot):
+                self.on_folders_changed()
+            snapshot = new_snapshot
+            self.report_ready_archives()
+
+    def scan(self) -> Dict[str, Tuple[bool, int, int]]:
+        """Return name -> (is folder, size, modification time) for the visible entries of the folder."""
+        entries = {}
+        try:
+            with os.scandir(self.folder_path) as scanner:
+                for entry in scanner:
+                    if entry.name.startswith('.'):
+                        continue
+                    try:
+                        stat = entry.stat()
+                        entries[entry.name] = (entry.is_dir(), stat.st_size, stat.st_mtime_ns)
+                    except OSError:
+                        continue
+        except OSError as e:
+            log_message(f"Failed to scan watched folder '{self.folder_path}': {e}")
+        return entries
+
+    def update_snapshot_entry(self, snapshot: Dict[str, Tuple[bool, int, int]], name: str):
+        if name.startswith('.'):
+            return
+        try:
+            entry_stat = os.stat(os.path.join(self.folder_path, name))
+        except OSError:
+            snapshot.pop(name, None)
+            return
+        snapshot[name] = (S_ISDIR(entry_stat.st_mode), entry_stat.st_size, entry_stat.st_mtime_ns)
+
+    def apply_snapshot(self, old: Dict[str, Tuple[bool, int, int]], new: Dict[str, Tuple[bool, int, int]]) -> bool:
+        """Queue new or changed archives and return whether folders were added or removed."""
+        for name, (is_dir, size, mtime) in new.items():
+            if not is_dir and is_watched_archive(name) and old.get(name) != (is_dir, size, mtime):
+                self.note_archive(os.path.join(self.folder_path, name))
+        for name in old.keys() - new.keys():
+            self.pending.pop(os.path.join(self.folder_path, name), None)
+        old_folders = {name for name, entry in old.items() if entry[0]}
+        new_folders = {name for name, entry in new.items() if entry[0]}
+        return old_folders != new_folders
+
+    def note_archive(self, path: str):
+        """Remember activity on an archive, it is reported after stable_seconds without change."""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        self.pending[path] = (size, time.monotonic())
+
+    def report_ready_archives(self):
+        now = time.monotonic()
+        ready = []
+        for path, (size, last_change) in list(self.pending.items()):
+            try:
+                current_size = os.path.getsize(path)
+            except OSError:
+                del self.pending[path]
+                continue
+            if current_size != size:
+                self.pending[path] = (current_size, now)
+            elif now - last_change >= self.stable_seconds:
+                del self.pending[path]
+                ready.append(path)
+        if ready:
+            log_message(f"New archives ready in '{self.folder_path}': {[os.path.basename(path) for path in ready]}")
+            self.on_archives_ready(ready)
@@ -0,0 +1,178 @@
+import os
+import uuid
+import shutil
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from modules.utils.logging_utils import log_message
+from modules.utils.scheduler import get_scheduler
+from modules.utils.storage_profile import existing_ancestor, get_concurrency_tuner, get_device_slots
+
+COPY_CHUNK_SIZE = 64 * 1024 * 1024  # Bytes handed to the kernel per copy_file_range call
+
+
+def is_same_device(source: str, destination: str) -> bool:
+    """Check if source and destination live on the same filesystem, so a rename is enough."""
+    try:
+        return os.stat(source).st_dev == os.stat(existing_ancestor(destination)).st_dev
+    except OSError:
+        return False
+
+
+def copy_file_offloaded(source: str, destination: str) -> str:
+    """Copy a file letting the kernel move the data (copy_file_range, then sendfile through shutil)."""
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(source, 'rb') as source_file, open(destination, 'wb') as destination_file:
+                remaining = os.fstat(source_file.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(source_file.fileno(), destination_file.fileno(), min(remaining, COPY_CHUNK_SIZE))
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                shutil.copystat(source, destination)
+                return destination
+        except OSError:
+            pass  # Not supported for this filesystem pair, fall back below
+
+    # shutil uses sendfile on Linux and CopyFile2 on Windows
+    return shutil.copy2(source, destination)
+
+
+def move_tree(source: str, destination: str, same_device: bool = None, copy_function: Callable = copy_file_offloaded) -> str:
+    """Move a folder and return "MOVED", "DUPLICATE" or "FAILED".
+       copy_function(source, destination) copies each file of a cross-device move."""
+    if not os.path.isdir(source):
+        log_message(f"Source folder '{source}' does not exist.")
+        return "FAILED"
+    if os.path.exists(destination):
+        log_message(f"Destination '{destination}' already exists.")
+        return "DUPLICATE"
+
+    if same_device is None:
+        same_device = is_same_device(source, destination)
+
+    if same_device:
+        try:
+            # Metadata-only operation, no data is copied. shutil.move created missing parents, so does this
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            os.rename(source, destination)
+        except Exception as e:
+            log_message(f"Failed to move folder from '{source}' to '{destination}': {e}")
+            return "FAILED"
+        log_message(f"Moved folder from '{source}' to '{destination}' (rename).")
+        return "MOVED"
+
+    # Copy next to the destination under a name nobody else uses and rename it into place once complete,
+    # so a failure only ever removes this call's own partial copy
+    partial_path = f"{destination}.partial-{uuid.uuid4().hex}"
+    try:
+        shutil.copytree(source, partial_path, copy_function=copy_function)
+        if os.path.exists(destination):
+            # Created by someone else while copying, a rename could replace it if it is an empty folder
+            log_message(f"Destination '{destination}' appeared while copying.")
+            shutil.rmtree(partial_path, ignore_errors=True)
+            return "DUPLICATE"
+        os.rename(partial_path, destination)
+    except Exception as e:
+        log_message(f"Failed to move folder from '{source}' to '{destination}': {e}")
+        # The source is still complete at this point
+        shutil.rmtree(partial_path, ignore_errors=True)
+        return "FAILED"
+
+    try:
+        shutil.rmtree(source)
+    except OSError as e:
+        # The copy is complete and in place, only the cleanup of the source failed
+        log_message(f"Copied '{source}' to '{destination}' but could not remove the source: {e}")
+    log_message(f"Moved folder from '{source}' to '{destination}' (copy).")
+    return "MOVED"
+
+
+class MoveExecutor:
+    """Move many folders at once. Same-device moves are single renames, cross-device
+       moves are copied by at most max_workers threads of the shared scheduler. Without max_workers
+       the count comes from the storage the folders are on and is tuned from the measured copy speed."""
+
+    def __init__(self, max_workers: Optional[int] = None, progress_callback: Callable = None, journal=None, journal_op: str = "move"):
+        self.max_workers = max_workers
+        # progress_callback(done, total, source, destination, status), called from worker threads
+        self.progress_callback = progress_callback
+        # Optional MoveJournal, every operation is recorded before and after it runs
+        self.journal = journal
+        self.journal_op = journal_op
+        self._lock = threading.Lock()
+
+    def _move(self, source: str, destination: str, same_device: bool, copy_function: Callable = copy_file_offloaded) -> str:
+        """Move one folder, recording it in the journal when there is one."""
+        if self.journal is None:
+            return move_tree(source, destination, same_device, copy_function)
+        sequence = self.journal.record_intent(source, destination, self.journal_op)
+        status = "FAILED"
+        try:
+            status = move_tree(source, destination, same_device, copy_function)
+        finally:
+            self.journal.record_done(sequence, status)
+        return status
+
+    def execute(self, moves: List[Tuple[str, str]]) -> Dict[str, list]:
+        """Run all (source, destination) moves and return the summary dict used by the UI."""
+        summary = {'moved': [], 'failed': [], 'duplicates': []}
+        total = len(moves)
+        done = 0
+
+        def record(source, destination, status):
+            nonlocal done
+            with self._lock:
+                done += 1
+                if status == "MOVED":
+                    summary['moved'].append((source, destination))
+                elif status == "DUPLICATE":
+                    summary['duplicates'].append((source, destination))
+                else:
+                    summary['failed'].append((source, destination))
+                if self.progress_callback:
+                    self.progress_callback(done, total, source, destination, status)
+
+        # Renames are cheap and run inline, only real copies go to the pool
+        cross_device_moves = []
+        for source, destination in moves:
+            if is_same_device(source, destination):
+                record(source, destination, self._move(source, destination, True))
+            else:
+                cross_device_moves.append((source, destination))
+
+        if cross_device_moves:
+            tuner = get_concurrency_tuner()
+            storage_paths = {os.path.dirname(path) for move in cross_device_moves for path in move}
+            workers = self.max_workers or tuner.workers(storage_paths)
+            log_message(f"Copying {len(cross_device_moves)} folders across devices with {workers} workers.")
+            bytes_copied = 0
+
+            def counting_copy(source, destination):
+                # Sizes are taken from the files as they are copied, the source is not walked twice
+                nonlocal bytes_copied
+                copied_path = copy_file_offloaded(source, destination)
+                size = os.path.getsize(copied_path)
+                with self._lock:
+                    bytes_copied += size
+                return copied_path
+
+            def copy_move(move):
+                source, destination = move
+                try:
+                    # Batches running alongside share the devices' slots, a spinning disk still copies one folder at a time
+                    with get_device_slots().hold([os.path.dirname(source), os.path.dirname(destination)]):
+                        status = self._move(source, destination, False, counting_copy)
+                except Exception as e:
+                    log_message(f"Failed to move folder from '{source}' to '{destination}': {e}")
+                    status = "FAILED"
+                record(source, destination, status)
+
+            started_at = time.monotonic()
+            get_scheduler().run_batch(copy_move, cross_device_moves, max_parallel=workers)
+            if not self.max_workers:
+                tuner.record(storage_paths, workers, bytes_copied, time.monotonic() - started_at)
+
+        return summary
@@ -0,0 +1,140 @@
+import os
+import json
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from modules.utils.logging_utils import log_message
+from modules.utils.move_executor import MoveExecutor
+
+# Journal files live next to the logs folder, one append-only file per run
+JOURNAL_DIRECTORY = 'journal'
+FSYNC_BATCH_SIZE = 32  # Records handed to the OS before the journal is forced to disk
+
+
+class MoveJournal:
+    """Append-only write-ahead journal of the renames and moves of one processing run.
+       An 'intent' record is written before each operation and a 'done' record after it,
+       so a run can be reverted even after a crash or an app restart.
+       The file is created with the first record, a run that moved nothing leaves no journal."""
+
+    def __init__(self, run_id: str = None, journal_directory: str = JOURNAL_DIRECTORY):
+        self.journal_directory = journal_directory
+        self.run_id = run_id or datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        self.path = os.path.join(journal_directory, f"run-{self.run_id}.jsonl")
+        # Continue the numbering when an existing run is reopened, e.g. to revert it
+        self._sequence = max((operation['seq'] for operation in read_journal(self.path)), default=0) if os.path.isfile(self.path) else 0
+        self._file = None
+        self._lock = threading.Lock()
+        self._unsynced = 0
+
+    @classmethod
+    def reopen(cls, journal_path: str) -> 'MoveJournal':
+        """Open the journal of an existing run to append more records to it."""
+        run_id = os.path.splitext(os.path.basename(journal_path))[0][len("run-"):]
+        return cls(run_id, os.path.dirname(journal_path))
+
+    def _write(self, record: dict) -> None:
+        if self._file is None:
+            os.makedirs(self.journal_directory, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        # Every record reaches the OS at once and survives the app crashing, only the fsync is batched
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= FSYNC_BATCH_SIZE:
+            self._sync()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def record_intent(self, source: str, destination: str, op: str = "move") -> int:
+        """Record an operation before it touches the disk and return its sequence number."""
+        with self._lock:
+            self._sequence += 1
+            self._write({'seq': self._sequence, 'type': 'intent', 'op': op, 'src': source, 'dst': destination,
+                         'time': datetime.now().isoformat(timespec='seconds')})
+            return self._sequence
+
+    def record_done(self, sequence: int, status: str) -> None:
+        """Record the outcome of an operation."""
+        with self._lock:
+            self._write({'seq': sequence, 'type': 'done', 'status': status})
+
+    def close(self) -> None:
+        """Force the remaining records to disk and close the file."""
+        with self._lock:
+            if self._file is not None and not self._file.closed:
+                self._sync()
+                self._file.close()
+
+
+def read_journal(journal_path: str) -> List[dict]:
+    """Return the operations of a journal in order, with the status of their 'done' record.
+       Operations without a 'done' record (interrupted by a crash) have the status None."""
+    operations = {}
+    with open(journal_path, 'r', encoding='utf-8') as journal_file:
+        for line in journal_file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # A torn last line after a crash
+            if record.get('type') == 'intent':
+                operations[record['seq']] = dict(record, status=None)
+            elif record.get('type') == 'done' and record.get('seq') in operations:
+                operations[record['seq']]['status'] = record['status']
+    return list(operations.values())
+
+
+def pending_moves(journal_path: str) -> List[dict]:
+    """Return the moves of a run that are still applied on disk, newest first."""
+    operations = read_journal(journal_path)
+    reverted = {(operation['dst'], operation['src']) for operation in operations
+                if operation['op'] == 'revert' and operation['status'] == 'MOVED'}
+
+    moves = []
+    for operation in operations:
+        if operation['op'] != 'move' or (operation['src'], operation['dst']) in reverted:
+            continue
+        # An interrupted move counts as applied when only the destination is left
+        interrupted = operation['status'] is None and os.path.exists(operation['dst']) and not os.path.exists(operation['src'])
+        if operation['status'] == 'MOVED' or interrupted:
+            moves.append(operation)
+    return list(reversed(moves))
+
+
+def revert_run(journal_path: str, progress_callback: Callable = None) -> Dict[str, list]:
+    """Replay a run backwards in one pass, moving every folder back to its original path.
+       Return a summary dict with 'reverted' and 'failed' lists of (source, destination)."""
+    moves = pending_moves(journal_path)
+    log_message(f"Reverting {len(moves)} moves from journal '{journal_path}'.")
+
+    journal = MoveJournal.reopen(journal_path)
+    try:
+        executor = MoveExecutor(progress_callback=progress_callback, journal=journal, journal_op="revert")
+        summary = executor.execute([(move['dst'], move['src']) for move in moves])
+    finally:
+        journal.close()
+
+    return {
+        'reverted': [(source, destination) for destination, source in summary['moved']],
+        'failed': [(source, destination) for destination, source in summary['failed'] + summary['duplicates']],
+    }
+
+
+def list_runs(journal_directory: str = JOURNAL_DIRECTORY) -> List[str]:
+    """Return the journal files of all runs, newest first."""
+    if not os.path.isdir(journal_directory):
+        return []
+    journal_files = [file_name for file_name in os.listdir(journal_directory)
+                     if file_name.startswith("run-") and file_name.endswith(".jsonl")]
+    return [os.path.join(journal_directory, file_name) for file_name in sorted(journal_files, reverse=True)]
+
+
+def latest_revertible_run(journal_directory: str = JOURNAL_DIRECTORY) -> Optional[str]:
+    """Return the newest journal that still has moves to revert."""
+    for journal_path in list_runs(journal_directory):
+        if pending_moves(journal_path):
+            return journal_path
+    return None
@@ -0,0 +1,114 @@
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set
+from unidecode import unidecode
+
+NGRAM_SIZE = 3
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def normalize_name(name: str) -> str:
+    return unidecode(name).casefold()
+
+
+def ngrams(text: str) -> Set[str]:
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class NameIndex:
+    """Token and trigram index over a list of names for instant filtering.
+       Every query term must match: terms of three or more characters match anywhere in a name,
+       shorter terms match the start of a word. Only names that were added or removed since the last
+       search are indexed, and nothing is indexed until the first search, so lists that are never
+       filtered cost nothing."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}  # Name -> id
+        self.names: Dict[int, str] = {}  # Id -> name
+        self.next_id = 0
+        self.normalized: Dict[int, str] = {}
+        self.postings: Dict[str, Set[int]] = {}  # Trigram -> ids
+        self.tokens: Dict[str, Set[int]] = {}  # Word -> ids
+        self.sorted_tokens: Optional[List[str]] = None  # Built on the first short query after a change
+        self.pending_names: Optional[Set[str]] = None  # Names to index before the next search
+
+    def update(self, names: Iterable[str]):
+        """Make the index hold exactly these names, applied as a diff before the next search."""
+        self.pending_names = set(names)
+
+    def apply_pending(self):
+        names, self.pending_names = self.pending_names, None
+        if names is None:
+            return
+        for name in [name for name in self.ids if name not in names]:
+            self.remove(name)
+        for name in names:
+            if name not in self.ids:
+                self.add(name)
+
+    def add(self, name: str):
+        name_id = self.next_id
+        self.next_id += 1
+        normalized = normalize_name(name)
+        self.ids[name] = name_id
+        self.names[name_id] = name
+        self.normalized[name_id] = normalized
+        for gram in ngrams(normalized):
+            self.postings.setdefault(gram, set()).add(name_id)
+        for token in TOKEN_PATTERN.findall(normalized):
+            if token not in self.tokens:
+                self.sorted_tokens = None
+            self.tokens.setdefault(token, set()).add(name_id)
+
+    def remove(self, name: str):
+        name_id = self.ids.pop(name)
+        del self.names[name_id]
+        normalized = self.normalized.pop(name_id)
+        for gram in ngrams(normalized):
+            ids = self.postings[gram]
+            ids.discard(name_id)
+            if not ids:
+                del self.postings[gram]
+        for token in TOKEN_PATTERN.findall(normalized):
+            ids = self.tokens.get(token)
+            if ids is not None:
+                ids.discard(name_id)
+                if not ids:
+                    del self.tokens[token]
+                    self.sorted_tokens = None
+
+    def match_term(self, term: str) -> Set[int]:
+        if len(term) >= NGRAM_SIZE:
+            # Intersect the smallest posting lists first, then confirm the substring
+            posting_lists = sorted((self.postings.get(gram, set()) for gram in ngrams(term)), key=len)
+            candidates = set(posting_lists[0])
+            for ids in posting_lists[1:]:
+                candidates &= ids
+                if not candidates:
+                    break
+            return {name_id for name_id in candidates if term in self.normalized[name_id]}
+
+        # Short terms: every word that starts with the term
+        if self.sorted_tokens is None:
+            self.sorted_tokens = sorted(self.tokens)
+        matches = set()
+        index = bisect_left(self.sorted_tokens, term)
+        while index < len(self.sorted_tokens) and self.sorted_tokens[index].startswith(term):
+            matches |= self.tokens[self.sorted_tokens[index]]
+            index += 1
+        return matches
+
+    def search(self, query: str) -> Optional[Set[str]]:
+        """Return the names matching every term of the query, None for an empty query."""
+        terms = normalize_name(query).split()
+        if not terms:
+            return None
+        self.apply_pending()
+        # Longest terms are the most selective
+        terms.sort(key=len, reverse=True)
+        result = self.match_term(terms[0])
+        for term in terms[1:]:
+            if not result:
+                break
+            result &= self.match_term(term)
+        return {self.names[name_id] for name_id in result}
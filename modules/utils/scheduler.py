@@ -0,0 +1,165 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, wait
+from typing import Callable, Dict, Iterable, List, Optional
+from modules.utils.cancellation import CancellationToken
+from modules.utils.logging_utils import log_message
+from modules.utils.thread_priority import lower_current_thread_priority
+
+# Priority classes, a free slot always goes to waiting interactive work first
+INTERACTIVE = 'interactive'  # Something the user is waiting for: matching, extraction popups, moves
+BACKGROUND = 'background'  # Prefetch nobody is waiting for yet: pre-matching, watch mode
+PRIORITY_CLASSES = (INTERACTIVE, BACKGROUND)
+
+DEFAULT_MAX_WORKERS = max(2, min(8, os.cpu_count() or 2))
+DEFAULT_BACKGROUND_LIMIT = 2
+
+
+class ScheduledTask:
+    __slots__ = ('function', 'args', 'kwargs', 'future', 'cancel_token', 'name')
+
+    def __init__(self, function, args, kwargs, cancel_token, name):
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.cancel_token = cancel_token
+        self.name = name
+
+
+class Scheduler:
+    """One bounded pool for every long operation, so features running side by side cannot
+       oversubscribe CPU or disk. At most max_workers tasks run at once and each priority
+       class has its own cap on top. Background work never holds the last slot, so interactive
+       work can always start. Background workers run at idle thread priority and only start
+       when no interactive task is waiting for a slot.
+       Tasks whose cancellation token is set before they start are cancelled, not run."""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, class_limits: Optional[Dict[str, int]] = None):
+        self.max_workers = max(1, max_workers)
+        self.class_limits = {INTERACTIVE: self.max_workers, BACKGROUND: min(DEFAULT_BACKGROUND_LIMIT, self.max_workers)}
+        self.class_limits.update(class_limits or {})
+        self.pending: Dict[str, deque] = {priority: deque() for priority in PRIORITY_CLASSES}
+        self.running: Dict[str, int] = {priority: 0 for priority in PRIORITY_CLASSES}
+        self.workers: Dict[str, int] = {priority: 0 for priority in PRIORITY_CLASSES}
+        self.idle: Dict[str, int] = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._condition = threading.Condition()
+
+    def configure(self, max_workers: Optional[int] = None, class_limits: Optional[Dict[str, int]] = None):
+        """Change the limits, running tasks finish and new ones follow the new limits."""
+        with self._condition:
+            if max_workers is not None:
+                self.max_workers = max(1, max_workers)
+            for priority, limit in (class_limits or {}).items():
+                self.class_limits[priority] = max(1, limit)
+            self._condition.notify_all()
+
+    def submit(self, function: Callable, *args, priority: str = INTERACTIVE, cancel_token: Optional[CancellationToken] = None,
+               name: Optional[str] = None, **kwargs) -> Future:
+        """Queue function(*args, **kwargs) in a priority class and return its Future."""
+        if priority not in self.pending:
+            raise ValueError(f"Unknown priority class '{priority}'.")
+        task = ScheduledTask(function, args, kwargs, cancel_token, name or getattr(function, '__name__', 'task'))
+        with self._condition:
+            self.pending[priority].append(task)
+            # Workers are started on demand and stay around, idle ones are reused first
+            if self.idle[priority] < len(self.pending[priority]) and self.workers[priority] < self.limit(priority):
+                self.workers[priority] += 1
+                threading.Thread(target=self.worker, args=(priority,), daemon=True, name=f"scheduler-{priority}").start()
+            self._condition.notify_all()
+        return task.future
+
+    def run_batch(self, function: Callable, items: Iterable, priority: str = INTERACTIVE, max_parallel: Optional[int] = None,
+                  cancel_token: Optional[CancellationToken] = None) -> List[Future]:
+        """Call function(item) for every item with at most max_parallel calls at once and return one
+           finished Future per item, in item order. The calling thread works on the batch as well,
+           so a batch started from inside a scheduled task cannot wait on slots held by its own caller.
+           Items not started when cancel_token is set are cancelled."""
+        items = list(items)
+        futures = [Future() for _ in items]
+        next_item = iter(range(len(items)))
+        next_lock = threading.Lock()
+
+        def drain():
+            while True:
+                with next_lock:
+                    index = next(next_item, None)
+                if index is None:
+                    return
+                future = futures[index]
+                if cancel_token and cancel_token.is_cancelled:
+                    future.cancel()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(function(items[index]))
+                except BaseException as e:
+                    future.set_exception(e)
+
+        parallel = min(len(items), max_parallel or self.limit(priority))
+        helpers = [self.submit(drain, priority=priority, name="batch") for _ in range(parallel - 1)]
+        drain()
+        # Helpers that did not get a slot are not needed anymore, the others finish their current item
+        for helper in helpers:
+            helper.cancel()
+        wait(helpers)
+        return futures
+
+    def limit(self, priority: str) -> int:
+        """Return how many tasks of a priority class may run at once."""
+        if priority == BACKGROUND:
+            # One slot stays free for interactive work whenever there is more than one
+            return min(self.class_limits[BACKGROUND], max(1, self.max_workers - 1))
+        return self.class_limits[priority]
+
+    def can_start(self, priority: str) -> bool:
+        if not self.pending[priority] or self.running[priority] >= self.limit(priority):
+            return False
+        if sum(self.running.values()) >= self.max_workers:
+            return False
+        if priority == BACKGROUND and self.pending[INTERACTIVE] and self.running[INTERACTIVE] < self.limit(INTERACTIVE):
+            return False  # The slot is kept for the waiting interactive task
+        return True
+
+    def worker(self, priority: str):
+        if priority == BACKGROUND:
+            lower_current_thread_priority()
+        while True:
+            with self._condition:
+                self.idle[priority] += 1
+                while not self.can_start(priority):
+                    self._condition.wait()
+                self.idle[priority] -= 1
+                task = self.pending[priority].popleft()
+                self.running[priority] += 1
+            try:
+                self.run_task(task)
+            finally:
+                with self._condition:
+                    self.running[priority] -= 1
+                    self._condition.notify_all()
+
+    def run_task(self, task: ScheduledTask):
+        if task.cancel_token and task.cancel_token.is_cancelled:
+            task.future.cancel()
+        if not task.future.set_running_or_notify_cancel():
+            return
+        try:
+            task.future.set_result(task.function(*task.args, **task.kwargs))
+        except BaseException as e:
+            log_message(f"Scheduled task '{task.name}' failed: {e}")
+            task.future.set_exception(e)
+
+
+_default_scheduler: Optional[Scheduler] = None
+_default_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    """Return the scheduler shared by the whole application."""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = Scheduler()
+        return _default_scheduler
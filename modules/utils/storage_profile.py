@@ -0,0 +1,261 @@
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Tuple
+from modules.utils.logging_utils import log_message
+
+# Device classes, from slowest to fastest for parallel I/O
+HDD = 'hdd'
+NETWORK = 'network'
+UNKNOWN = 'unknown'
+SSD = 'ssd'
+NVME = 'nvme'
+CLASS_ORDER = (HDD, NETWORK, UNKNOWN, SSD, NVME)
+
+# Parallel extractions, copies or hashing per device class. A spinning disk gets exactly one,
+# parallel streams make its head seek between files and every stream slower.
+DEFAULT_WORKERS = {HDD: 1, NETWORK: 2, UNKNOWN: 2, SSD: 3, NVME: 4}
+MAX_WORKERS = {HDD: 1, NETWORK: 4, UNKNOWN: 4, SSD: 4, NVME: 8}
+
+NETWORK_FILESYSTEMS = {'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', '9p', 'ceph', 'glusterfs', 'davfs',
+                       'fuse.sshfs', 'fuse.rclone', 'fuse.glusterfs', 'afs', 'lustre'}
+MEMORY_FILESYSTEMS = {'tmpfs', 'ramfs'}
+MOUNTINFO_PATH = '/proc/self/mountinfo'
+SYS_BLOCK_PATH = '/sys/dev/block'
+
+MIN_SAMPLE_BYTES = 32 * 1024 * 1024  # Smaller runs say more about latency than throughput
+MIN_SAMPLE_SECONDS = 0.5
+IMPROVEMENT_FACTOR = 1.1  # One more worker is kept only when it is at least this much faster
+SLOWDOWN_FACTOR = 0.7  # A settled worker count is lowered when throughput drops below this share of the best
+
+
+def existing_ancestor(path: str) -> str:
+    """Return the closest existing directory of a path, for device checks of future paths."""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def unescape_mountinfo(field: str) -> str:
+    # Spaces, tabs, newlines and backslashes in mount paths are written as octal escapes
+    return field.replace('\\040', ' ').replace('\\011', '\t').replace('\\012', '\n').replace('\\134', '\\')
+
+
+def read_mount(device_id: int) -> Optional[Tuple[str, str]]:
+    """Return (filesystem type, mount source) of the mount with the given st_dev, from mountinfo."""
+    wanted = f"{os.major(device_id)}:{os.minor(device_id)}"
+    try:
+        with open(MOUNTINFO_PATH, 'r', encoding='utf-8') as mountinfo:
+            for line in mountinfo:
+                fields = line.split()
+                if len(fields) < 3 or fields[2] != wanted or '-' not in fields:
+                    continue
+                separator = fields.index('-')
+                if len(fields) > separator + 2:
+                    return fields[separator + 1], unescape_mountinfo(fields[separator + 2])
+    except OSError:
+        pass
+    return None
+
+
+def block_device_class(major: int, minor: int) -> Tuple[str, str]:
+    """Return (device class, device name) of a block device from sysfs. Partitions are
+       looked up through their parent disk, which carries the queue settings."""
+    device_path = os.path.realpath(os.path.join(SYS_BLOCK_PATH, f"{major}:{minor}"))
+    if not os.path.isdir(os.path.join(device_path, 'queue')):
+        device_path = os.path.dirname(device_path)
+    device_name = os.path.basename(device_path)
+    try:
+        with open(os.path.join(device_path, 'queue', 'rotational'), 'r') as rotational_file:
+            rotational = rotational_file.read().strip() == '1'
+    except OSError:
+        return UNKNOWN, device_name
+    if rotational:
+        return HDD, device_name
+    return (NVME if device_name.startswith('nvme') else SSD), device_name
+
+
+def detect_device_class(device_id: int) -> str:
+    """Classify the storage behind a st_dev as nvme, ssd, hdd, network or unknown.
+       Only Linux exposes what is needed, other systems are always unknown."""
+    if not sys.platform.startswith('linux'):
+        return UNKNOWN
+    mount = read_mount(device_id)
+    if mount is None:
+        return UNKNOWN
+    filesystem, source = mount
+    if filesystem in NETWORK_FILESYSTEMS or source.startswith('//'):
+        return NETWORK
+    if filesystem in MEMORY_FILESYSTEMS:
+        return NVME
+    major, minor = os.major(device_id), os.minor(device_id)
+    if major == 0:
+        # btrfs and other filesystems report an anonymous device, the mount source is the real disk
+        try:
+            source_device = os.stat(source).st_rdev if source.startswith('/dev/') else 0
+        except OSError:
+            source_device = 0
+        if not source_device:
+            return UNKNOWN
+        major, minor = os.major(source_device), os.minor(source_device)
+    device_class, _ = block_device_class(major, minor)
+    return device_class
+
+
+_device_classes: Dict[int, str] = {}
+_device_lock = threading.Lock()
+
+
+def device_id_of(path: str) -> Optional[int]:
+    try:
+        return os.stat(existing_ancestor(path)).st_dev
+    except OSError:
+        return None
+
+
+def device_class_of(path: str) -> str:
+    """Return the device class of the filesystem a path lives on, detected once per device."""
+    device_id = device_id_of(path)
+    if device_id is None:
+        return UNKNOWN
+    with _device_lock:
+        device_class = _device_classes.get(device_id)
+    if device_class is None:
+        device_class = detect_device_class(device_id)
+        with _device_lock:
+            _device_classes[device_id] = device_class
+        log_message(f"Storage for '{path}' detected as {device_class}.")
+    return device_class
+
+
+def slowest_class(paths: Iterable[str]) -> str:
+    """Return the slowest device class among the paths, the one that limits a transfer between them."""
+    classes = [device_class_of(path) for path in paths if path]
+    return min(classes, key=CLASS_ORDER.index) if classes else UNKNOWN
+
+
+class ConcurrencyTuner:
+    """Worker counts per set of devices, tuned from measured throughput.
+       A set starts at the default of its slowest device class, then tries one more worker
+       after every run that was faster than the best so far and goes back to the best count
+       once adding a worker stops paying off. Sets that include a spinning disk stay at one worker."""
+
+    def __init__(self):
+        self.states: Dict[tuple, dict] = {}
+        self._lock = threading.Lock()
+
+    def state_for(self, paths: Iterable[str]) -> dict:
+        paths = [path for path in paths if path]
+        key = tuple(sorted({device_id_of(path) for path in paths} - {None}))
+        with self._lock:
+            state = self.states.get(key)
+        if state is None:
+            device_class = slowest_class(paths)
+            state = {'class': device_class, 'workers': DEFAULT_WORKERS[device_class], 'best_workers': None,
+                     'best_rate': None, 'settled': device_class == HDD}
+            with self._lock:
+                state = self.states.setdefault(key, state)
+        return state
+
+    def workers(self, paths: Iterable[str]) -> int:
+        """Return how many parallel operations to run for transfers between these paths."""
+        state = self.state_for(paths)
+        with self._lock:
+            return state['workers']
+
+    def record(self, paths: Iterable[str], workers: int, bytes_done: int, seconds: float):
+        """Report a finished run of workers parallel operations and pick the worker count for the next one."""
+        if bytes_done < MIN_SAMPLE_BYTES or seconds < MIN_SAMPLE_SECONDS:
+            return
+        state = self.state_for(paths)
+        rate = bytes_done / seconds
+        with self._lock:
+            if state['class'] == HDD or workers != state['workers']:
+                return
+            limit = MAX_WORKERS[state['class']]
+            if state['best_rate'] is None or rate > state['best_rate'] * IMPROVEMENT_FACTOR:
+                state['best_rate'], state['best_workers'] = rate, workers
+                if not state['settled'] and workers < limit:
+                    state['workers'] = workers + 1
+            elif not state['settled']:
+                state['workers'] = state['best_workers']
+                state['settled'] = True
+            elif rate < state['best_rate'] * SLOWDOWN_FACTOR and workers > 1:
+                # The device got busier than when it was measured, back off and measure again
+                state['workers'] = workers - 1
+                state['best_rate'], state['best_workers'] = rate, workers - 1
+            new_workers = state['workers']
+        if new_workers != workers:
+            log_message(f"{state['class']} storage moved {bytes_done / seconds / 1024 / 1024:.1f} MB/s with {workers} workers, "
+                        f"using {new_workers} next.")
+
+
+_tuner: Optional[ConcurrencyTuner] = None
+_tuner_lock = threading.Lock()
+
+
+def get_concurrency_tuner() -> ConcurrencyTuner:
+    """Return the tuner shared by extraction, moves and hashing."""
+    global _tuner
+    with _tuner_lock:
+        if _tuner is None:
+            _tuner = ConcurrencyTuner()
+        return _tuner
+
+
+class DeviceSlots:
+    """Limit parallel I/O per device across every batch, so two batches on the same spinning disk
+       still read one stream at a time. A device allows as many holders as the tuner's worker count
+       for it. A thread that already holds a device does not wait for it again."""
+
+    def __init__(self, tuner: Optional[ConcurrencyTuner] = None):
+        self.tuner = tuner
+        self.active: Dict[int, int] = {}
+        self._held = threading.local()
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def hold(self, paths: Iterable[str]):
+        """Wait until every device of the paths has a free slot and keep them for the with block."""
+        held = getattr(self._held, 'devices', None)
+        if held is None:
+            held = self._held.devices = set()
+        device_paths = {}
+        for path in paths:
+            device_id = device_id_of(path) if path else None
+            if device_id is not None and device_id not in held:
+                device_paths.setdefault(device_id, path)
+        tuner = self.tuner or get_concurrency_tuner()
+        limits = {device_id: tuner.workers([path]) for device_id, path in device_paths.items()}
+        with self._condition:
+            # All devices are taken at once, taking them one by one could deadlock two batches
+            while any(self.active.get(device_id, 0) >= limit for device_id, limit in limits.items()):
+                self._condition.wait()
+            for device_id in limits:
+                self.active[device_id] = self.active.get(device_id, 0) + 1
+        held.update(limits)
+        try:
+            yield
+        finally:
+            held.difference_update(limits)
+            with self._condition:
+                for device_id in limits:
+                    self.active[device_id] -= 1
+                self._condition.notify_all()
+
+
+_device_slots: Optional[DeviceSlots] = None
+
+
+def get_device_slots() -> DeviceSlots:
+    """Return the device slots shared by extraction, moves and hashing."""
+    global _device_slots
+    with _tuner_lock:
+        if _device_slots is None:
+            _device_slots = DeviceSlots()
+        return _device_slots
@@ -0,0 +1,21 @@
+import os
+import sys
+import threading
+from modules.utils.logging_utils import log_message
+
+IDLE_NICE_VALUE = 19
+THREAD_PRIORITY_IDLE = -15  # Windows SetThreadPriority value
+
+
+def lower_current_thread_priority():
+    """Run the calling thread at idle priority so background work never competes with the UI.
+       On Linux every thread has its own nice value, so only this thread is affected."""
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_PRIORITY_IDLE)
+        elif sys.platform.startswith('linux') and hasattr(os, 'setpriority'):
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), IDLE_NICE_VALUE)
+    except (OSError, AttributeError) as e:
+        log_message(f"Could not lower thread priority: {e}")
@@ -0,0 +1,34 @@
+import threading
+from typing import Callable
+from modules.utils.logging_utils import log_message
+
+DEFAULT_REFRESH_DELAY_MS = 150
+
+
+class RefreshCoalescer:
+    """Collect refresh requests from any thread and run each refresh at most once per window.
+       Requests only set a flag, the refresh itself always runs on the Tk main thread."""
+
+    def __init__(self, root, callback: Callable[[], None], delay_ms: int = DEFAULT_REFRESH_DELAY_MS):
+        self.root = root
+        self.callback = callback
+        self.delay_ms = delay_ms
+        self._pending = False
+        self._lock = threading.Lock()
+        self.root.after(self.delay_ms, self._drain)
+
+    def request(self):
+        """Ask for a refresh, safe to call from worker threads."""
+        with self._lock:
+            self._pending = True
+
+    def _drain(self):
+        with self._lock:
+            pending = self._pending
+            self._pending = False
+        if pending:
+            try:
+                self.callback()
+            except Exception as e:
+                log_message(f"Error while refreshing lists: {e}")
+        self.root.after(self.delay_ms, self._drain)
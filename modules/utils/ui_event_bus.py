@@ -0,0 +1,56 @@
+import queue
+import threading
+from tkinter import messagebox
+from typing import Callable, Hashable
+from modules.utils.logging_utils import log_message
+
+DEFAULT_DRAIN_INTERVAL_MS = 50
+MAX_EVENTS_PER_DRAIN = 200  # Keeps one drain short when a worker floods the queue
+
+
+class UIEventBus:
+    """Queue between worker threads and Tk. Workers post callbacks that are run on the main
+       thread by a root.after loop, so posting never waits for rendering."""
+
+    def __init__(self, root, interval_ms: int = DEFAULT_DRAIN_INTERVAL_MS):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.events = queue.SimpleQueue()
+        self.latest = {}  # Key -> newest (callback, args, kwargs) of a coalesced event
+        self._lock = threading.Lock()
+        self.root.after(self.interval_ms, self._drain)
+
+    def post(self, callback: Callable, *args, **kwargs):
+        """Run callback(*args, **kwargs) on the main thread, in posting order."""
+        self.events.put((callback, args, kwargs))
+
+    def post_latest(self, key: Hashable, callback: Callable, *args, **kwargs):
+        """Like post, but only the newest event of a key is run, for progress updates
+           that are posted faster than they can be drawn."""
+        with self._lock:
+            already_queued = key in self.latest
+            self.latest[key] = (callback, args, kwargs)
+        if not already_queued:
+            self.events.put((self._run_latest, (key,), {}))
+
+    def show_message(self, kind: str, title: str, message: str):
+        """Post a messagebox, kind is one of 'showinfo', 'showwarning' or 'showerror'."""
+        self.post(getattr(messagebox, kind), title, message)
+
+    def _run_latest(self, key):
+        with self._lock:
+            callback, args, kwargs = self.latest.pop(key)
+        callback(*args, **kwargs)
+
+    def _drain(self):
+        for _ in range(MAX_EVENTS_PER_DRAIN):
+            try:
+                callback, args, kwargs = self.events.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args, **kwargs)
+            except Exception as e:
+                # A widget may already be destroyed when its update arrives
+                log_message(f"Error while running UI event {getattr(callback, '__name__', callback)}: {e}")
+        self.root.after(self.interval_ms, self._drain)
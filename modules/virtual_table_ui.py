@@ -0,0 +1,320 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+SLOT_PREFIX = "slot"
+SELECT_EVENT = "<<TableSelect>>"
+SORT_MARKERS = {False: " ▲", True: " ▼"}
+
+
+def sort_key(value):
+    """Sort numbers (also '95.00%' style text) numerically and everything else case-insensitively."""
+    if isinstance(value, (int, float)):
+        return (0, value, '')
+    text = str(value)
+    try:
+        return (0, float(text.rstrip('%')), '')
+    except ValueError:
+        return (1, 0, text.casefold())
+
+
+class VirtualTable(ttk.Frame):
+    """Table whose rows live in a Python model, only the rows that fit on screen exist in the Treeview.
+       Rows are addressed by a key chosen by the caller, sorting and filtering happen in the model,
+       so opening, scrolling or sorting costs the same for ten rows or a hundred thousand.
+       Selection changes are announced with the <<TableSelect>> virtual event on the frame."""
+
+    def __init__(self, parent, columns: Sequence[str], height: int = 10, placeholder: Optional[Tuple] = None,
+                 sortable: bool = True, selectmode: str = 'extended'):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self.placeholder = placeholder  # Values shown in a single row when the view is empty
+        self.sortable = sortable
+
+        self.rows: Dict[str, list] = {}  # Key -> row values, in insertion order
+        self.view: List[str] = []  # Keys after filtering and sorting
+        self.selected: Dict[str, bool] = {}  # Selected keys, kept while rows are scrolled out of view
+        self.filter_predicate: Optional[Callable[[str, list], bool]] = None
+        self.sort_column: Optional[str] = None
+        self.sort_reverse = False
+        self.heading_texts = {}
+        self.offset = 0
+        self.visible_count = height
+        self.anchor = None  # Key of the row keyboard navigation starts from
+        self._extend_selection = False
+        self._placeholder_shown = False
+
+        self.tree = ttk.Treeview(self, columns=self.columns, show='headings', height=height, selectmode=selectmode)
+        self.tree.pack(side=tk.LEFT, fill='both', expand=True)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill='y')
+
+        self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
+        self.tree.bind("<ButtonPress-1>", self.on_click, add="+")
+        self.tree.bind("<Configure>", self.on_configure)
+        self.tree.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_by(3))
+        for sequence, step in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "-page"), ("<Next>", "page"), ("<Home>", "home"), ("<End>", "end")):
+            self.tree.bind(sequence, lambda event, step=step: self.on_key(step))
+
+    # Column setup, same arguments as the Treeview
+
+    def column(self, column, **options):
+        return self.tree.column(column, **options)
+
+    def heading(self, column, text: str = None, **options):
+        if text is not None:
+            self.heading_texts[column] = text
+            options['text'] = text
+        if self.sortable and 'command' not in options:
+            options['command'] = lambda: self.sort_by(column)
+        return self.tree.heading(column, **options)
+
+    # Model
+
+    def set_rows(self, rows: Iterable[Tuple[str, Sequence]]):
+        """Replace every row with (key, values) pairs, keeping the selection of keys that still exist."""
+        self.rows = {key: list(values) for key, values in rows}
+        self.selected = {key: True for key in self.selected if key in self.rows}
+        self.rebuild_view()
+
+    def update_rows(self, rows: Iterable[Tuple[str, Sequence]]):
+        """Apply a new listing as a diff of the current rows: keys that are gone are deleted, new keys
+           are inserted and rows whose values changed are updated. Kept rows are not filtered again,
+           and nothing is redrawn when the listing did not change."""
+        new_rows = {key: list(values) for key, values in rows}
+        removed = [key for key in self.rows if key not in new_rows]
+        added = [key for key in new_rows if key not in self.rows]
+        changed = [key for key in new_rows if key in self.rows and self.rows[key] != new_rows[key]]
+        if not removed and not added and not changed and self.tree.get_children():
+            return
+
+        shown = set(self.view).difference(removed)
+        shown.update(key for key in added if self.filter_predicate is None or self.filter_predicate(key, new_rows[key]))
+        self.rows = new_rows  # Listing order, the unsorted view follows it
+        for key in removed:
+            self.selected.pop(key, None)
+        self.view = [key for key in self.rows if key in shown]
+        if self.sort_column is not None:
+            self.sort_view()
+        self.render()
+
+    def insert(self, key: str, values: Sequence):
+        self.rows[key] = list(values)
+        if self.filter_predicate is None or self.filter_predicate(key, self.rows[key]):
+            self.view.append(key)
+            if self.sort_column is not None:
+                self.sort_view()
+        self.render()
+
+    def delete(self, *keys):
+        for key in keys:
+            self.rows.pop(key, None)
+            self.selected.pop(key, None)
+        self.view = [key for key in self.view if key in self.rows]
+        self.render()
+
+    def exists(self, key: str) -> bool:
+        return key in self.rows
+
+    def item(self, key: str, option: str = None):
+        """Row values of a key, shaped like Treeview.item."""
+        values = tuple(self.rows[key])
+        if option == 'values':
+            return values
+        return {'values': list(values)}
+
+    def set(self, key: str, column: str, value):
+        """Change one cell, only touching the Treeview when the row is on screen."""
+        self.rows[key][self.columns.index(column)] = value
+        slot = self.slot_of(key)
+        if slot is not None:
+            self.tree.set(slot, column, value)
+
+    def get_children(self) -> Tuple[str, ...]:
+        """Keys of the rows in view order, including rows scrolled out of view."""
+        return tuple(self.view)
+
+    def set_filter(self, predicate: Optional[Callable[[str, list], bool]]):
+        """Show only rows for which predicate(key, values) is true, None shows every row."""
+        self.filter_predicate = predicate
+        self.offset = 0
+        self.rebuild_view()
+
+    def sort_by(self, column: str, reverse: bool = None):
+        """Sort the view by a column, clicking the same heading again reverses the order."""
+        if reverse is None:
+            reverse = not self.sort_reverse if column == self.sort_column else False
+        if self.sort_column is not None and self.sort_column in self.heading_texts:
+            self.tree.heading(self.sort_column, text=self.heading_texts[self.sort_column])
+        self.sort_column = column
+        self.sort_reverse = reverse
+        if column in self.heading_texts:
+            self.tree.heading(column, text=self.heading_texts[column] + SORT_MARKERS[reverse])
+        self.sort_view()
+        self.render()
+
+    def sort_view(self):
+        column_index = self.columns.index(self.sort_column)
+        self.view.sort(key=lambda key: sort_key(self.rows[key][column_index]), reverse=self.sort_reverse)
+
+    def rebuild_view(self):
+        if self.filter_predicate is None:
+            self.view = list(self.rows)
+        else:
+            self.view = [key for key, values in self.rows.items() if self.filter_predicate(key, values)]
+        if self.sort_column is not None:
+            self.sort_view()
+        self.render()
+
+    # Selection
+
+    def selection(self) -> Tuple[str, ...]:
+        return tuple(key for key in self.view if key in self.selected)
+
+    def selection_set(self, *keys):
+        if len(keys) == 1 and isinstance(keys[0], (list, tuple)):
+            keys = keys[0]
+        self.selected = {key: True for key in keys if key in self.rows}
+        self.anchor = keys[-1] if keys else None
+        self.render()
+
+    def see(self, key: str):
+        """Scroll so that the row of a key is visible."""
+        if key not in self.view:
+            return
+        index = self.view.index(key)
+        if index < self.offset:
+            self.scroll_to(index)
+        elif index >= self.offset + self.visible_count:
+            self.scroll_to(index - self.visible_count + 1)
+
+    def identify_row(self, y: int) -> str:
+        """Key of the row at a y position, '' when there is none."""
+        return self.key_of(self.tree.identify_row(y)) or ''
+
+    # Rendering of the visible window
+
+    def key_of(self, slot: str) -> Optional[str]:
+        if self._placeholder_shown or not slot.startswith(SLOT_PREFIX):
+            return None
+        index = self.offset + int(slot[len(SLOT_PREFIX):])
+        return self.view[index] if index < len(self.view) else None
+
+    def slot_of(self, key: str) -> Optional[str]:
+        if self._placeholder_shown:
+            return None
+        for index in range(self.offset, min(self.offset + self.visible_count, len(self.view))):
+            if self.view[index] == key:
+                return f"{SLOT_PREFIX}{index - self.offset}"
+        return None
+
+    def render(self):
+        """Write the rows of the visible window into a fixed set of Treeview rows."""
+        self.offset = max(0, min(self.offset, len(self.view) - self.visible_count))
+        self._placeholder_shown = not self.view and self.placeholder is not None
+        window = [] if self._placeholder_shown else self.view[self.offset:self.offset + self.visible_count]
+        needed = 1 if self._placeholder_shown else len(window)
+
+        slots = list(self.tree.get_children())
+        if len(slots) > needed:
+            self.tree.delete(*slots[needed:])
+            slots = slots[:needed]
+        while len(slots) < needed:
+            slots.append(self.tree.insert("", "end", iid=f"{SLOT_PREFIX}{len(slots)}"))
+
+        if self._placeholder_shown:
+            self.tree.item(slots[0], values=self.placeholder)
+        for slot, key in zip(slots, window):
+            self.tree.item(slot, values=self.rows[key])
+
+        selected_slots = [slot for slot, key in zip(slots, window) if key in self.selected]
+        if set(selected_slots) != set(self.tree.selection()):
+            self.tree.selection_set(selected_slots)
+        self.update_scrollbar()
+
+    def update_scrollbar(self):
+        total = len(self.view)
+        if total <= self.visible_count:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self.visible_count) / total)
+
+    def measure(self):
+        """Fit the number of Treeview rows to the widget height, using a rendered row as the ruler."""
+        slots = self.tree.get_children()
+        bbox = self.tree.bbox(slots[0]) if slots else ''
+        if not bbox:
+            return
+        header_height, row_height = bbox[1], bbox[3]
+        visible_count = max(1, (self.tree.winfo_height() - header_height) // max(1, row_height))
+        if visible_count != self.visible_count:
+            self.visible_count = visible_count
+            self.render()
+
+    def scroll_to(self, offset: int):
+        self.offset = offset
+        self.render()
+
+    def scroll_by(self, rows: int):
+        self.scroll_to(self.offset + rows)
+        return "break"
+
+    # Event handlers
+
+    def on_configure(self, event):
+        self.after_idle(self.measure)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * len(self.view)))
+        elif action == 'scroll':
+            self.scroll_by(int(amount) * (self.visible_count if unit == 'pages' else 1))
+
+    def on_mouse_wheel(self, event):
+        return self.scroll_by(-3 if event.delta > 0 else 3)
+
+    def on_click(self, event):
+        # Control or Shift keeps the selection of rows that are scrolled out of view
+        self._extend_selection = bool(event.state & 0x0005)
+
+    def on_tree_select(self, event):
+        if self._placeholder_shown:
+            return
+        window = self.view[self.offset:self.offset + self.visible_count]
+        tree_keys = [self.key_of(slot) for slot in self.tree.selection()]
+        if set(tree_keys) == {key for key in window if key in self.selected}:
+            return  # Selection written by render, nothing changed for the user
+
+        if self._extend_selection:
+            for key in window:
+                self.selected.pop(key, None)
+        else:
+            self.selected.clear()
+        for key in tree_keys:
+            if key is not None:
+                self.selected[key] = True
+        self._extend_selection = False
+        focus_key = self.key_of(self.tree.focus()) if self.tree.focus() else None
+        self.anchor = focus_key or (tree_keys[-1] if tree_keys else None)
+        self.event_generate(SELECT_EVENT)
+
+    def on_key(self, step):
+        if not self.view:
+            return "break"
+        index = self.view.index(self.anchor) if self.anchor in self.rows and self.anchor in self.view else -1
+        if step == "home":
+            index = 0
+        elif step == "end":
+            index = len(self.view) - 1
+        elif step in ("page", "-page"):
+            index += self.visible_count if step == "page" else -self.visible_count
+        else:
+            index += step
+        key = self.view[max(0, min(index, len(self.view) - 1))]
+        self.selection_set(key)
+        self.see(key)
+        self.tree.focus(self.slot_of(key))
+        self.event_generate(SELECT_EVENT)
+        return "break"
@@ -0,0 +1,91 @@
+import os
+import queue
+import threading
+from typing import Callable, List, Optional
+import modules.utils.archive_utils as archive_utils
+from modules.utils.folder_watcher import FolderWatcher
+from modules.utils.logging_utils import log_message
+from modules.utils.scheduler import BACKGROUND, get_scheduler
+from modules.utils.storage_profile import get_device_slots
+
+
+class WatchMode:
+    """Extract archives that arrive in the game folder while watch mode is on.
+       New archives are extracted one at a time by a background scheduler task. After each one
+       on_change is called, the App refreshes its lists from it, which pre-matches the new folders."""
+
+    def __init__(self, on_change: Callable[[], None]):
+        self.on_change = on_change  # Must be safe to call from worker threads
+        self.watcher: Optional[FolderWatcher] = None
+        self.resolve_target = None
+        self.generation = 0  # Archives queued for an earlier folder are dropped
+        self.extracting = False
+        self.draining = False  # A task is emptying the queue, at most one at a time
+        self.archive_queue: "queue.Queue[tuple]" = queue.Queue()
+        self._lock = threading.Lock()
+
+    @property
+    def folder_path(self) -> Optional[str]:
+        return self.watcher.folder_path if self.watcher else None
+
+    def start(self, folder_path: str, resolve_target=None):
+        """Watch folder_path, a running watch on the same folder only takes the new resolve_target."""
+        with self._lock:
+            self.resolve_target = resolve_target
+            if self.watcher and self.watcher.folder_path == folder_path:
+                return
+        self.stop()
+        if not folder_path or not os.path.isdir(folder_path):
+            log_message(f"Watch mode: '{folder_path}' is not a folder, nothing is watched.")
+            return
+        with self._lock:
+            self.watcher = FolderWatcher(folder_path, self.queue_archives, self.folders_changed)
+            self.watcher.start()
+
+    def stop(self):
+        with self._lock:
+            if self.watcher:
+                self.watcher.stop()
+                self.watcher = None
+            self.generation += 1
+
+    def queue_archives(self, archive_paths: List[str]):
+        with self._lock:
+            generation = self.generation
+        for archive_path in archive_paths:
+            self.archive_queue.put((generation, archive_path))
+        with self._lock:
+            if self.draining:
+                return
+            self.draining = True
+        get_scheduler().submit(self.extract_queued_archives, priority=BACKGROUND, name="watch-extraction")
+
+    def folders_changed(self):
+        # Folders written by a running extraction are refreshed once it finished, not half-written
+        with self._lock:
+            if self.extracting:
+                return
+        self.on_change()
+
+    def extract_queued_archives(self):
+        while True:
+            with self._lock:
+                try:
+                    generation, archive_path = self.archive_queue.get_nowait()
+                except queue.Empty:
+                    self.draining = False
+                    return
+                if generation != self.generation:
+                    continue
+                self.extracting = True
+                resolve_target = self.resolve_target
+            try:
+                with get_device_slots().hold([archive_path]):
+                    result = archive_utils.extract_archive(archive_path, single_pass=True, resolve_target=resolve_target)
+                log_message(f"Watch mode: extracting '{os.path.basename(archive_path)}' finished with {result}.")
+            except Exception as e:
+                log_message(f"Watch mode: failed to extract '{archive_path}': {e}")
+            finally:
+                with self._lock:
+                    self.extracting = False
+                self.on_change()
@@ -0,0 +1,12 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def run_in_tmp_path(tmp_path, monkeypatch):
+    # log_message writes to a relative 'logs' folder, keep it out of the repository
+    monkeypatch.chdir(tmp_path)
@@ -0,0 +1,45 @@
+import random
+
+from modules.folder_matching import find_alias
+from modules.utils.alias_automaton import AliasAutomaton, AliasTable
+
+ALIASES = {"Raiden": "Raiden Shogun", "Ei": "Raiden Shogun", "Ayaka": "Kamisato Ayaka", "Kazu": "Kaedehara Kazuha"}
+
+
+def test_first_alias_follows_dictionary_order():
+    table = AliasTable(ALIASES)
+    # Both 'Raiden' and 'Ei' occur, the key listed first wins like in the key loop
+    assert table.first_alias("ei raiden outfit") == ("Raiden", "Raiden Shogun")
+    assert table.first_alias("ayaka summer") == ("Ayaka", "Kamisato Ayaka")
+    assert table.first_alias("nahida") is None
+
+
+def test_overlapping_keys_found_through_fail_links():
+    automaton = AliasAutomaton(["abcd", "bc", "c"])
+    assert automaton.first_match("xabcx") == "bc"
+    assert automaton.first_match("abcd") == "abcd"
+    assert automaton.first_match("CC") == "c"
+
+
+def test_empty_key_matches_every_name():
+    assert AliasAutomaton(["zz", ""]).first_match("anything") == ""
+
+
+def test_table_changes_rebuild_the_automaton():
+    table = AliasTable(ALIASES)
+    assert table.first_alias("kazuha") == ("Kazu", "Kaedehara Kazuha")
+    del table["Kazu"]
+    assert table.first_alias("kazuha") is None
+    table["Kazuha"] = "Kazuha"
+    assert table.first_alias("kazuha") == ("Kazuha", "Kazuha")
+
+
+def test_matches_the_plain_dictionary_loop():
+    rng = random.Random(42)
+    alphabet = "abc "
+    for _ in range(200):
+        keys = {"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))): f"value {n}" for n in range(rng.randint(1, 8))}
+        names = ["".join(rng.choice(alphabet + "ABC") for _ in range(rng.randint(0, 12))) for _ in range(10)]
+        table = AliasTable(keys)
+        for name in names:
+            assert find_alias(name, table) == find_alias(name, dict(keys)), (keys, name)
@@ -0,0 +1,85 @@
+import os
+from types import SimpleNamespace
+
+from modules.move_planner import (PLAN_BATCH_CONFLICT, PLAN_EXISTS, PLAN_MISSING_SOURCE, PLAN_OK, execute_plan,
+                                  format_plan, plan_moves)
+
+
+def result(source_path, destination_name, destination_root=None):
+    return SimpleNamespace(source_path=source_path, destination_name=destination_name, destination_root=destination_root)
+
+
+def make_tree(tmp_path):
+    source = tmp_path / "source"
+    destination = tmp_path / "destination"
+    for name in ("Raiden Mod", "Ayaka Mod", "Other Raiden Mod"):
+        (source / name).mkdir(parents=True)
+        (source / name / "mod.ini").write_text(name)
+    (destination / "Raiden").mkdir(parents=True)
+    (destination / "Ayaka" / "DISABLED Ayaka Mod").mkdir(parents=True)
+    return source, destination
+
+
+def test_plan_statuses(tmp_path):
+    source, destination = make_tree(tmp_path)
+    plan = plan_moves([
+        result(str(source / "Raiden Mod"), "Raiden"),
+        result(str(source / "Ayaka Mod"), "Ayaka"),
+        result(str(source / "Gone Mod"), "Raiden"),
+    ], str(destination))
+
+    assert [planned_move.status for planned_move in plan] == [PLAN_OK, PLAN_EXISTS, PLAN_MISSING_SOURCE]
+    assert plan[0].destination_path == os.path.join(str(destination), "Raiden", "DISABLED Raiden Mod")
+    assert plan[1].conflict_with == plan[1].destination_path
+
+
+def test_batch_conflict_names_the_first_source(tmp_path):
+    source, destination = make_tree(tmp_path)
+    (source / "nested").mkdir()
+    (source / "nested" / "Raiden Mod").mkdir()
+    plan = plan_moves([
+        result(str(source / "Raiden Mod"), "Raiden"),
+        result(str(source / "nested" / "Raiden Mod"), "Raiden"),
+    ], str(destination))
+
+    assert [planned_move.status for planned_move in plan] == [PLAN_OK, PLAN_BATCH_CONFLICT]
+    assert plan[1].conflict_with == str(source / "Raiden Mod")
+
+
+def test_result_root_wins_over_destination_folder(tmp_path):
+    source, destination = make_tree(tmp_path)
+    other_root = tmp_path / "other game"
+    plan = plan_moves([result(str(source / "Ayaka Mod"), "Ayaka", str(other_root))], str(destination))
+
+    # The same name exists under the default destination but not under the result's own root
+    assert plan[0].status == PLAN_OK
+    assert plan[0].destination_path == os.path.join(str(other_root), "Ayaka", "DISABLED Ayaka Mod")
+
+
+def test_planning_does_not_touch_the_disk(tmp_path):
+    source, destination = make_tree(tmp_path)
+    before = sorted(path for path, _, _ in os.walk(tmp_path))
+    plan_moves([result(str(source / "Raiden Mod"), "New Character")], str(destination))
+    assert sorted(path for path, _, _ in os.walk(tmp_path)) == before
+
+
+def test_execute_plan_moves_only_ok_entries(tmp_path):
+    source, destination = make_tree(tmp_path)
+    plan = plan_moves([
+        result(str(source / "Raiden Mod"), "Raiden"),
+        result(str(source / "Ayaka Mod"), "Ayaka"),
+        result(str(source / "Gone Mod"), "Raiden"),
+    ], str(destination))
+    summary = execute_plan(plan)
+
+    assert (destination / "Raiden" / "DISABLED Raiden Mod" / "mod.ini").read_text() == "Raiden Mod"
+    assert not (source / "Raiden Mod").exists()
+    assert (source / "Ayaka Mod").exists()
+    assert summary['duplicates'] == [(plan[1].source_path, plan[1].destination_path)]
+    assert summary['failed'] == [(plan[2].source_path, plan[2].destination_path)]
+
+
+def test_format_plan_counts_statuses(tmp_path):
+    source, destination = make_tree(tmp_path)
+    plan = plan_moves([result(str(source / "Ayaka Mod"), "Ayaka")], str(destination))
+    assert format_plan(plan).splitlines()[-1] == "New: 0, Already exists: 1, Batch conflict: 0, Missing source: 0"
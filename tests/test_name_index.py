@@ -0,0 +1,72 @@
+from modules.utils.name_index import NameIndex
+
+NAMES = ["Hu Tao Outfit", "Raiden Shogun", "Raiden Swimsuit", "Kamisato Ayaka", "Ayato Casual", "Pokémon Trainer"]
+
+
+def make_index(names=NAMES):
+    index = NameIndex()
+    index.update(names)
+    return index
+
+
+def test_empty_query_returns_none():
+    assert make_index().search("   ") is None
+
+
+def test_long_term_matches_anywhere_in_name():
+    assert make_index().search("iden") == {"Raiden Shogun", "Raiden Swimsuit"}
+    assert make_index().search("suit") == {"Raiden Swimsuit"}
+
+
+def test_short_term_matches_word_prefix_only():
+    index = make_index()
+    assert index.search("ay") == {"Kamisato Ayaka", "Ayato Casual"}
+    # 'ka' starts 'Kamisato' but is only inside 'Ayaka', which a short term does not match
+    assert index.search("ka") == {"Kamisato Ayaka"}
+
+
+def test_every_term_must_match():
+    index = make_index()
+    assert index.search("raiden sho") == {"Raiden Shogun"}
+    assert index.search("raiden ayaka") == set()
+
+
+def test_search_ignores_case_and_accents():
+    assert make_index().search("POKEMON") == {"Pokémon Trainer"}
+
+
+def test_results_agree_with_substring_scan():
+    index = make_index()
+    for term in ("den", "ato", "outfit", "shogun", "zzz"):
+        assert index.search(term) == {name for name in NAMES if term in name.lower()}
+
+
+def test_update_applies_only_the_difference():
+    index = make_index()
+    index.search("raiden")
+    kept_id = index.ids["Raiden Shogun"]
+
+    index.update(["Raiden Shogun", "Nahida Default"])
+    assert index.search("raiden") == {"Raiden Shogun"}
+    assert index.search("nahida") == {"Nahida Default"}
+    assert index.search("ayaka") == set()
+    # Unchanged names are not indexed again
+    assert index.ids["Raiden Shogun"] == kept_id
+    assert set(index.ids) == {"Raiden Shogun", "Nahida Default"}
+
+
+def test_removed_names_leave_no_postings_or_tokens():
+    index = make_index()
+    index.search("a")
+    index.update([])
+    assert index.search("raiden") == set()
+    assert index.search("a") == set()
+    assert not index.postings
+    assert not index.tokens
+
+
+def test_nothing_is_indexed_before_the_first_search():
+    index = make_index()
+    assert not index.ids
+    index.search("hu")
+    assert len(index.ids) == len(NAMES)
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from modules.result_store import CHOSEN_ALTERNATIVE_REASON, ResultStore
+
+ROWS = [
+    (os.path.join("mods", "Raiden Mod"), "Raiden", 100.0, "Folder name", "HIGH", None, ()),
+    (os.path.join("mods", "Ayaka Mod"), "Ayaka", 72.5, "Fuzzy", "MEDIUM", "other game", (("Ayato", 70.0), ("Kazuha", 40.0))),
+    (os.path.join("mods", "Unknown"), "Not Found", 0.0, "No match", "LOW", None, ()),
+]
+
+
+def make_store(tmp_path, spill_threshold=None):
+    store = ResultStore(spill_threshold=spill_threshold, spill_directory=str(tmp_path / "cache"))
+    for _ in range(4):
+        for row in ROWS:
+            store.append(*row)
+    return store
+
+
+def read_rows(store):
+    return [(result.source_path, result.destination_name, result.confidence, result.reason, result.category,
+             result.destination_root, result.alternatives) for result in store]
+
+
+@pytest.fixture(params=[None, 0, 5], ids=["memory", "spilled", "spilled-midway"])
+def store(request, tmp_path):
+    store = make_store(tmp_path, request.param)
+    yield store
+    store.close()
+
+
+def test_rows_round_trip(store):
+    assert read_rows(store) == ROWS * 4
+    assert store[-1].source_path == ROWS[-1][0]
+
+
+def test_spill_moves_rows_to_sqlite(tmp_path):
+    store = make_store(tmp_path, spill_threshold=5)
+    assert store.spill_path and os.path.dirname(store.spill_path) == str(tmp_path / "cache")
+    assert not store.names  # In-memory columns are emptied
+    assert store.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0] + len(store.pending_rows) == len(ROWS) * 4
+    store.close()
+    assert not os.path.exists(store.spill_path)
+    store.close()
+
+
+def test_result_row_matches_attributes(store):
+    row = store[1].row()
+    assert (row.source_path, row.destination_name, row.confidence, row.reason, row.category, row.destination_root,
+            row.alternatives) == ROWS[1]
+
+
+def test_views_and_filters(store):
+    assert [result.index for result in store.category_view("MEDIUM")] == [1, 4, 7, 10]
+    high_or_low = store.filter(lambda row: row.category != "MEDIUM")
+    assert len(high_or_low) == 8
+    assert [result.index for result in high_or_low.category_view("LOW")] == [2, 5, 8, 11]
+    assert store.view().summary() == "12 results (HIGH: 4, MEDIUM: 4, LOW: 4)"
+
+
+def test_choose_alternative_swaps_destination(store):
+    result = store[4]
+    assert result.choose_alternative("Ayato")
+    assert (result.destination_name, result.confidence, result.reason) == ("Ayato", 70.0, CHOSEN_ALTERNATIVE_REASON)
+    assert result.alternatives == (("Ayaka", 72.5), ("Kazuha", 40.0))
+    # Other rows with the same destination are unchanged
+    assert store[1].destination_name == "Ayaka"
+
+
+def test_choose_alternative_rejects_unknown_names(store):
+    assert not store[4].choose_alternative("Nahida")
+    assert not store[0].choose_alternative("Ayaka")
+    assert store[4].destination_name == "Ayaka"
+
+
+def test_duplicate_of_is_kept_per_row(store):
+    store[2].duplicate_of = "installed"
+    assert store[2].duplicate_of == "installed"
+    assert store[2].row().duplicate_of == "installed"
+    store[2].duplicate_of = None
+    assert store[2].duplicate_of is None
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from modules.utils.cancellation import CancellationToken
+from modules.utils.scheduler import BACKGROUND, INTERACTIVE, Scheduler
+
+TIMEOUT = 5
+
+
+class Gate:
+    """Blocking task body that records how many calls run at once."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+        self.started = []
+
+    def __call__(self, name):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            self.started.append(name)
+        self.release.wait(TIMEOUT)
+        with self.lock:
+            self.running -= 1
+        return name
+
+
+def wait_until(condition):
+    deadline = time.monotonic() + TIMEOUT
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def test_run_batch_returns_futures_in_item_order():
+    def square(item):
+        if item == 3:
+            raise ValueError("bad item")
+        return item * item
+
+    futures = Scheduler(max_workers=4).run_batch(square, range(6))
+    assert [future.result() for future in futures if not future.exception()] == [0, 1, 4, 16, 25]
+    assert isinstance(futures[3].exception(), ValueError)
+
+
+def test_run_batch_respects_max_parallel():
+    gate = Gate()
+    gate.release.set()
+    calls = []
+
+    def task(item):
+        calls.append(item)
+        return gate(item)
+
+    Scheduler(max_workers=8).run_batch(task, range(20), max_parallel=2)
+    assert gate.peak <= 2
+    assert sorted(calls) == list(range(20))
+
+
+def test_run_batch_cancels_items_not_started():
+    cancel_token = CancellationToken()
+
+    def task(item):
+        if item == 2:
+            cancel_token.cancel()
+        return item
+
+    futures = Scheduler(max_workers=4).run_batch(task, range(10), max_parallel=1, cancel_token=cancel_token)
+    assert [future.result() for future in futures[:3]] == [0, 1, 2]
+    assert all(future.cancelled() for future in futures[3:])
+
+
+def test_submit_with_cancelled_token_does_not_run():
+    cancel_token = CancellationToken()
+    cancel_token.cancel()
+    calls = []
+    future = Scheduler().submit(calls.append, 1, cancel_token=cancel_token)
+    wait_until(future.done)
+    assert future.cancelled()
+    assert not calls
+
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValueError):
+        Scheduler().submit(print, priority='urgent')
+
+
+def test_background_leaves_a_slot_for_interactive_work():
+    scheduler = Scheduler(max_workers=2, class_limits={BACKGROUND: 2})
+    assert scheduler.limit(BACKGROUND) == 1
+    gate = Gate()
+    background = [scheduler.submit(gate, f"background {n}", priority=BACKGROUND) for n in range(3)]
+    wait_until(lambda: gate.running == 1)
+
+    interactive = scheduler.submit(lambda: "interactive", priority=INTERACTIVE)
+    assert interactive.result(TIMEOUT) == "interactive"
+    assert gate.running == 1  # Still only one background task
+
+    gate.release.set()
+    assert [future.result(TIMEOUT) for future in background] == ["background 0", "background 1", "background 2"]
+    assert gate.peak == 1
+
+
+def test_waiting_interactive_task_gets_the_next_slot():
+    scheduler = Scheduler(max_workers=1)
+    gate = Gate()
+    first = scheduler.submit(gate, "background 0", priority=BACKGROUND)
+    wait_until(lambda: gate.running == 1)
+
+    second = scheduler.submit(gate, "background 1", priority=BACKGROUND)
+    interactive = scheduler.submit(gate, "interactive", priority=INTERACTIVE)
+    gate.release.set()
+    for future in (first, second, interactive):
+        future.result(TIMEOUT)
+    assert gate.started == ["background 0", "interactive", "background 1"]